@@ -8,7 +8,8 @@
 #  A simple program to display an image, it has some more options than appImageViewer
 #    File menu: Open File, Save File, Clear Image, Print Info, and (Close and) Quit
 #    Scale menu: Scale 1, Scale Up, and Scale down
-#    Edit menu: Crop, to Gray, to Edges, Filter image, to Binary, find Lines and undo Last
+#    Edit menu: Crop, Cut black frame, to Gray, to Edges, Filter image, to Binary, find Lines, Fast preview,
+#               undo Last and redo Last
 #  In the bottom it display the value for pixel that mouse points on (without clicking)
 #  It can also print information for many of the attributes used
 #  The simple image processing methods use OpenCV on images represented as numpy arrays,
@@ -18,6 +19,11 @@
 #                      September-November 2021, June 2022
 #                      January-February 2024 (add HoughLines option)
 #                      August 2024, make it possible to run without cv2
+#                      October 2026, undo and redo of several edit operations (ImageHistory)
+#                                    [Try it] in dialogs is computed in a worker thread (PreviewWorker)
+#                                    [Try it] on a downscaled (pyramid) image matched to view scale
+#                                    Cut black frame action, using cropBlackFrame() in myImageTools
+#                                    gray or color is found once for each image (ImageInfo)
 
 # Example on how to use file:
 # (C:\...\Anaconda3) C:\..\py3> activate py11
@@ -44,7 +50,7 @@ try:
 	from PyQt5.QtCore import Qt, QPoint, QRect, QSize, QT_VERSION_STR, pyqtSignal  
 	from PyQt5.QtGui import QImage, QPixmap, QTransform
 	from PyQt5.QtWidgets import (QApplication, QMainWindow, QAction, QFileDialog, QLabel, 
-				QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QRubberBand)
+				QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QRubberBand, QInputDialog)
 except ImportError:
 	raise ImportError( f"{_appFileName}: Requires PyQt5." )
 #end try, import PyQt5 classes 
@@ -54,11 +60,14 @@ from clsEdgeDialog import EdgeDialog
 from clsFilterDialog import FilterDialog
 from clsThresholdDialog import ThresholdDialog
 from clsResizeDialog import ResizeDialog
+from clsImageHistory import ImageHistory
+from clsPreviewWorker import PreviewWorker
+from clsImageInfo import ImageInfo
 if cv2isOK:
 	from clsHoughLinesDialog import HoughLinesDialog, getBestHoughLines, draw_lines
 #
 # some simple methods for image processing
-from myImageTools import smoothFilter, qimage2np, np2qimage
+from myImageTools import smoothFilter, qimage2np, np2qimage, cropBlackFrame
 
 try:
 	from myTools import DBpath # my DropBox
@@ -67,6 +76,119 @@ except:
 	myPath = ""                # path where you may have some images
 #end try, import DBpath  
 
+# Functions for [Try it] previews on a downscaled image, pyramid level with scale factor 'f'
+def scaledKernelSize(k, f):
+	"""Returns the odd kernel size (1,3,5,..) on an image downscaled by factor 'f' 
+	that corresponds to kernel size 'k' on the full size image."""
+	return max(1, 2*int(round((k-1)/(2*f))) + 1)
+
+def scaledFilter(h, f):
+	"""Returns 2D filter 'h' resampled (nearest) to the size used on an image downscaled by 'f'.
+	Small filters, less than 3 taps on the downscaled image, are returned unchanged."""
+	if (f == 1) or (h.ndim != 2) or (scaledKernelSize(min(h.shape), f) < 3):
+		return h
+	(r, c) = h.shape
+	ri = np.round(np.linspace(0, r-1, scaledKernelSize(r, f))).astype(int)
+	ci = np.round(np.linspace(0, c-1, scaledKernelSize(c, f))).astype(int)
+	return h[np.ix_(ri, ci)]
+
+def scaledHoughLinesParameters(t, f):
+	"""Returns the HoughLinesDialog tuple 't' with parameters scaled to an image downscaled by 'f'.
+	Distances and lengths are divided by 'f', and so is the accumulator threshold 
+	since the number of votes for a line is proportional to its length."""
+	if (f == 1):
+		return t
+	(rho, theta, threshold) = t[:3]
+	s = (max(1.0, rho/f), theta, max(1, int(round(threshold/f))))
+	if (len(t) == 7):
+		(minLineLength, maxLineGap) = t[3:5]
+		s = s + (minLineLength/f, maxLineGap/f)
+	return s + tuple(t[-2:])
+
+def previewJob(fun, f, shape, A, *args):
+	"""Returns fun(A, *args), where A is downscaled by 'f', and the resulting image
+	is resized (nearest) to 'shape', the shape of the full size image. 
+	The result is an image, or a tuple with image and title text, or None.
+	"""
+	result = fun(A, *args)
+	if (f == 1) or (result is None):
+		return result
+	if isinstance(result, tuple):
+		(B, text) = result
+		text = f"{text} (preview at 1/{f} size)"
+	else:
+		(B, text) = (result, None)
+	B = cv2.resize(B, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+	return B if (text is None) else (B, text)
+
+# Functions used by both the try-methods, which run them in the preview worker thread,
+# and the edit methods of MainWindow. They only read the input image A.
+def edgeImage(A, valK, valS):
+	"""Use Sobel filters (size valK) and low-pass filter (size valS) and return edge image."""
+	Eh = cv2.Sobel(A, ddepth=cv2.CV_32F, dx=0, dy=1, ksize=valK)
+	Ev = cv2.Sobel(A, ddepth=cv2.CV_32F, dx=1, dy=0, ksize=valK)
+	B = np.sqrt( 1 + np.power(Eh,2) + np.power(Ev,2) )
+	if (valS > 1):
+		a = smoothFilter(len=valS)
+		B = cv2.sepFilter2D(B, ddepth=-1, kernelX=a, kernelY=a)
+	return np.floor(B * (255/np.max(B))).astype(np.uint8)
+
+def filteredImage(A, h, valS):
+	"""Filter image A by filter h and low-pass filter (size valS), result is scaled to 0-255."""
+	if (len(h) > 1):
+		B = cv2.filter2D(A, ddepth=cv2.CV_16S, kernel=h).astype(np.float32)
+	else:
+		B = A.astype(np.float32)
+	if (valS > 1):
+		a = smoothFilter(len=valS)
+		B = cv2.sepFilter2D(B, ddepth=-1, kernelX=a, kernelY=a)
+	B = B - np.min(B)
+	return np.floor(B * (255/np.max(B))).astype(np.uint8)
+
+def binaryImage(A, t=0):
+	"""Threshold image A by 't', or by Otsu method if t < 2."""
+	if (t < 2):
+		(used_thr,B) = cv2.threshold(A, thresh=1, maxval=255, type=cv2.THRESH_OTSU)
+	else:
+		(used_thr,B) = cv2.threshold(A, thresh=t, maxval=255, type=cv2.THRESH_BINARY)
+	#
+	print( f"binaryImage: The used threshold value is {used_thr}" )
+	return B
+
+def houghLines(A, t):
+	"""Find lines in binary image A by HoughLines (len(t)==5) or HoughLinesP (len(t)==7),
+	't' is the tuple returned from HoughLinesDialog. Returns found lines or None.
+	"""
+	if (len(t) == 5):
+		(rho, theta, threshold, nofLines, distLines) = t
+		print( f"HoughLines({rho=:.2f}, {theta=:.2f}*pi/180, {threshold=})" )
+		linesFound = cv2.HoughLines(A, rho=rho, theta=theta*np.pi/180.0, \
+				threshold=threshold)
+	elif (len(t) == 7): 
+		(rho, theta, threshold, minLineLength, maxLineGap, nofLines, distLines) = t
+		print( f"HoughLinesP({rho=:.2f}, {theta=:.2f}*pi/180, {threshold=}, " + \
+			   f"{minLineLength=:.2f}, {maxLineGap=:.2f})" )
+		linesFound = cv2.HoughLinesP(A, rho=rho, theta=theta*np.pi/180.0, \
+				threshold=threshold, minLineLength=minLineLength, \
+				maxLineGap=maxLineGap)
+	else:
+		print( "houghLines: argument 't', dialog response, has not expected length." )
+		linesFound = None
+	#
+	return linesFound
+
+def houghLinesPreview(A, t):
+	"""Returns BGR image with all lines found drawn and a title text, or None."""
+	linesFound = houghLines(A, t)
+	if not isinstance(linesFound, np.ndarray):
+		return None
+	if (A.ndim == 2):
+		imgBGR = cv2.cvtColor(A, cv2.COLOR_GRAY2BGR)
+	else:
+		imgBGR = A.copy()
+	draw_lines(linesFound, imgBGR)
+	return (imgBGR, f"Find lines and [Try it]-button. All the {linesFound.shape[0]} found lines are shown.")
+
 
 class MyGraphicsView(QGraphicsView):
 	"""This is the viewer where the pixmap is shown, it is a simple extension of QGraphicsView.
@@ -188,11 +310,13 @@ class MainWindow(QMainWindow):
 		self.scaleUpFactor = np.sqrt(2.0)
 		#
 		self.pixmap = QPixmap()      # a null pixmap
-		self.prevPixmap = QPixmap()  # another (for previous pixmap)
+		self.history = ImageHistory(maxBytes=256*2**20)   # undo and redo of npImage, budget in bytes
 		self.image = QImage()        # a null image
-		self.isAllGray = False       # true when self.image.allGray(), function is slow for images without color table
+		self.isAllGray = False       # true when self.image is gray, see setIsAllGray()
+		self.imageInfo = ImageInfo() # cached information on self.image, see imageInformation()
 		self.npImage = np.array([])  # size == 0 
 		self.cropActive = False
+		self.blackTolerance = 0      # for cutBlackFrame()
 		#
 		self.scene = QGraphicsScene()
 		self.curItem = None          # (a pointer to) pixmap on scene
@@ -200,6 +324,10 @@ class MainWindow(QMainWindow):
 		self.view.rubberBandRectGiven.connect(self.cropEnd)
 		self.status = QLabel('Open image to display it.', parent = self)
 		self.posInfo = QLabel(' ', parent = self)
+		self.preview = PreviewWorker(parent=self)   # computes [Try it] results in a thread
+		self.preview.resultReady.connect(self.showPreview)
+		self.pyramid = []            # self.npImage and downscaled versions of it, made by previewImage()
+		self.previewMinSize = 64     # smallest side of image in a downscaled preview
 		#
 		self.initMenu()  # menu is needed before (!) self.openFile(..)
 		#
@@ -252,6 +380,9 @@ class MainWindow(QMainWindow):
 		a.triggered.connect(self.cropStart)
 		a.setToolTip('Crop the current pixmap, start by indicating rectangle to keep.')
 		a.setShortcut('Ctrl+Y')  # as in IrfanView
+		a = self.qaCutFrame = QAction('Cut black frame', self)
+		a.triggered.connect(self.cutFrameDlg)
+		a.setToolTip('Cut out any frame of black (dark) rows and columns.')
 		a = self.qaResize = QAction('Resize image', self)
 		a.triggered.connect(self.resizeImage)
 		a.setToolTip('Resize the current npImage (and pixmap)')
@@ -276,9 +407,16 @@ class MainWindow(QMainWindow):
 		a.triggered.connect(self.findHoughLines)
 		a.setToolTip('Find lines using HoughLines or HoughLinesP.')
 		a.setShortcut('Ctrl+L')
+		a = self.qaFastPreview = QAction('Fast preview', self)
+		a.setCheckable(True)
+		a.setChecked(True)
+		a.setToolTip('Compute [Try it] in dialogs on a downscaled image matched to the view scale.')
 		a = self.qaUndoLast = QAction('Undo last', self)
 		a.setShortcut('Ctrl+Z')
 		a.triggered.connect(self.undoLast)
+		a = self.qaRedoLast = QAction('Redo last', self)
+		a.setShortcut('Ctrl+Shift+Z')
+		a.triggered.connect(self.redoLast)
 		#
 		# menuBar is a function in QMainWindow class, returns a QMenuBar object
 		self.mainMenu = self.menuBar()  
@@ -297,13 +435,16 @@ class MainWindow(QMainWindow):
 		#
 		editMenu = self.mainMenu.addMenu('&Edit')
 		editMenu.addAction(self.qaCrop)
+		editMenu.addAction(self.qaCutFrame)
 		editMenu.addAction(self.qaResize)
 		editMenu.addAction(self.qaToGray)
 		editMenu.addAction(self.qaToEdges)
 		editMenu.addAction(self.qaFilter)
 		editMenu.addAction(self.qaToBinary)
 		editMenu.addAction(self.qaFindLines)
+		editMenu.addAction(self.qaFastPreview)
 		editMenu.addAction(self.qaUndoLast)
+		editMenu.addAction(self.qaRedoLast)
 		editMenu.setToolTipsVisible(True)
 		# print( f"File {_appFileName}: (debug) last line in MainWindow.initMenu()" )
 		return
@@ -320,18 +461,22 @@ class MainWindow(QMainWindow):
 		self.qaScaleDown.setEnabled(pixmapOK)
 		#
 		self.qaCrop.setEnabled(cv2isOK and pixmapOK and (not self.cropActive))
+		self.qaCutFrame.setEnabled(pixmapOK and (not self.cropActive))
 		self.qaResize.setEnabled(cv2isOK and pixmapOK and (not self.cropActive))
 		self.qaToGray.setEnabled(cv2isOK and pixmapOK and (not self.isAllGray))
 		self.qaToEdges.setEnabled(cv2isOK and pixmapOK and self.isAllGray)
 		self.qaFilter.setEnabled(cv2isOK and pixmapOK and self.isAllGray)
 		self.qaToBinary.setEnabled(cv2isOK and pixmapOK and self.isAllGray)
 		self.qaFindLines.setEnabled(cv2isOK and pixmapOK and self.isAllGray)
-		self.qaUndoLast.setEnabled(not self.prevPixmap.isNull())
+		self.qaFastPreview.setEnabled(cv2isOK)
+		self.qaUndoLast.setEnabled(self.history.canUndo())
+		self.qaRedoLast.setEnabled(self.history.canRedo())
 		return
 	
 	def setIsAllGray(self, value=-1):
-		"""Set variable 'self.isAllGray', usually by calling method 'QImage.allGray', 
-		but value may be given as input argument 'value' as well; ==0 for False, and >0 for True
+		"""Set variable 'self.isAllGray', usually from the cached information on 'self.image', 
+		see imageInformation(), but value may be given as input argument 'value' as well; 
+		==0 for False, and >0 for True
 		"""
 		if (value == 0):
 			self.isAllGray = False
@@ -339,7 +484,7 @@ class MainWindow(QMainWindow):
 			self.isAllGray = True
 		else:
 			if (not self.image.isNull()): 
-				self.isAllGray = self.image.allGray()
+				self.isAllGray = self.imageInformation().isGray()
 			else:
 				self.isAllGray = False
 			#
@@ -347,8 +492,24 @@ class MainWindow(QMainWindow):
 		self.setMenuItems()
 		return
 		
+	def imageInformation(self):
+		"""Returns 'self.imageInfo', information on 'self.image' (gray, channels, min, max, histogram).
+		The information is found again only when 'self.image' has new pixels, i.e. new cacheKey(),
+		and then from the numpy array the QImage uses (see np2qimage()), or a view of the QImage.
+		"""
+		key = self.image.cacheKey()
+		if not self.imageInfo.isCurrent(key):
+			A = getattr(self.image, 'ndarray', None)   # set by np2qimage()
+			if not isinstance(A, np.ndarray):
+				A = qimage2np(self.image)
+			self.imageInfo.setImage(A, key=key)
+		return self.imageInfo
+	
 	def pixmap2image2np(self):
-		"""Display 'self.pixmap' on scene and copy it to 'self.image' and to 'self.npImage'."""
+		"""Display 'self.pixmap' on scene and copy it to 'self.image' and to 'self.npImage'.
+		Note that 'self.npImage' is a read only view of 'self.image', see qimage2np(),
+		use writeableImage() to get an image to draw into.
+		"""
 		if self.curItem: 
 			self.scene.removeItem(self.curItem)
 		self.curItem = QGraphicsPixmapItem(self.pixmap)
@@ -391,6 +552,47 @@ class MainWindow(QMainWindow):
 		return
 	#end function np2image2pixmap
 	
+	def showPreview(self, jobNo, result):
+		"""Display the result from the preview worker thread, if it is not stale.
+		The result is an image (numpy array), or a tuple with image and title text.
+		This method is a 'slot' for signal 'self.preview.resultReady'.
+		"""
+		if not self.preview.isCurrent(jobNo):
+			return
+		if isinstance(result, tuple):
+			(B, text) = result
+			self.setWindowTitle( f"{self.appFileName} : {text}" )
+		else:
+			B = result
+		self.np2image2pixmap(B, numpyAlso=False)   # note: self.npImage is not updated
+		return
+	
+	def previewImage(self):
+		"""Returns (A, f), where A is 'self.npImage' downscaled by factor f = 1, 2, 4, ..
+		to be used for [Try it] previews. The level in the image pyramid is the smallest 
+		image that still has (at least) one pixel for each screen pixel at current view scale.
+		The pyramid is kept in 'self.pyramid' until 'self.npImage' is changed.
+		"""
+		A = self.npImage
+		if (not cv2isOK) or (not self.qaFastPreview.isChecked()) or (A.size == 0):
+			return (A, 1)
+		#
+		s = self.view.transform().m11()   # current view scale, < 1 when scaled down
+		level = 0
+		while (s*2**(level+1) <= 1.0) and (min(A.shape[:2]) >= self.previewMinSize*2**(level+1)):
+			level += 1
+		#
+		if not (self.pyramid and (self.pyramid[0] is A)):
+			self.pyramid = [A]
+		while (len(self.pyramid) <= level):
+			self.pyramid.append( cv2.pyrDown(self.pyramid[-1]) )
+		return (self.pyramid[level], 2**level)
+	
+	def submitPreview(self, fun, A, f, *args):
+		"""Submit fun(A, *args) to the preview worker, A is 'self.npImage' downscaled by 'f'."""
+		self.preview.submit(previewJob, fun, f, self.npImage.shape, A, *args)
+		return
+	
 # Methods for actions on the File-menu
 	def openFileDlg(self):
 		"""Use the Qt open file name dialog to select an image to open."""
@@ -449,7 +651,7 @@ class MainWindow(QMainWindow):
 	def removePixmapItem(self):
 		"""Removes the current pixmap from the scene if it exists."""
 		if self.curItem: 
-			self.prevPixmap = self.pixmap
+			self.history.push(self.npImage)
 			self.scene.removeItem(self.curItem)
 			self.curItem = None
 		self.setWindowTitle(self.appFileName)
@@ -501,7 +703,7 @@ class MainWindow(QMainWindow):
 			print( f"  .hasAlpha()        = {str(self.pixmap.hasAlpha())}" ) 
 			print( f"  .isQBitmap()       = {str(self.pixmap.isQBitmap())}" )
 		#end if pixmap
-		print( f"self.prevPixmap    = {str(self.prevPixmap)}" )
+		print( f"self.history       = {self.history.info()}" )
 		print( f"self.image         = {str(self.image)}" )
 		if not self.image.isNull():
 			if (self.image.format() == 3):
@@ -519,7 +721,7 @@ class MainWindow(QMainWindow):
 			print( f"  .depth()           = {str(self.image.depth())}" )
 			print( f"  .hasAlphaChannel() = {str(self.image.hasAlphaChannel())}" )
 			print( f"  .format()          = {s2}" )
-			print( f"  .allGray()         = {str(self.image.allGray())}" )
+			print( f"  information        = {self.imageInformation().info()}" )
 		#end if image
 		if isinstance(self.npImage, np.ndarray):   # also print information on this numpy array
 			print( (f"self.npImage()       = "
@@ -532,6 +734,14 @@ class MainWindow(QMainWindow):
 		print( "Close the main window and quit program." )
 		self.close()   # the correct way to quit, is as (upper right) window frame symbol "X" 
 		return
+	
+	def closeEvent(self, event):
+		"""Stop the preview worker thread when the main window is closed.
+		This method is a 'slot' that is called when the main window is closed.
+		"""
+		self.preview.stop()
+		event.accept()
+		return
 		
 # Methods for actions on the Scale-menu, which modify the view transform
 	def scaleOne(self):
@@ -566,8 +776,7 @@ class MainWindow(QMainWindow):
 		
 		A (hidden) functionality is included. If the rectangle is small, a special 
 		function is performed on image: A black frame, if it is present, is cut out.
-		It would be more user friendly (intuitive) if this functionality was behind
-		a new action in the menu system. 
+		This is also the action 'Cut black frame' in the Edit menu, see cutBlackFrame().
 		To crop a (very) small rectangle should do nothing.
 		"""
 		if not self.cropActive: 
@@ -580,103 +789,67 @@ class MainWindow(QMainWindow):
 		if (w > 5) and (h > 5):
 			print( (f"cropImage(): Rectangle from (x,y)=({p2.x()},{p2.y()})" +
 			        f" and (w,h)=({w},{h})") )
-			self.prevPixmap = self.pixmap
-			self.pixmap = self.prevPixmap.copy(p2.x(), p2.y(), w, h)
+			self.history.push(self.npImage)
+			self.pixmap = self.pixmap.copy(p2.x(), p2.y(), w, h)
 			self.pixmap2image2np()
 			self.setWindowTitle( f"{self.appFileName} : cropped image" )
 		else: 
-			A = self.npImage   # just use a short name for image in this part of program
 			print( "cropImage(): Rubber band rectangle is small  --> Special case")
-			print( "  Cut out any frame of black rows and columns.")
-			print( f"  A = npImage is an array of {A.dtype.name}, shape {str(A.shape)}." )
-			# find what to crop,  
-			(left,right,top,bottom) = (0,0,0,0)
-			if (len(A.shape) == 3) and (A.shape[2] >= 3):  # color img
-				print("  This is a color image")
-				for column in range(0,A.shape[1]):
-					if ((A[:,column,0].max() > 0) or 
-						(A[:,column,1].max() > 0) or 
-						(A[:,column,2].max() > 0)): break
-					else: left += 1
-				for column in range(A.shape[1]-1,-1,-1):
-					if ((A[:,column,0].max() > 0) or 
-						(A[:,column,1].max() > 0) or 
-						(A[:,column,2].max() > 0)): break
-					else: right += 1
-				for row in range(0,A.shape[0]):
-					if ((A[row,:,0].max() > 0) or 
-						(A[row,:,1].max() > 0) or 
-						(A[row,:,2].max() > 0)): break
-					else: top += 1
-				for row in range(A.shape[0]-1,-1,-1):
-					if ((A[row,:,0].max() > 0) or 
-						(A[row,:,1].max() > 0) or 
-						(A[row,:,2].max() > 0)): break
-					else: bottom += 1
-				print( f"  end using   (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-			else:  # grayscale img
-				print( "  This is a gray scale image")
-				print( "  start using (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-				for column in range(0, A.shape[1]):
-					if (A[:,column].max() > 0): break
-					else: left += 1
-				for column in range(A.shape[1]-1,-1,-1):
-					if (A[:,column].max() > 0): break
-					else: right += 1
-				for row in range(0,A.shape[0]):
-					if (A[row,:].max() > 0): break
-					else: top += 1
-				for row in range(A.shape[0]-1,-1,-1):
-					if (A[row,:].max() > 0): break
-					else: bottom += 1
-				print( f"  end using   (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-			# 
-			w = A.shape[1] - left - right
-			h = A.shape[0] - top - bottom
-			if max((left,right,top,bottom)):
-				if (w <= 0) or (h <= 0):
-					print( ("cropImage(): Don't crop since (left,right,top,bottom)" +
-					        f" = ({left},{right},{top},{bottom})") )
-				else:
-					print( ("cropImage(): Crop outside of rectangle from (x,y)" +
-					        f"=({left},{top}) and (w,h)=({w},{h})") )
-					self.prevPixmap = self.pixmap 
-					if (len(A.shape) == 3) and (A.shape[2] >= 3):  # color img
-						print("cropImage(): Crop color")
-						B = A[top:top+w,left:left+w,:].copy() 
-						self.np2image2pixmap(B, numpyAlso=True)
-					else:
-						print("cropImage(): Crop gray")
-						B = A[top:top+w,left:left+w].copy()
-						self.np2image2pixmap(B, numpyAlso=True)
-					self.setWindowTitle( f"{self.appFileName} : Black frame cut from image" )
-					self.setIsAllGray()
-			else:
-				print( "cropImage(): No black rows or black columns to crop." )
-			#
+			self.cutBlackFrame()
 		# 
 		self.setMenuItems()
 		return
 	#end function cropImage
 	
+	def cutFrameDlg(self):
+		"""Ask for the tolerance and cut out any frame of black rows and columns."""
+		(tol, ok) = QInputDialog.getInt(self, "Cut black frame", 
+				"Cut rows and columns with all values <= tolerance", 
+				value=self.blackTolerance, min=0, max=254)
+		if ok:
+			self.blackTolerance = tol
+			self.cutBlackFrame(tol)
+		return
+	
+	def cutBlackFrame(self, tol=None):
+		"""Cut out any frame of black (or dark) rows and columns from the image.
+		A row or column is black when all values are <= tol, default 'self.blackTolerance',
+		see cropBlackFrame() in myImageTools.py.
+		"""
+		if (tol is None):
+			tol = self.blackTolerance
+		if (self.npImage.size == 0):
+			return
+		A = self.npImage   # just use a short name for image in this part of program
+		B = cropBlackFrame(A, tol)   # a view, np2qimage handles the strides
+		print( f"cutBlackFrame(): {tol=}, (w,h) = ({A.shape[1]},{A.shape[0]}) -> ({B.shape[1]},{B.shape[0]})" )
+		if (B.shape != A.shape):
+			self.history.push(A)
+			self.np2image2pixmap(B, numpyAlso=True)
+			self.status.setText( f"pixmap: (w,h) = ({B.shape[1]},{B.shape[0]})" )
+			self.setWindowTitle( f"{self.appFileName} : Black frame cut from image" )
+		else:
+			print( "cutBlackFrame(): No black frame to crop, or all of image is black." )
+		#
+		self.setMenuItems()
+		return
+	#end function cutBlackFrame
+	
 	def resizeImage(self):
 		"""Resize the current numpy color or gray scale image
 		and copy (move) it back to current pixmap
 		"""
 		B = self.npImage
-		oldPixmap = self.prevPixmap
-		self.prevPixmap = self.pixmap
 		d = ResizeDialog(parent=self)   # create object (but does not run it)
 		(newWidth, newHight) = d.getValues()   # display dialog and return values
 		if d.result():   # 1 if accepted (OK), 0 if rejected (Cancel)
 			B = cv2.resize(B, (newWidth, newHight), interpolation= cv2.INTER_LINEAR)
+			self.history.push(self.npImage)
 			self.np2image2pixmap(B, numpyAlso=True)
 			(w, h) = (self.pixmap.width(), self.pixmap.height())
 			self.scene.setSceneRect(0, 0, w, h)
 			self.status.setText( f"pixmap: (w,h) = ({w},{h})" )
 			self.setWindowTitle( f"{self.appFileName} : resized image" )
-		else:
-			self.prevPixmap = oldPixmap
 		# 
 		self.setMenuItems()
 		return
@@ -686,7 +859,7 @@ class MainWindow(QMainWindow):
 		and copy (move) it back to current pixmap
 		"""
 		if (len(self.npImage.shape) == 3) and (self.npImage.shape[2] >= 3):
-			self.prevPixmap = self.pixmap
+			self.history.push(self.npImage)
 			if (self.npImage.shape[2] == 3):
 				B = cv2.cvtColor(self.npImage, cv2.COLOR_BGR2GRAY)
 			if (self.npImage.shape[2] == 4):
@@ -706,23 +879,11 @@ class MainWindow(QMainWindow):
 	def tryEdges(self, valK, valS):
 		"""This method may be started from the edge dialog 
 		to (quickly) show results of new edge filter values.
+		The image is computed in the preview worker thread, and shown by showPreview(),
+		on a downscaled image if 'Fast preview' is checked, see previewImage().
 		"""
-		B = self.npImage
-		# B = cv2.GaussianBlur(B, 11, 2.5)  # sizeK and sigma ??
-		# Eh = cv2.Sobel(B, ddepth=cv2.CV_16S, dx=0, dy=1, ksize=valK)
-		# Ev = cv2.Sobel(B, ddepth=cv2.CV_16S, dx=1, dy=0, ksize=valK)
-		# Eh = Eh.astype(np.float32)
-		# Ev = Ev.astype(np.float32) 
-		Eh = cv2.Sobel(B, ddepth=cv2.CV_32F, dx=0, dy=1, ksize=valK)
-		Ev = cv2.Sobel(B, ddepth=cv2.CV_32F, dx=1, dy=0, ksize=valK)
-		# print( f"tryEdges: Eh is an array of {Eh.dtype.name}, shape {str(Eh.shape)}" )
-		B = np.sqrt( 1 + np.power(Eh,2) + np.power(Ev,2) )
-		# B = cv2.Sobel(B, ddepth=cv2.CV_16S, dx=1, dy=1, ksize=valK)  # hmmm
-		if (valS > 1):
-			a = smoothFilter(len=valS)
-			B = cv2.sepFilter2D(B, ddepth=-1, kernelX=a, kernelY=a)
-		B = np.floor(B * (255/np.max(B))).astype(np.uint8)
-		self.np2image2pixmap(B, numpyAlso=False)   # note: self.npImage is not updated
+		(A, f) = self.previewImage()
+		self.submitPreview(edgeImage, A, f, scaledKernelSize(valK, f), scaledKernelSize(valS, f))
 		return
 	#end function tryEdges()
 		
@@ -733,26 +894,16 @@ class MainWindow(QMainWindow):
 		Result is put into 'self.image' and 'self.pixmap'
 		"""
 		B = self.npImage
-		oldPixmap = self.prevPixmap
-		self.prevPixmap = self.pixmap
 		d = EdgeDialog(parent=self)   # create object (but does not run it)
 		(valK,valS) = d.getValues()   # display dialog and return values
+		self.preview.cancel()   # a late [Try it] result should not be shown
 		if d.result():   # 1 if accepted (OK), 0 if rejected (Cancel)
-			Eh = cv2.Sobel(B, ddepth=cv2.CV_32F, dx=0, dy=1, ksize=valK)
-			Ev = cv2.Sobel(B, ddepth=cv2.CV_32F, dx=1, dy=0, ksize=valK)
-			B = np.sqrt( 1 + np.power(Eh,2) + np.power(Ev,2) )
-			if (valS > 1):
-				a = smoothFilter(len=valS)
-				B = cv2.sepFilter2D(B, ddepth=-1, kernelX=a, kernelY=a)
-			# print( f"toEdges: B is an array of {B.dtype.name}, shape {str(B.shape)}" )
-			# print( f"         min(B) {np.min(B):8.2f},  max(B) {np.max(B):8.2f}" )
-			B = np.floor(B * (255/np.max(B))).astype(np.uint8)
+			B = edgeImage(B, valK, valS)
+			self.history.push(self.npImage)
 			self.np2image2pixmap(B, numpyAlso=True)
 			self.setWindowTitle( f"{self.appFileName} : edge image" )
 		else:
-			self.pixmap = self.prevPixmap   # restore 
-			self.pixmap2image2np()
-			self.prevPixmap = oldPixmap
+			self.np2image2pixmap(self.npImage, numpyAlso=True)   # restore, [Try it] may have changed pixmap
 		#
 		self.setMenuItems()
 		return
@@ -762,17 +913,11 @@ class MainWindow(QMainWindow):
 	def tryFilter(self, h, valS):
 		"""This method may be started from the filter dialog 
 		to (quickly) show results of new filter values.
+		The image is computed in the preview worker thread, and shown by showPreview(),
+		on a downscaled image if 'Fast preview' is checked, see previewImage().
 		"""
-		if (len(h) > 1):
-			B = cv2.filter2D(self.npImage, ddepth=cv2.CV_16S, kernel=h).astype(np.float32) 
-		else:
-			B = self.npImage.astype(np.float32)
-		if (valS > 1):
-			a = smoothFilter(len=valS)
-			B = cv2.sepFilter2D(B, ddepth=-1, kernelX=a, kernelY=a)
-		B = B - np.min(B)
-		B = np.floor(B * (255/np.max(B))).astype(np.uint8)
-		self.np2image2pixmap(B, numpyAlso=False)   # note: self.npImage is not updated
+		(A, f) = self.previewImage()
+		self.submitPreview(filteredImage, A, f, scaledFilter(h, f), scaledKernelSize(valS, f))
 		return
 	#end function tryFilter()
 		
@@ -783,26 +928,16 @@ class MainWindow(QMainWindow):
 		Result is put into 'self.image' and 'self.pixmap'
 		"""
 		B = self.npImage
-		oldPixmap = self.prevPixmap
-		self.prevPixmap = self.pixmap   
 		d = FilterDialog(parent=self)   # create object (but does not run it)
 		(h,valS) = d.getValues()   # display dialog and return values
+		self.preview.cancel()   # a late [Try it] result should not be shown
 		if d.result():   # 1 if accepted (OK), 0 if rejected (Cancel)
-			if (len(h) > 1):
-				B = cv2.filter2D(B, ddepth=cv2.CV_16S, kernel=h).astype(np.float32)
-			else:
-				B = self.npImage.astype(np.float32)
-			if (valS > 1):
-				a = smoothFilter(len=valS)
-				B = cv2.sepFilter2D(B, ddepth=-1, kernelX=a, kernelY=a)
-			B = B - np.min(B)
-			B = np.floor(B * (255/np.max(B))).astype(np.uint8)
+			B = filteredImage(B, h, valS)
+			self.history.push(self.npImage)
 			self.np2image2pixmap(B, numpyAlso=True)
 			self.setWindowTitle( f"{self.appFileName} : filtered image" ) 
 		else:
-			self.pixmap = self.prevPixmap   # restore 
-			self.pixmap2image2np()
-			self.prevPixmap = oldPixmap
+			self.np2image2pixmap(self.npImage, numpyAlso=True)   # restore, [Try it] may have changed pixmap
 		#
 		self.setMenuItems()
 		return
@@ -812,15 +947,11 @@ class MainWindow(QMainWindow):
 	def tryBinary(self, t=0):
 		"""This method may be started from the threshold dialog 
 		to (quickly) show results of threshold 't'.
+		The image is computed in the preview worker thread, and shown by showPreview(),
+		on a downscaled image if 'Fast preview' is checked, see previewImage().
 		"""
-		B = self.npImage
-		if (t < 2):
-			(used_thr,B) = cv2.threshold(B, thresh=1, maxval=255, type=cv2.THRESH_OTSU)
-			print( f"tryBinary: The used Otsu threshold value is {used_thr}" ) 
-		else:
-			(used_thr,B) = cv2.threshold(B, thresh=t, maxval=255, type=cv2.THRESH_BINARY)
-		#
-		self.np2image2pixmap(B, numpyAlso=False)   # note: self.npImage is not updated
+		(A, f) = self.previewImage()
+		self.submitPreview(binaryImage, A, f, t)
 		return
 	#end function tryBinary()
 	
@@ -831,23 +962,16 @@ class MainWindow(QMainWindow):
 		and result is put into 'self.image' and 'self.pixmap'
 		"""
 		B = self.npImage
-		oldPixmap = self.prevPixmap
-		self.prevPixmap = self.pixmap   
 		d = ThresholdDialog(parent=self)   # create object (but does not run it)
 		t = d.getValues()   # display dialog and return values
+		self.preview.cancel()   # a late [Try it] result should not be shown
 		if d.result():   # 1 if accepted (OK), 0 if rejected (Cancel)
-			if (t < 2):
-				(used_thr,B) = cv2.threshold(B, thresh=1, maxval=255, type=cv2.THRESH_OTSU)
-			else:
-				(used_thr,B) = cv2.threshold(B, thresh=t, maxval=255, type=cv2.THRESH_BINARY)
-			#
-			print( f"toBinary: The used threshold value is {used_thr}" )
+			B = binaryImage(B, t)
+			self.history.push(self.npImage)
 			self.np2image2pixmap(B, numpyAlso=True)
 			self.setWindowTitle( f"{self.appFileName} : binary image" )
 		else:
-			self.pixmap = self.prevPixmap   # restore 
-			self.pixmap2image2np()
-			self.prevPixmap = oldPixmap
+			self.np2image2pixmap(self.npImage, numpyAlso=True)   # restore, [Try it] may have changed pixmap
 		#
 		self.setMenuItems()
 		return
@@ -857,36 +981,11 @@ class MainWindow(QMainWindow):
 	def tryHoughLines(self, t):
 		"""This method may be started from the HoughLines dialog 
 		to (quickly) show results of parameters in tuple t.
+		The image is computed in the preview worker thread, and shown by showPreview(),
+		on a downscaled image if 'Fast preview' is checked, see previewImage().
 		"""
-		B = self.npImage
-		print("tryHoughLines(): now called using:")
-		if (B.ndim == 2):
-			imgBGR = cv2.cvtColor(B, cv2.COLOR_GRAY2BGR)
-		else:
-			imgBGR = B.copy()
-		#
-		if (len(t) == 5):
-			(rho, theta, threshold, nofLines, distLines) = t
-			print( f"argument t = ({rho=}, {theta=}*pi/180, {threshold=})" )
-			linesFound = cv2.HoughLines(B, rho=rho, theta=theta*np.pi/180.0, \
-					threshold=threshold)
-		elif (len(t) == 7): 
-			(rho, theta, threshold, minLineLength, maxLineGap, nofLines, distLines) = t
-			print( f"argument t = ({rho=}, {theta=}*pi/180, {threshold=}, " + \
-			       f"{minLineLength=}, {maxLineGap=})" )
-			linesFound = cv2.HoughLinesP(B, rho=rho, theta=theta*np.pi/180.0, \
-					threshold=threshold, minLineLength=minLineLength, \
-					maxLineGap=maxLineGap)
-		else:
-			print( "tryHoughLines: argument 't', dialog response, has not expected length." )
-			linesFound = None
-		#
-		if isinstance(linesFound, np.ndarray):
-			draw_lines(linesFound, imgBGR)
-			self.np2image2pixmap(imgBGR, numpyAlso=False)
-			self.setWindowTitle( f"{self.appFileName} : Find lines and [Try it]-button. " + \
-					f"All the {linesFound.shape[0]} found lines are shown." )
-		# 
+		(A, f) = self.previewImage()
+		self.submitPreview(houghLinesPreview, A, f, scaledHoughLinesParameters(t, f))
 		return
 	#end function tryHoughLines()
 	
@@ -896,32 +995,18 @@ class MainWindow(QMainWindow):
 		and result is put into 'self.image' and 'self.pixmap'
 		"""
 		B = self.npImage
-		oldPixmap = self.prevPixmap
-		self.prevPixmap = self.pixmap   
 		d = HoughLinesDialog(self)
 		t = d.getValues()   # display dialog and return values
+		self.preview.cancel()   # a late [Try it] result should not be shown
 		if d.result():   # 1 if accepted (OK), 0 if rejected (Cancel)
+			self.history.push(self.npImage)
 			if (B.ndim == 2):
 				imgBGR = cv2.cvtColor(B, cv2.COLOR_GRAY2BGR)
 			else:
 				imgBGR = B.copy()
 			#
-			if (len(t) == 5):
-				(rho, theta, threshold, nofLines, distLines) = t
-				print( f"Should do HoughLines({rho=:.2f}, {theta=:.2f}*pi/180, {threshold=})" )
-				linesFound = cv2.HoughLines(B, rho=rho, theta=theta*np.pi/180.0, \
-						threshold=threshold)
-			elif (len(t) == 7): 
-				(rho, theta, threshold, minLineLength, maxLineGap, nofLines, distLines) = t
-				print( f"Should do HoughLinesP({rho=:.2f}, {theta=:.2f}*pi/180, {threshold=}, " + \
-					   f"{minLineLength=:.2f}, {maxLineGap=:.2f})" )
-				linesFound = cv2.HoughLinesP(B, rho=rho, theta=theta*np.pi/180.0, \
-						threshold=threshold, minLineLength=minLineLength, \
-						maxLineGap=maxLineGap)
-			else:
-				print( "findHoughLines: dialog response 't'  has not expected length." )
-				linesFound = None
-			#
+			linesFound = houghLines(B, t)
+			(nofLines, distLines) = t[-2:]
 			if isinstance(linesFound, np.ndarray):
 				print( f"{linesFound.shape = }, {linesFound.ndim = }" )
 				# 
@@ -942,26 +1027,38 @@ class MainWindow(QMainWindow):
 				self.setWindowTitle( f"{self.appFileName} : Unexpected result from HoughLines." )
 				self.np2image2pixmap(B, numpyAlso=True)
 		else:
-			self.pixmap = self.prevPixmap   # restore 
-			self.pixmap2image2np()
-			self.prevPixmap = oldPixmap
+			self.np2image2pixmap(self.npImage, numpyAlso=True)   # restore, [Try it] may have changed pixmap
 		#
 		self.setMenuItems()
 		return
 	#end function findHoughLines()
 		
 	def undoLast(self):
-		"""Undo last (edit) operation."""
-		(w, h) = (self.prevPixmap.width(), self.prevPixmap.height())
-		if (w > 0) and (h > 0):
-			self.pixmap.swap(self.prevPixmap)  
-			self.pixmap2image2np()
+		"""Undo last (edit) operation, the image is taken from 'self.history'
+		and the current image is kept there so it can be restored by redoLast().
+		"""
+		B = self.history.undo(self.npImage)
+		if isinstance(B, np.ndarray):
+			self.np2image2pixmap(B, numpyAlso=True)
+			self.status.setText( f"pixmap: (w,h) = ({self.pixmap.width()},{self.pixmap.height()})" )
 			self.setWindowTitle( f"{self.appFileName} : previous image" )
 		# 
 		self.setMenuItems()
 		return
 	#end function undoLast
 	
+	def redoLast(self):
+		"""Redo last undone (edit) operation."""
+		B = self.history.redo(self.npImage)
+		if isinstance(B, np.ndarray):
+			self.np2image2pixmap(B, numpyAlso=True)
+			self.status.setText( f"pixmap: (w,h) = ({self.pixmap.width()},{self.pixmap.height()})" )
+			self.setWindowTitle( f"{self.appFileName} : redone image" )
+		# 
+		self.setMenuItems()
+		return
+	#end function redoLast
+	
 # Finally, some methods used as slots for common actions
 	def resizeEvent(self, arg1):
 		"""Make the size of the view follow any changes in the size of the main window.
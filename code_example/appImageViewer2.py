@@ -35,7 +35,11 @@
 #  Also, I have a copy of the SDK user manual September 2008 version on:
 #  ...\Dropbox\ELE610\IDS camera\IDS_uEye_SDK_manual_enu*.pdf
 #
-# Karl Skretting, UiS, November 2018, February 2019, November 2020, June 2022
+# Karl Skretting, UiS, November 2018, February 2019, November 2020, June 2022,
+#                      October 2026 (continuous capture into the ring of camera buffers,
+#                                    simulated camera when UEYE_SIM is set,
+#                                    frame timestamps and latency histogram,
+#                                    trigger mode and burst, waiting in the driver)
 
 # Example on how to use file:
 # (C:\...\Anaconda3) C:\..\py3> activate py38
@@ -44,7 +48,7 @@
 
 _appFileName = "appImageViewer2"
 _author = "Karl Skretting, UiS" 
-_version = "2022.06.27"
+_version = "2026.10.18"
 
 import sys
 import os.path
@@ -55,22 +59,28 @@ try:
 	from PyQt5.QtCore import Qt, QPoint, QRectF, QT_VERSION_STR
 	from PyQt5.QtGui import QImage, QPixmap, QTransform
 	from PyQt5.QtWidgets import (QApplication, QMainWindow, QAction, QFileDialog, QLabel, 
-			QGraphicsScene, QGraphicsPixmapItem)
+			QGraphicsScene, QGraphicsPixmapItem, QInputDialog)
 except ImportError:
 	raise ImportError( f"{_appFileName}: Requires PyQt5." )
 #end try, import PyQt5 classes
 
-try:
-	from pyueye import ueye
-	from pyueye_example_camera import Camera
-	from pyueye_example_utils import ImageData, ImageBuffer  # FrameThread, 
+if os.environ.get('UEYE_SIM'):   # a folder with images, or 'synthetic', see pyueye_example_simcamera.py
+	from pyueye_example_simcamera import ueye, Camera, ImageData, ImageBuffer
 	ueyeOK = True
-except ImportError:
-	ueye_error = f"{_appFileName}: Requires IDS pyueye example files (and IDS camera)." 
-	# raise ImportError(ueye_error)
-	ueyeOK = False   # --> may run program even without pyueye
-#end try, import pyueye
+else:
+	try:
+		from pyueye import ueye
+		from pyueye_example_camera import Camera
+		from pyueye_example_utils import ImageData, ImageBuffer  # FrameThread, 
+		ueyeOK = True
+	except ImportError:
+		ueye_error = f"{_appFileName}: Requires IDS pyueye example files (and IDS camera)." 
+		# raise ImportError(ueye_error)
+		ueyeOK = False   # --> may run program even without pyueye
+	#end try, import pyueye
+#end if
 
+from pyueye_example_utils import LatencyHistogram   # does not need pyueye
 from appImageViewer1 import myPath, MainWindow as inheritedMainWindow 
 from myImageTools import np2qimage
 
@@ -93,6 +103,10 @@ class MainWindow(inheritedMainWindow):
 		# 
 		self.cam = None
 		self.camOn = False
+		self.latency = LatencyHistogram()   # for the camera images, see getOneImage()
+		self.triggerTimeout = 5000   # ms, see capture_on_trigger_falling_edge()
+		self.npImageTime = None   # time (s) when camera image was made, for self.timedImage
+		self.timedImage = None    # the image (numpy array) self.npImageTime is for
 		#
 		# I had some trouble finding a good way to inherit (and add modifications to) 
 		# functions 'initMenu' and 'setMenuItems' from appImageViewer1
@@ -119,15 +133,26 @@ class MainWindow(inheritedMainWindow):
 		a = self.qaGetOneImageV2 = QAction('Get one image (ver.2 2022)', self)
 		a.triggered.connect(self.getOneImageV2)
 		
+		a = self.qaContinuous = QAction('Continuous capture', self)
+		a.setCheckable(True)
+		a.setToolTip('Camera runs live video into a ring of buffers, Get one image returns the newest frame')
+		a.toggled.connect(self.setContinuous)
+		
 		a = self.qaCameraOff = QAction('Camera off', self)
 		a.triggered.connect(self.cameraOff)
 		
+		a = self.qaLatency = QAction('Print latency histogram', self)
+		a.setToolTip('Time from camera to host, processing and display, for the images got')
+		a.triggered.connect(self.printLatency)
+		
 		# New menu item for setting up the trigger
 		a = self.qaSetupTrigger = QAction('Setup Trigger', self)
+		a.setToolTip('Trigger mode (falling or rising edge, software, off) and frames for each trigger')
 		a.triggered.connect(self.setup_trigger)
 		
 		# New menu item for capturing image on trigger
 		a = self.qaCaptureOnTrigger = QAction('Capture on Trigger', self)
+		a.setToolTip('Wait for a trigger (falling edge if not set up), and show the image')
 		a.triggered.connect(self.capture_on_trigger_falling_edge)
 		
 		# Adding actions to the camera menu
@@ -136,6 +161,8 @@ class MainWindow(inheritedMainWindow):
 		camMenu.addAction(self.qaCameraInfo)
 		camMenu.addAction(self.qaGetOneImage)
 		camMenu.addAction(self.qaGetOneImageV2)
+		camMenu.addAction(self.qaContinuous)
+		camMenu.addAction(self.qaLatency)
 		camMenu.addAction(self.qaCameraOff)
 		camMenu.addAction(self.qaSetupTrigger)  # Add setup trigger action
 		camMenu.addAction(self.qaCaptureOnTrigger)  # Add capture on trigger action
@@ -154,14 +181,18 @@ class MainWindow(inheritedMainWindow):
 		self.qaCameraInfo.setEnabled(ueyeOK and self.camOn)
 		self.qaGetOneImage.setEnabled(ueyeOK and self.camOn)
 		self.qaGetOneImageV2.setEnabled(ueyeOK and self.camOn)
+		self.qaContinuous.setEnabled(ueyeOK and self.camOn)
+		self.qaContinuous.setChecked(ueyeOK and self.camOn and self.cam.continuous)
 		self.qaCameraOff.setEnabled(ueyeOK and self.camOn)
+		self.qaSetupTrigger.setEnabled(ueyeOK and self.camOn)
+		self.qaCaptureOnTrigger.setEnabled(ueyeOK and self.camOn)
 		return
 		
 	def copy_image(self, image_data):
 		"""Copy an image from camera memory to numpy image array 'self.npImage'."""
 		tempBilde = image_data.as_1d_image()
 		if np.min(tempBilde) != np.max(tempBilde):
-			self.npImage = np.copy(tempBilde[:,:,[0,1,2]])  # or [2,1,0] ??  RGB or BGR?
+			self.npImage = np.copy(tempBilde[:,:,:3])  # BGR, one copy (tempBilde may be a view of camera buffer)
 			print( ("copy_image(): 'self.npImage' is an ndarray" + 
 			        f" of {self.npImage.dtype.name}, shape {str(self.npImage.shape)}.") )
 		else: 
@@ -293,18 +324,42 @@ class MainWindow(inheritedMainWindow):
 		self.setMenuItems2()
 		return
 	
+	def setContinuous(self, on):
+		"""Start or stop continuous capture, i.e. live video into the ring of camera buffers."""
+		if ueyeOK and self.camOn and (on != self.cam.continuous):
+			if on:
+				if self.cam.trigger_mode != ueye.IS_SET_TRIGGER_OFF:   # free run
+					self.cam.set_trigger_mode(ueye.IS_SET_TRIGGER_OFF)
+				self.cam.start_continuous()
+			else:
+				self.cam.stop_continuous()
+				print( (f"{self.appFileName}: setContinuous() {self.cam.frame_count} frames fetched," +
+				        f" {self.cam.dropped_count} dropped") )
+		return
+		
 	def getOneImage(self):
-		"""Get one image from IDS camera."""
+		"""Get one image from IDS camera, the newest frame when capture is continuous."""
 		if ueyeOK and self.camOn:
 			self.view.setMouseTracking(False)
 			print( f"{self.appFileName}: getOneImage() try to capture one image" )
 			imBuf = ImageBuffer()  # used to get return pointers
-			self.cam.freeze_video(True)
-			retVal = ueye.is_WaitForNextImage(self.cam.handle(), 1000, imBuf.mem_ptr, imBuf.mem_id)
+			if self.cam.continuous:   # no trigger and wait, the frame is already in a buffer
+				image_data = self.cam.latest_frame(1000)
+				retVal = ueye.IS_SUCCESS if (image_data is not None) else ueye.IS_TIMED_OUT
+				if (image_data is not None):
+					imBuf = image_data.img_buff
+			else:
+				self.cam.freeze_video(True)
+				retVal = ueye.is_WaitForNextImage(self.cam.handle(), 1000, imBuf.mem_ptr, imBuf.mem_id)
+				if retVal == ueye.IS_SUCCESS:
+					image_data = ImageData(self.cam.handle(), imBuf, copy=False)
+			#end if
 			if retVal == ueye.IS_SUCCESS:
 				print( f"  ueye.IS_SUCCESS: image buffer id = {imBuf.mem_id}" )
-				self.copy_image( ImageData(self.cam.handle(), imBuf) )  # copy image_data 
+				self.copy_image( image_data )  # copy image_data, and unlock buffer
+				image_data.mark('processed')
 				if (self.npImage.size > 0): # ok 
+					self.setImageTime(image_data)
 					self.image = np2qimage(self.npImage)
 					if (not self.image.isNull()):
 						self.pixmap = QPixmap.fromImage(self.image)
@@ -318,9 +373,11 @@ class MainWindow(inheritedMainWindow):
 						self.status.setText( f"pixmap: (w,h) = ({w},{h})" )
 						self.scaleOne()
 						self.view.setMouseTracking(True)
+						image_data.mark('displayed')
 					else:
 						self.pixmap = QPixmap()
 					#end
+					self.latency.add(image_data)
 				else:  # empty image self.npImage
 					self.image = QImage()
 					self.pixmap = QPixmap()
@@ -335,80 +392,117 @@ class MainWindow(inheritedMainWindow):
 		#	pass  # ignore action
 		return
 		
+	def setImageTime(self, image_data):
+		"""Remember when the camera image in 'self.npImage' was made, camera clock if available."""
+		self.npImageTime = image_data.device_time if (image_data.device_time is not None) else image_data.timestamp
+		self.timedImage = self.npImage
+		return
+		
+	def imageTime(self):
+		"""Returns time (s) when the current image was made, or None if it is not a (timed) camera image."""
+		if (self.timedImage is not None) and (self.timedImage is self.npImage):
+			return self.npImageTime
+		return None
+		
+	def printLatency(self):
+		"""Print latency histogram for the camera images got so far."""
+		print( self.latency.summary() )
+		return
+		
 	def cameraOff(self):
 		"""Turn IDS camera off and print some information."""
 		if ueyeOK and self.camOn:
+			self.setContinuous(False)
+			if self.cam.trigger_mode != ueye.IS_SET_TRIGGER_OFF:
+				self.cam.stop_triggered()
 			self.cam.exit()
 			self.camOn = False
 			self.setMenuItems2()
 			print( f"{self.appFileName}: cameraOff() Camera stopped ok" )
 		return
+		
 	def setup_trigger(self):
-		"""Setup the camera for trigger mode."""
+		"""Setup the camera for trigger mode, and the number of frames (burst) for each trigger."""
 		if ueyeOK and self.camOn:
-			# Set the camera trigger mode (assuming the camera supports hardware triggering)
-			self.cam.set_trigger_mode(ueye.IS_TRIGGER_MODE_FALLING_EDGE)  # Set trigger mode to falling edge
-			print(f"{self.appFileName}: Trigger mode set to falling edge.")
+			modes = { 'Falling edge (hardware)': ueye.IS_SET_TRIGGER_HI_LO,
+			          'Rising edge (hardware)': ueye.IS_SET_TRIGGER_LO_HI,
+			          'Software (force trigger)': ueye.IS_SET_TRIGGER_SOFTWARE,
+			          'Off (free run)': ueye.IS_SET_TRIGGER_OFF }
+			(item, ok) = QInputDialog.getItem(self, "Setup trigger", "Trigger mode:", list(modes), 0, False)
+			if not ok:
+				return
+			if modes[item] == ueye.IS_SET_TRIGGER_OFF:
+				self.cam.stop_triggered()
+				print( f"{self.appFileName}: setup_trigger() trigger off, use continuous or get one image" )
+			else:
+				(burst, ok) = QInputDialog.getInt(self, "Setup trigger", "Frames for each trigger:", 
+						self.cam.burst_size, 1, 100)
+				if not ok:
+					return
+				self.cam.start_triggered(modes[item], burst)
+				print( (f"{self.appFileName}: setup_trigger() {item}, burst of {self.cam.burst_size} frames," +
+				        " waiting for triggers") )
+			self.setMenuItems2()
 		else:
-			print("Camera is not on or IDS pyueye is not available.")
+			print( "Camera is not on or IDS pyueye is not available." )
+		return
 		
 	def capture_on_trigger_falling_edge(self):
-		"""Capture an image on falling edge of the trigger."""
+		"""Capture images on a trigger, falling edge if trigger is not set up, and show the first one.
+		The wait is done in the driver (no polling), until the burst is exposed or 'self.triggerTimeout' (ms)."""
 		if not (ueyeOK and self.camOn):
-			print("Camera not initialized or triggered.")
+			print( "Camera not initialized or triggered." )
 			return
+		if self.cam.trigger_mode == ueye.IS_SET_TRIGGER_OFF:
+			self.cam.start_triggered(ueye.IS_SET_TRIGGER_HI_LO, 1)
+		if self.cam.trigger_mode == ueye.IS_SET_TRIGGER_SOFTWARE:
+			self.cam.force_trigger()
+		timeout = self.triggerTimeout
+		print( f"{self.appFileName}: Waiting for trigger, at most {timeout/1000:.1f} s ..." )
+		frames = self.cam.wait_trigger(timeout)
+		if not frames:
+			print( f"{self.appFileName}: No trigger within {timeout/1000:.1f} s" )
+			self.setMenuItems2()
+			return
+		T = [(f.device_time if (f.device_time is not None) else f.timestamp) for f in frames]
+		print( (f"  got {len(frames)} of {self.cam.burst_size} frames, intervals (ms): " +
+		        ", ".join(f"{1000*(t1-t0):.1f}" for (t0,t1) in zip(T[:-1], T[1:]))) )
+		for image_data in frames[1:]:
+			image_data.unlock()
+		self.capture_image(frames[0])
+		return
 
-		print(f"{self.appFileName}: Waiting for falling edge trigger...")
-
-		# Monitor the trigger pin, waiting for a falling edge
-		while True:
-			trigger_status = self.check_trigger()  # A method to check the current trigger status
-			if trigger_status == 'falling':
-				# If falling edge detected, capture image
-				print(f"{self.appFileName}: Falling edge detected, capturing image.")
-				self.capture_image()
-				break  # Exit loop after capturing one image
-
-	def check_trigger(self):
-		"""Check the status of the trigger signal."""
-		# Check for the trigger falling edge. This depends on your specific camera setup.
-		# For example, if you're using a GPIO pin, you might need to check its state.
-		# Assuming we have a function or hardware access to check trigger:
-		trigger_state = self.get_trigger_state()  # Placeholder for actual trigger check
-		
-		if trigger_state == 'low':
-			return 'falling'  # Triggered by falling edge
-		return 'high'  # No trigger
-
-	def capture_image(self):
-		"""Capture an image and display it."""
-		print(f"{self.appFileName}: Capturing image.")
-		imBuf = ImageBuffer()  # used to get return pointers
-		self.cam.freeze_video(True)
-		retVal = ueye.is_WaitForNextImage(self.cam.handle(), 1000, imBuf.mem_ptr, imBuf.mem_id)
-		
-		if retVal == ueye.IS_SUCCESS:
-			print(f"  ueye.IS_SUCCESS: image buffer id = {imBuf.mem_id}")
-			self.copy_image(ImageData(self.cam.handle(), imBuf))  # Copy image data 
-			if self.npImage.size > 0:
-				self.image = np2qimage(self.npImage)
-				if not self.image.isNull():
-					self.pixmap = QPixmap.fromImage(self.image)
-					if self.curItem:
-						self.scene.removeItem(self.curItem)
-					self.curItem = QGraphicsPixmapItem(self.pixmap)
-					self.scene.addItem(self.curItem)
-					self.scene.setSceneRect(0, 0, self.pixmap.width(), self.pixmap.height())
-					self.setWindowTitle(f"{self.appFileName} : Camera image")
-					self.scaleOne()
-				else:
-					self.pixmap = QPixmap()
+	def capture_image(self, image_data):
+		"""Copy the camera image 'image_data' (and unlock buffer) and display it."""
+		print( f"{self.appFileName}: Capturing image, buffer id = {image_data.img_buff.mem_id}" )
+		self.view.setMouseTracking(False)
+		self.copy_image(image_data)  # copy image_data, and unlock buffer
+		image_data.mark('processed')
+		if self.npImage.size > 0:
+			self.setImageTime(image_data)
+			self.image = np2qimage(self.npImage)
+			if not self.image.isNull():
+				self.pixmap = QPixmap.fromImage(self.image)
+				if self.curItem:
+					self.scene.removeItem(self.curItem)
+				self.curItem = QGraphicsPixmapItem(self.pixmap)
+				self.scene.addItem(self.curItem)
+				self.scene.setSceneRect(0, 0, self.pixmap.width(), self.pixmap.height())
+				self.setWindowTitle( f"{self.appFileName} : Camera image (trigger)" )
+				(w,h) = (self.pixmap.width(), self.pixmap.height())
+				self.status.setText( f"pixmap: (w,h) = ({w},{h})" )
+				self.scaleOne()
+				self.view.setMouseTracking(True)
+				image_data.mark('displayed')
 			else:
-				print(f"  No image in buffer {imBuf}")
+				self.pixmap = QPixmap()
+			self.latency.add(image_data)
 		else:
-			print(f"Error capturing image, retVal: {retVal}")
+			print( "  No image in buffer" )
+		self.setIsAllGray()
+		self.setMenuItems2()
+		return
 
-	
 #end class MainWindow
 
 if __name__ == '__main__':
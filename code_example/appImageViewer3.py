@@ -9,7 +9,9 @@
 #  Color menu can have actions for: dice colors, select colors, ...
 #  Dice menu can have actions for: locating dices, finding circles, ...
 #
-# Karl Skretting, UiS, November 2020, June 2022
+# Karl Skretting, UiS, November 2020, June 2022, 
+#                      October 2026 ([Try it] in worker thread, on downscaled image,
+#                                    color tools use lookup tables, clsColorLUT.py)
 
 # Example on how to use file: 
 # (C:\...\Anaconda3) C:\..\py3> activate py38
@@ -36,12 +38,51 @@ except ImportError:
 
 from appImageViewer2 import myPath, MainWindow as inheritedMainWindow 
 from clsHoughCirclesDialog import HoughCirclesDialog
+from clsColorLUT import ColorLUT
 
 # define 17 colorNames as in: https://doc.qt.io/qt-5/qcolor.html 
 colorNames17 = ['white','black','cyan','darkCyan','red','darkRed','magenta','darkMagenta',
 				'green','darkGreen','yellow','darkYellow','blue','darkBlue',
 				'gray','darkGray','lightGray']
 
+def scaledHoughCirclesParameters(t, f):
+	"""Returns the HoughCirclesDialog tuple 't' with parameters scaled to an image downscaled by 'f'.
+	Distances and radii are divided by 'f', and so is the accumulator threshold (param2)
+	since the number of votes for a circle is proportional to its circumference.
+	maxRadius == 0 (no maximum) is kept."""
+	if (f == 1):
+		return t
+	(dp, minDist, param1, param2, minRadius, maxRadius, maxCircles) = t
+	return (dp, max(1.0, minDist/f), param1, max(1, param2/f), 
+			int(minRadius/f), int(np.ceil(maxRadius/f)), maxCircles)
+
+def houghCirclesImage(A, t):
+	"""Find circles in image A using parameters in tuple 't' from HoughCirclesDialog,
+	and return a BGR copy of A with the circles drawn. Used by tryHoughCircles()
+	in the preview worker thread, thus A is only read.
+	"""
+	(dp, minDist, param1, param2, minRadius, maxRadius, maxCircles) = t
+	if (A.ndim == 2):
+		B = cv2.cvtColor(A, cv2.COLOR_GRAY2BGR )
+	elif (A.shape[2] == 4):
+		B = cv2.cvtColor(A, cv2.COLOR_BGRA2BGR )
+	else:
+		B = A.copy()
+	if (A.ndim == 3):
+		A = cv2.cvtColor(B, cv2.COLOR_BGR2GRAY )
+	C = cv2.HoughCircles(A, cv2.HOUGH_GRADIENT, dp=dp, minDist=minDist,
+				param1=param1, param2=param2, minRadius=minRadius, maxRadius=maxRadius)
+	#draw circles on B
+	if C is not None:
+		C = np.int16(np.around(C))
+		print(f"  Found {C.shape[1]} circles with radius from {C[0,:,2].min()} to {C[0,:,2].max()}")
+		for i in range(min(maxCircles, C.shape[1])):
+			(x,y,r) = ( C[0,i,0], C[0,i,1], C[0,i,2] )  # center and radius
+			cv2.circle(B, (x,y), r, (255, 0, 255), 2) # and circle outline 
+		#end for
+	#end if
+	return B
+
 class MainWindow(inheritedMainWindow):  
 	"""MainWindow class for this image viewer is inherited from another image viewer."""
 	
@@ -60,6 +101,7 @@ class MainWindow(inheritedMainWindow):
 		self.view.rubberBandRectGiven.connect(self.meanColorEnd)  
 		# signal is already connected to cropEnd (appImageViewer1), now connected to two slots!
 		self.meanColorActive = False  
+		self.colorLUT = None   # ColorLUT for the custom colors, see colorTable()
 		#
 		self.initMenu3()
 		self.setMenuItems3()
@@ -150,7 +192,9 @@ class MainWindow(inheritedMainWindow):
 		
 # Methods for actions on the Color-menu
 	def checkColor(self):
-		"""Check colors for image and set menu items according to active image."""
+		"""Check colors for image and set menu items according to active image.
+		The color state is found only once for each image, see imageInformation().
+		"""
 		self.setIsAllGray()   # check color state on self.image (=self.pixmap, and usually also self.npImage)
 		self.setMenuItems()
 		self.setMenuItems3()
@@ -162,7 +206,7 @@ class MainWindow(inheritedMainWindow):
 		Have no 'undo' here as doing the operation once more undo these changes, 
 		thus 'undo' will undo previous operation as before.
 		"""
-		# self.prevPixmap = self.pixmap   # to include 'undo', which is not needed here
+		# self.history.push(self.npImage)   # to include 'undo', which is not needed here
 		if (len(self.npImage.shape) == 3) and (self.npImage.shape[2] >= 3):
 			B = cv2.cvtColor(self.npImage, cv2.COLOR_BGR2RGBA)
 			self.np2image2pixmap(B, numpyAlso=True)
@@ -173,7 +217,7 @@ class MainWindow(inheritedMainWindow):
 			self.np2image2pixmap(B, numpyAlso=True)
 			self.setWindowTitle( f"{self.appFileName} : image where black and white are swapped" )
 		#
-		self.setMenuItems()   # prevPixmap may have changed from None to pixmap
+		self.setMenuItems()   # history may have changed
 		return
 		
 	def editColors(self):
@@ -258,6 +302,23 @@ class MainWindow(inheritedMainWindow):
 			QColorDialog.setCustomColor(cNo, QColor(colorNames17[cNo+1]))
 		return
 		
+	def customColors(self):
+		"""Returns list of the custom colors as (r,g,b) tuples, None for the unused (white) colors."""
+		colors = []
+		for cNo in range(QColorDialog.customCount()):
+			color = QColorDialog.customColor(cNo)
+			if (color == QColor('white')):
+				colors.append(None)
+			else:
+				colors.append((color.red(), color.green(), color.blue()))
+		return colors
+		
+	def colorTable(self, colors):
+		"""Returns a ColorLUT for 'colors', the previous one is used again if the colors are the same."""
+		if (self.colorLUT is None) or (not self.colorLUT.sameColors(colors)):
+			self.colorLUT = ColorLUT(colors)
+		return self.colorLUT
+		
 	def distColorRGB(self):
 		"""Make binary image by testing if pixel color is close to a selected RGB color.
 		Distance is measured for each pixel p with color (r,g,b) to selected color (R,G,B) as
@@ -267,24 +328,17 @@ class MainWindow(inheritedMainWindow):
 		color = QColorDialog.getColor(title="Select the color to measure distance to.")
 		if color.isValid():
 			print(f"  selected color is {color.name()}")
-			rgb = [color.red(), color.green(), color.blue()]
-			A = self.npImage.astype(np.float32)   # active image
-			if (len(A.shape) > 2) and (A.shape[2] >= 3): 
-				A = A[:,:,[2,1,0]]  # bgr(a) --> rgb
-				B = np.ones(shape=A.shape, dtype=np.float32)  # the one color image
-				B[:,:,:] = rgb  
-				D = np.max(np.abs(A-B),axis=2).astype(np.uint8)  # the distance image
-				del B
-			else:
+			rgb = (color.red(), color.green(), color.blue())
+			A = self.npImage   # active image, uint8 BGR(A) or gray
+			if not ((len(A.shape) > 2) and (A.shape[2] >= 3)): 
 				grayLevel = int((color.red() + color.green() + color.blue() + 0.5)/3)
 				print(f"Color '{color.name()}' = ({color.red()}, {color.green()}, {color.blue()}) has grayLevel {grayLevel}")
-				D = np.abs(A - grayLevel).astype(np.uint8)
-				del grayLevel
+			D = ColorLUT([rgb]).distance(A)   # the distance image
 			#
 			print(f"  'A'  is ndarray of {A.dtype.name}, shape: {str(A.shape)}")
 			print(f"  'D'  is ndarray of {D.dtype.name}, shape: {str(D.shape)}, max: {D.max()}")
 			#
-			self.prevPixmap = self.pixmap   
+			self.history.push(self.npImage)
 			self.np2image2pixmap(D, numpyAlso=True)
 			self.setWindowTitle(f"{self.appFileName} distColorRGB(): distance to color {color.name()}")
 			self.checkColor()
@@ -298,107 +352,73 @@ class MainWindow(inheritedMainWindow):
 					# value=25, min=0, max=255)
 			# print(f"QInputDialog.getInt(..) returned  'dist' = {dist},  'ok' = {ok}")
 			# if ok:
-				# # oldPixmap = self.prevPixmap
-				# self.prevPixmap = self.pixmap   
+				# self.history.push(self.npImage)
 				# B = 255*(D <= dist).astype(np.uint8)
 				# self.np2image2pixmap(B, numpyAlso=True)
 				# self.setWindowTitle(f"{self.appFileName} approxColor(): binary image for color {color.name()}")
 				# self.setIsAllGray()
 			# else:
 				# pass  # 
-				# # self.pixmap = self.prevPixmap   # restore 
-				# # self.pixmap2image2np()
-				# # self.prevPixmap = oldPixmap
+				# # self.np2image2pixmap(self.npImage, numpyAlso=True)   # restore 
 			#
 		
 	def bestDistColorRGB(self):
 		"""Make binary image by testing if pixel color is close to one of custom RGB color.
 		Distance is measured for each pixel p with color (r,g,b) to custom colors (Ri,Gi,Bi) as
 		   d = min_i max(abs(r-Ri), abs(g-Gi), abs(b-Bi)),   i in range(nofCustomColors)
-		where d is pixel value for resulting gray scale image
+		where d is pixel value for resulting gray scale image.
+		The distances are found by a lookup table made once for the set of custom colors.
 		"""
 		color = QColorDialog.getColor(title="Check the colors to measure distance to.")
 		# but we don't use the returned color, does [Cancel] give not Valid color?
 		if color.isValid():  
 			# print(f"  selected color is {color.name()}")
-			A = self.npImage.astype(np.float32)   # active image
-			if (len(A.shape) > 2) and (A.shape[2] >= 3): 
-				A = A[:,:,[2,1,0]]  # bgr(a) --> rgb
-			D = 255*np.ones((A.shape[0], A.shape[1]), dtype=np.uint8)
-			for cNo in range(QColorDialog.customCount()):
-				color = QColorDialog.customColor(cNo)
-				if not (color == QColor('white')):
-					rgb = [color.red(), color.green(), color.blue()]
-					grayLevel = int((color.red() + color.green() + color.blue() + 0.5)/3)
-					if (len(A.shape) > 2) and (A.shape[2] >= 3): 
-						B = np.ones(shape=A.shape, dtype=np.float32)  # the one color image
-						B[:,:,:] = rgb  
-						Di = np.max(np.abs(A-B),axis=2).astype(np.uint8)  # the distance image
-						del B
-					else:
-						Di = np.abs(A - grayLevel).astype(np.uint8)
-					#end if
-					D = np.minimum(D,Di)
-				#end if
-			#end for
+			A = self.npImage   # active image, uint8 BGR(A) or gray
+			D = self.colorTable(self.customColors()).distance(A)
 			print(f"  'A'  is ndarray of {A.dtype.name}, shape: {str(A.shape)}")
 			print(f"  'D'  is ndarray of {D.dtype.name}, shape: {str(D.shape)}, max: {D.max()}")
 			#
-			self.prevPixmap = self.pixmap   
+			self.history.push(self.npImage)
 			self.np2image2pixmap(D, numpyAlso=True)
 			self.setWindowTitle(f"{self.appFileName} image after bestDistColorRGB()")
 			self.checkColor()
 		return
 		
 	def attractColorRGB(self):
-		"""Make image by assigning colors to closest of custom RGB colors."""
+		"""Make image by assigning colors to closest of custom RGB colors.
+		Distance to, and index of, the closest color are found by a lookup table."""
 		color = QColorDialog.getColor(title="Check the colors to attract image towards.")
 		# but we don't use the returned color, does [Cancel] give not Valid color?
 		if color.isValid():  
 			# print(f"  selected color is {color.name()}")
-			A = self.npImage.astype(np.float32)   # active image
-			if (len(A.shape) > 2) and (A.shape[2] >= 3): 
-				A = A[:,:,[2,1,0]]  # bgr(a) --> rgb
-			D = 255*np.ones((A.shape[0], A.shape[1], QColorDialog.customCount()), dtype=np.uint8)   # 3D-array
-			for cNo in range(QColorDialog.customCount()):
-				color = QColorDialog.customColor(cNo)
-				if not (color == QColor('white')):
-					rgb = [color.red(), color.green(), color.blue()]
-					grayLevel = int((color.red() + color.green() + color.blue() + 0.5)/3)
-					if (len(A.shape) > 2) and (A.shape[2] >= 3): 
-						B = np.ones(shape=A.shape, dtype=np.float32)  # the one color image
-						B[:,:,:] = rgb  
-						D[:,:,cNo] = np.max(np.abs(A-B),axis=2).astype(np.uint8)  # the distance images
-						del B
-					else:
-						D[:,:,cNo] = np.abs(A - grayLevel).astype(np.uint8)
-					#end if
-				#end if
-			#end for
+			A = self.npImage   # active image, uint8 BGR(A) or gray
+			colors = self.customColors()
+			(minD, I) = self.colorTable(colors).nearest(A)  # distance to closest color, and its index
 			print(f"  'A'  is ndarray of {A.dtype.name}, shape: {str(A.shape)}")
-			print(f"  'D'  is ndarray of {D.dtype.name}, shape: {str(D.shape)}, max: {D.max()}")
+			print(f"  'minD'  is ndarray of {minD.dtype.name}, shape: {str(minD.shape)}, max: {minD.max()}")
 			(distLimit,ok) = QInputDialog.getInt(self,    # parent
 					f"attractColorRGB(): input 'distLimit'",  # title
 					"Give limit distance for attracted color (else 'white')",      # label
 					value=25, min=0, max=255)
 			print(f"QInputDialog.getInt(..) returned  'distLimit' = {distLimit},  'ok' = {ok}")
 			if ok:
-				B = 255*np.ones((A.shape[0], A.shape[1], 3), dtype=np.uint8)
-				minD = D.min(axis=2)  # distance to closest color
-				I = D.argmin(axis=2)  # indexes for best color
-				for cNo in range(QColorDialog.customCount()):
-					color = QColorDialog.customColor(cNo)
-					if not (color == QColor('white')):
-						idx = np.logical_and(I==cNo, minD<=distLimit)
-						print(f"  set {np.count_nonzero(idx)} pixels to color {color.name()}")
-						B[idx,0] = color.blue()   # numpy array is BGR!
-						B[idx,1] = color.green()
-						B[idx,2] = color.red()
-					#end if
+				# palette with the BGR color for each index, numpy array is BGR!
+				palette = 255*np.ones((max(len(colors),1), 3), dtype=np.uint8)
+				for (cNo, rgb) in enumerate(colors):
+					if (rgb is not None):
+						palette[cNo,:] = rgb[::-1]
+				#end for
+				close = (minD <= distLimit)
+				B = palette[I]
+				B[~close] = 255
+				count = np.bincount(I[close], minlength=len(colors))
+				for (cNo, rgb) in enumerate(colors):
+					if (rgb is not None):
+						print(f"  set {count[cNo]} pixels to color {QColorDialog.customColor(cNo).name()}")
 				#end for
 				print(f"  'B'  is ndarray of {B.dtype.name}, shape: {str(B.shape)}")
 				#
-				self.prevPixmap = self.pixmap   
+				self.history.push(self.npImage)
 				self.np2image2pixmap(B, numpyAlso=True)
 				self.setWindowTitle(f"{self.appFileName} image after attractColorRGB()")
 				self.checkColor()
@@ -422,7 +442,7 @@ class MainWindow(inheritedMainWindow):
 					return
 				#end
 			elif (len(self.npImage.shape) == 2):
-				self.A = self.npImage.copy()
+				self.A = self.npImage   # only read by HoughCircles, no copy needed
 				self.B = cv2.cvtColor(self.npImage, cv2.COLOR_GRAY2BGR )   
 			else:
 				print("prepareHoughCircles(): numpy image is not as expected. --> return")
@@ -444,38 +464,26 @@ class MainWindow(inheritedMainWindow):
 		return
 		
 	def tryHoughCircles(self, t):
-		"""Simply display results for the parameters given in tuple 't', without committing."""
+		"""Simply display results for the parameters given in tuple 't', without committing.
+		The image is computed in the preview worker thread, and shown by showPreview(),
+		on a downscaled image if 'Fast preview' is checked, see previewImage().
+		"""
 		(dp, minDist, param1, param2, minRadius, maxRadius, maxCircles) = t
 		print("tryHoughCircles(): now called using:")
 		print(f"t = (dp={dp}, minDist={minDist}, param1={param1}, param2={param2}, minRadius={minRadius}, maxRadius={maxRadius})")
 		#
-		self.prepareHoughCirclesA()  # check self.A
-		C = cv2.HoughCircles(self.A, cv2.HOUGH_GRADIENT, dp=dp, minDist=minDist,
-					param1=param1, param2=param2, minRadius=minRadius, maxRadius=maxRadius)
-		#draw circles on B
-		self.prepareHoughCirclesB()  # make self.B
-		if C is not None:
-			C = np.int16(np.around(C))
-			print(f"  'C'  is ndarray of {C.dtype.name}, shape: {str(C.shape)}")
-			print(f"  Found {C.shape[1]} circles with radius from {C[0,:,2].min()} to {C[0,:,2].max()}")
-			for i in range(min(maxCircles, C.shape[1])):
-				(x,y,r) = ( C[0,i,0], C[0,i,1], C[0,i,2] )  # center and radius
-				cv2.circle(self.B, (x,y), r, (255, 0, 255), 2) # and circle outline 
-				print(f"  circle {i} has center in ({x},{y}) and radius {r}")
-			#end for
-		#end if
-		self.np2image2pixmap(self.B, numpyAlso=False)   # note: self.npImage is not updated
+		(A, f) = self.previewImage()   # self.npImage, perhaps downscaled
+		self.submitPreview(houghCirclesImage, A, f, scaledHoughCirclesParameters(t, f))
 		return
 	
 	def findCircles(self):
 		"""Find circles in active image using HoughCircles(..)."""
-		oldPixmap = self.prevPixmap  
-		self.prevPixmap = self.pixmap
 		self.A = np.array([])  
 		self.prepareHoughCirclesA()  # make self.A
 		#find circles, note that HoughCirclesDialog is in another file: clsHoughCirclesDialog.py
 		d = HoughCirclesDialog(self, title="Select parameters that locate the dice eyes") 
 		(dp, minDist, param1, param2, minRadius, maxRadius, maxCircles) = d.getValues()   # display dialog and return values
+		self.preview.cancel()   # a late [Try it] result should not be shown
 		if d.result():
 			C = cv2.HoughCircles(self.A, cv2.HOUGH_GRADIENT, dp=dp, minDist=minDist,
 					param1=param1, param2=param2, minRadius=minRadius, maxRadius=maxRadius)
@@ -492,14 +500,13 @@ class MainWindow(inheritedMainWindow):
 			#
 			#finish
 			self.A = np.array([])  
+			self.history.push(self.npImage)
 			self.np2image2pixmap(self.B, numpyAlso=True)
 			self.B = np.array([])  
 			self.setWindowTitle(f"{self.appFileName} indicate found circles.")
 			self.checkColor()
 		else:
-			self.pixmap = self.prevPixmap   # restore 
-			self.pixmap2image2np()
-			self.prevPixmap = oldPixmap
+			self.np2image2pixmap(self.npImage, numpyAlso=True)   # restore, [Try it] may have changed pixmap
 		#end if
 		return
 		
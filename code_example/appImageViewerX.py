@@ -31,7 +31,7 @@ except ImportError:
 #end try, import pyueye
 
 from appImageViewer1 import myPath, MainWindow as inheritedMainWindow 
-from myImageTools import np2qimage
+from myImageTools import np2qimage, writeableImage
 
 
 class MainWindow(inheritedMainWindow):  
@@ -313,6 +313,7 @@ class MainWindow(inheritedMainWindow):
 			cv2.CHAIN_APPROX_SIMPLE)
 		cnts = imutils.grab_contours(cnts)
 		# loop over the contours
+		self.npImage = writeableImage(self.npImage)   # copy only if it is a view
 		for c in cnts:
 			# compute the center of the contour
 			M = cv2.moments(c)
@@ -5,7 +5,9 @@
 #
 # This file include some functions for
 #  - IDS camera: error_text, cam_info
-#  - Image processing: rho_theta_to_x_y, clip_line_to_box
+#  - Image processing: rho_theta_to_x_y, clip_line_to_box,
+#                      and the versions for many lines at once (numpy arrays):
+#                      rho_theta_to_x_y_batch, clip_line_to_box_batch
 #  - Display image: mpl_plot, cv_plot
 #
 # TODO:  The functions are still quite unready and "in construction"-shape
@@ -14,6 +16,7 @@
 #
 # .../Dropbox/ELE610/py3/bf_tools.py   
 # Karl Skretting, UiS, October 2018, June 2022
+#      October 2026, batch versions of rho_theta_to_x_y and clip_line_to_box
 
 # Anaconda prompt..> activate py38
 # (py38) C:\..\py3> python -i startup.py 
@@ -22,6 +25,8 @@
 # >>> (img, cInfo, sInfo, rectAOI) = bft.cam_info(dev_id=0, verbose=True)  # image as RGB
 # >>> bft.mpl_plot(img)              # matplotlib use RGB
 # >>> bft.cv_plot(img[:,:,[2,1,0]])  # OpenCV use BGR
+# (py38) C:\..\py3> python bf_tools.py test    # check batch functions
+# (py38) C:\..\py3> python bf_tools.py bench   # time batch functions for 10000 lines
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -205,6 +210,85 @@ def clip_line_to_box(x1,y1,x2,y2,xW,xE,yN,yS):
 	#end while
 	return (x1,y1,x2,y2)
 	
+def rho_theta_to_x_y_batch(rho, theta, width, height):
+	"""  As rho_theta_to_x_y() but for N lines at once, rho and theta are arrays
+	(or lists) of the same length, width and height are as for rho_theta_to_x_y().
+	The same rules, including horizontal and vertical lines (epsilon), are used
+	for all lines without a Python loop. No messages are printed for lines that 
+	only touch the image, for these the two points are equal as in rho_theta_to_x_y().
+	Returns four arrays of int.
+	ex:
+	(x1,y1,x2,y2) = rho_theta_to_x_y_batch(lines[:,0,0], lines[:,0,1], width, height)
+	"""
+	epsilon = 0.00001
+	(rho, theta) = np.broadcast_arrays(np.asarray(rho, dtype=np.float64), 
+	                                   np.asarray(theta, dtype=np.float64))
+	(c, s) = (np.cos(theta), np.sin(theta))
+	(x0, y0) = (c*rho, s*rho)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		(xA, yA) = (rho/c, rho/s)                  # where line crosses axis
+		(xH, yW) = (x0-(s/c)*(height-y0),y0-(c/s)*(width-x0))  # where line crosses image edges
+	(inXA, inYA) = ((0.0 < xA) & (xA < width), (0.0 < yA) & (yA < height))
+	(inXH, inYW) = ((0.0 < xH) & (xH < width), (0.0 < yW) & (yW < height))
+	hor = (np.abs(c) < epsilon)            # horizontal line
+	ver = ~hor & (np.abs(s) < epsilon)     # vertical line
+	other = ~hor & ~ver
+	# first point, P1, is yA, xA, xH or yW (in this order)
+	p1A = other & inYA
+	p1B = other & ~inYA & inXA
+	p1C = other & ~inYA & ~inXA & inXH
+	p1D = other & ~inYA & ~inXA & ~inXH
+	x1 = np.select([hor, ver, p1A, p1B, p1C, p1D], [0, x0, 0, xA, xH, width-1])
+	y1 = np.select([hor, ver, p1A, p1B, p1C, p1D], [y0, 0, yA, 0, height-1, yW])
+	(x1, y1) = (np.trunc(np.nan_to_num(x1)), np.trunc(np.nan_to_num(y1)))
+	# second point, P2, is the next valid of xA, xH or yW, or P1 if none is valid 
+	p2A = p1A & inXA
+	p2H = ((p1A & ~inXA) | p1B) & inXH
+	p2W = ((p1A & ~inXA & ~inXH) | (p1B & ~inXH) | p1C) & inYW
+	x2 = np.select([hor, ver, p2A, p2H, p2W], [width-1, x0, xA, xH, width-1], default=x1)
+	y2 = np.select([hor, ver, p2A, p2H, p2W], [y0, height-1, 0, height-1, yW], default=y1)
+	(x2, y2) = (np.trunc(np.nan_to_num(x2)), np.trunc(np.nan_to_num(y2)))
+	return (x1.astype(int), y1.astype(int), x2.astype(int), y2.astype(int))
+	
+def clip_line_to_box_batch(x1,y1,x2,y2,xW,xE,yN,yS):
+	"""  As clip_line_to_box() but for N lines at once, x1,y1,x2,y2 are arrays 
+	(or lists) of the same length, and the box xW,xE,yN,yS is as for clip_line_to_box().
+	The Cohen-Sutherland steps are done for all lines that still need clipping,
+	a line is finished as in clip_line_to_box(). Returns four arrays of float.
+	
+	ex: 
+	(x1,y1,x2,y2) = clip_line_to_box_batch(x1,y1,x2,y2, 0,width,0,height)
+	"""
+	(x1,y1,x2,y2) = (np.array(v, dtype=np.float64) for v in np.broadcast_arrays(x1,y1,x2,y2))
+	if not ((xW < xE) and (yN < yS)):
+		print("clip_line_to_box_batch:  box edges (or image size) not as supposed.")
+		return (x1,y1,x2,y2)
+	#
+	def outCode(x, y):
+		return ((x < xW) + ((x > xE) << 1) + ((y < yN) << 2) + ((y > yS) << 3))
+	#
+	oc1 = outCode(x1, y1)
+	oc2 = outCode(x2, y2)
+	while True:
+		# lines with one point inside and one outside, or both outside on different sides
+		todo = ((oc1 | oc2) != 0) & ((oc1 & oc2) == 0)
+		if not np.any(todo):
+			break
+		use1 = todo & (oc1 != 0)   # move point 1, else point 2
+		oc0 = np.where(use1, oc1, oc2)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			xs = [xW, xE, x1 + (x2 - x1)*(yN - y1)/(y2 - y1), x1 + (x2 - x1)*(yS - y1)/(y2 - y1)]
+			ys = [y1 + (y2 - y1)*(xW - x1)/(x2 - x1), y1 + (y2 - y1)*(xE - x1)/(x2 - x1), yN, yS]
+		cond = [(oc0 & 1) != 0, (oc0 & 2) != 0, (oc0 & 4) != 0, (oc0 & 8) != 0]
+		(x0, y0) = (np.select(cond, xs), np.select(cond, ys))
+		use2 = todo & ~use1
+		(x1, y1) = (np.where(use1, x0, x1), np.where(use1, y0, y1))
+		(x2, y2) = (np.where(use2, x0, x2), np.where(use2, y0, y2))
+		oc1 = np.where(use1, outCode(x1, y1), oc1)
+		oc2 = np.where(use2, outCode(x2, y2), oc2)
+	#end while
+	return (x1,y1,x2,y2)
+	
 def im_info(A):
 	if isinstance(A, np.ndarray):
 		print( 'argument: dtype=', A.dtype, ', size=', A.size, 
@@ -511,6 +595,61 @@ def test_rho():
 	print( f"--> (x1,y1) = ({x1:8.1f}, {y1:8.1f}),   (x2,y2) = ({x2:8.1f}, {y2:8.1f})" )
 	return
 
+def test_batch(n=2000):
+	"""Check that the batch functions give the same result as the functions for one line.
+	Random lines, and lines close to horizontal and vertical (epsilon cases), are used."""
+	import io, contextlib
+	rng = np.random.default_rng(0)
+	(width, height) = (1280, 960)
+	rho = rng.uniform(-1700, 1700, n)
+	theta = rng.uniform(0, np.pi, n)
+	theta[:12] = [0, np.pi/2, np.pi, 1e-6, np.pi/2+1e-6, np.pi-1e-6, 2e-5, 
+	              np.pi/2-2e-5, 0, np.pi/2, np.pi, np.pi/4]
+	rho[6:12] = [0, 0, 0.5, 500, 959.5, 10]
+	with contextlib.redirect_stdout(io.StringIO()):   # rho_theta_to_x_y() prints for some lines
+		P = np.array([rho_theta_to_x_y(r, t, width, height) for (r,t) in zip(rho,theta)])
+	Q = np.array(rho_theta_to_x_y_batch(rho, theta, width, height)).T
+	bad = np.count_nonzero(np.any(P != Q, axis=1))
+	print( f"test_batch(): rho_theta_to_x_y_batch() differs for {bad} of {n} lines" )
+	#
+	(xW,xE,yN,yS) = (0, width, 0, height)
+	L = rng.uniform(-500, 1800, (n,4))
+	L[:4] = [(-2,-1,7,8), (8.5,1.5,11.5,4.5), (5,-10,5,2000), (-10,5,2000,5)]   # incl. vertical, horizontal
+	P = np.array([clip_line_to_box(*line, xW,xE,yN,yS) for line in L], dtype=np.float64)
+	Q = np.array(clip_line_to_box_batch(L[:,0],L[:,1],L[:,2],L[:,3], xW,xE,yN,yS)).T
+	bad = np.count_nonzero(np.any(np.abs(P-Q) > 1e-9, axis=1))
+	print( f"test_batch(): clip_line_to_box_batch() differs for {bad} of {n} lines" )
+	return
+
+def bench_batch(n=10000):
+	"""Time the functions for one line (in a loop) and the batch functions for n lines."""
+	import io, contextlib, time
+	rng = np.random.default_rng(1)
+	(width, height) = (1280, 960)
+	rho = rng.uniform(0, 1600, n)
+	theta = rng.uniform(0, np.pi, n)
+	t0 = time.perf_counter()
+	with contextlib.redirect_stdout(io.StringIO()):
+		[rho_theta_to_x_y(r, t, width, height) for (r,t) in zip(rho,theta)]
+	t1 = time.perf_counter()
+	(x1,y1,x2,y2) = rho_theta_to_x_y_batch(rho, theta, width, height)
+	t2 = time.perf_counter()
+	print( f"bench_batch({n}): rho_theta_to_x_y  loop {1000*(t1-t0):8.2f} ms, batch {1000*(t2-t1):8.2f} ms" )
+	L = rng.uniform(-500, 1800, (n,4))
+	t0 = time.perf_counter()
+	[clip_line_to_box(*line, 0,width,0,height) for line in L]
+	t1 = time.perf_counter()
+	clip_line_to_box_batch(L[:,0],L[:,1],L[:,2],L[:,3], 0,width,0,height)
+	t2 = time.perf_counter()
+	print( f"bench_batch({n}): clip_line_to_box  loop {1000*(t1-t0):8.2f} ms, batch {1000*(t2-t1):8.2f} ms" )
+	return
+
 if __name__ == '__main__':
+	import sys
 	# (img, cInfo, sInfo, rectAOI) = cam_info(dev_id=0, verbose=True)
-	test_rho()
+	if (len(sys.argv) >= 2) and (sys.argv[1] == 'test'):
+		test_batch()
+	elif (len(sys.argv) >= 2) and (sys.argv[1] == 'bench'):
+		bench_batch()
+	else:
+		test_rho()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ../ELE610/py3/clsAutoFocus.py
+#
+#  The class AutoFocus, find the exposure time for an IDS camera that gives
+#  the sharpest image in a region of interest (ROI), using as few frames as
+#  possible. For each frame a sharpness metric is computed on the ROI only:
+#    'laplacian'  variance of the Laplacian of the gray scale ROI
+#    'tenengrad'  mean of squared gradient magnitude (Sobel) of the gray scale ROI
+#  An under exposed image has low contrast, and an over exposed image is
+#  saturated (no gradients), so the metric has a maximum in between.
+#  The search is a hill-climb on log2(exposure): steps in one direction while
+#  the metric increases (bracketing), then the other direction, and then the
+#  step is halved, until the step is small, the metric does not improve more
+#  than 'tol' (relative), or 'max_frames' frames are measured. Exposure is set
+#  by ueye.is_Exposure(), and frames are taken in continuous capture mode,
+#  the frames exposed before a new exposure time was set are skipped.
+#
+# October 2026
+
+# Example on how to use file:
+#   (py38) C:\..\py3> python clsAutoFocus.py   # test using simulated camera (synthetic images)
+# Example on how to use file in appImageViewer3V.py:
+#   from clsAutoFocus import AutoFocus
+#   af = AutoFocus(self.cam, ueye, roi=None, method='laplacian')   # roi=None is central half of frame
+#   (exposure, metric) = af.run()   # exposure in ms is set in camera
+#   print( af.info() )
+
+import numpy as np
+import cv2
+
+def sharpness(A, roi=None, method='laplacian'):
+	"""Sharpness metric for the ROI of image A (uint8, gray, BGR or BGRA), larger is sharper.
+	roi is (x, y, w, h) in pixels, or None for the central half (in each direction) of the image."""
+	(h, w) = A.shape[:2]
+	if roi is None:
+		roi = (w//4, h//4, w//2, h//2)
+	(x, y, rw, rh) = (int(v) for v in roi)
+	B = A[max(y,0):y+rh, max(x,0):x+rw]   # a view, only the ROI is converted to gray
+	if (B.size == 0):
+		return 0.0
+	if (B.ndim == 3):
+		B = cv2.cvtColor(B, cv2.COLOR_BGRA2GRAY if (B.shape[2] == 4) else cv2.COLOR_BGR2GRAY)
+	if (method == 'laplacian'):
+		return float(cv2.Laplacian(B, cv2.CV_32F).var())
+	elif (method == 'tenengrad'):
+		gx = cv2.Sobel(B, cv2.CV_32F, 1, 0, ksize=3)
+		gy = cv2.Sobel(B, cv2.CV_32F, 0, 1, ksize=3)
+		return float(np.mean(gx*gx + gy*gy))
+	raise ValueError(f"sharpness: method should be 'laplacian' or 'tenengrad', not '{method}'")
+
+class AutoFocus:
+	""" Hill-climb on exposure time to maximize a sharpness metric in a ROI.
+	example of use:
+		af = AutoFocus(cam, ueye, roi=(x,y,w,h), method='tenengrad', tol=0.02, max_frames=20)
+		(exposure, metric) = af.run()      # the best exposure (ms) is set in the camera
+		af.history                          # list of (exposure, metric) for the measured frames
+	cam is Camera from pyueye_example_camera.py (or pyueye_example_simcamera.py) and ueye
+	is the module (or simulated object) with is_Exposure() and the constants.
+	"""
+	def __init__(self, cam, ueye, roi=None, method='laplacian', tol=0.02, max_frames=20,
+	             step=1.0, min_step=0.125, settle=1, timeout=1000):
+		self.cam = cam
+		self.ueye = ueye
+		self.roi = roi
+		self.method = method
+		self.tol = tol                # relative improvement needed to accept a step
+		self.max_frames = max_frames  # frames measured (skipped frames are not counted)
+		self.step = step              # first step in log2(exposure), 1.0 is double or half
+		self.min_step = min_step      # stop when the step is smaller, 0.125 is about 9 %
+		self.settle = settle          # frames skipped after exposure is changed
+		self.timeout = timeout
+		self.history = []             # (exposure, metric) for each measured frame
+		self.skipped = 0
+		self.exposureRange = None
+		return
+
+	def getExposure(self, cmd=None):
+		d = self.ueye.double()
+		retVal = self.ueye.is_Exposure(self.cam.handle(),
+		             self.ueye.IS_EXPOSURE_CMD_GET_EXPOSURE if (cmd is None) else cmd, d, 8)
+		return float(d) if (retVal == self.ueye.IS_SUCCESS) else None
+
+	def setExposure(self, ms):
+		"""Set exposure time, and skip the frames exposed with the old one, returns the exposure set."""
+		d = self.ueye.double(ms)
+		self.ueye.is_Exposure(self.cam.handle(), self.ueye.IS_EXPOSURE_CMD_SET_EXPOSURE, d, 8)
+		while True:   # frames already waiting in the queue
+			buf = self.cam.wait_buffer(0)
+			if buf is None:
+				break
+			self.cam.unlock_buffer(buf)
+			self.skipped += 1
+		for i in range(self.settle):   # frame (possibly) being exposed when exposure was set
+			frame = self.cam.next_frame(self.timeout)
+			if frame is not None:
+				frame.unlock()
+				self.skipped += 1
+		actual = self.getExposure()
+		return ms if (actual is None) else actual
+
+	def measure(self):
+		"""Sharpness metric of the ROI in the next frame, the frame is not copied."""
+		frame = self.cam.next_frame(self.timeout)
+		if frame is None:
+			return None
+		with frame:
+			return sharpness(frame.as_1d_image(), self.roi, self.method)
+
+	def run(self):
+		"""Search exposure time, returns (exposure, metric), the best exposure is set in the camera."""
+		ueye = self.ueye
+		emin = self.getExposure(ueye.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MIN)
+		emax = self.getExposure(ueye.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MAX)
+		e0 = self.getExposure()
+		if (emin is None) or (emax is None) or (e0 is None):
+			print( "AutoFocus: could not get exposure (range) from camera" )
+			return (e0, None)
+		self.exposureRange = (emin, emax)
+		(lo, hi) = (np.log2(max(emin, 1e-3)), np.log2(emax))
+		wasContinuous = self.cam.continuous
+		if not wasContinuous:
+			self.cam.start_continuous()
+		self.history = []
+		self.skipped = 0
+		measured = {}   # log2(exposure) rounded -> metric, no exposure is measured twice
+		#
+		def metricAt(x):
+			key = round(x, 3)
+			if key not in measured:
+				e = self.setExposure(2.0**x) if self.history else e0
+				m = self.measure()
+				self.history.append((e, m))
+				measured[key] = (-1.0 if (m is None) else m)
+			return measured[key]
+		#
+		x = float(np.clip(np.log2(e0), lo, hi))
+		m = metricAt(x)
+		(step, direction, turned) = (self.step, 1.0, False)
+		while (step >= self.min_step) and (len(self.history) < self.max_frames):
+			xn = float(np.clip(x + direction*step, lo, hi))
+			mn = metricAt(xn) if (xn != x) else -1.0
+			if (mn > m*(1.0 + self.tol)):   # better, continue in this direction
+				(x, m, turned) = (xn, mn, False)
+			elif not turned:                 # try the other direction
+				(direction, turned) = (-direction, True)
+			else:                            # x is best within step, try smaller steps
+				(step, turned) = (step/2.0, False)
+		#end while
+		exposure = self.setExposure(2.0**x)
+		if not wasContinuous:
+			self.cam.stop_continuous()
+		self.exposure = exposure
+		self.metric = m
+		return (exposure, m)
+
+	def info(self):
+		if not self.history:
+			return "AutoFocus: not run"
+		txt = (f"AutoFocus: exposure {self.exposure:.3f} ms, {self.method} metric {self.metric:.1f}, " +
+		       f"{len(self.history)} frames measured, {self.skipped} skipped")
+		for (e, m) in self.history:
+			txt += f"\n  exposure {e:8.3f} ms, metric {(-1.0 if (m is None) else m):10.1f}"
+		return txt
+	#end class AutoFocus
+
+if __name__ == '__main__':
+	import time
+	from pyueye_example_simcamera import ueye, Camera
+	cam = Camera(source='synthetic', fps=60, jitter=0.0)
+	cam.init()
+	cam.set_colormode(ueye.IS_CM_BGR8_PACKED)
+	cam.alloc(3)
+	for (method, e0) in (('laplacian', 1.0), ('tenengrad', 60.0)):
+		ueye.is_Exposure(cam.handle(), ueye.IS_EXPOSURE_CMD_SET_EXPOSURE, ueye.double(e0), 8)
+		t0 = time.perf_counter()
+		af = AutoFocus(cam, ueye, method=method)
+		af.run()
+		print( f"start at {e0} ms, {1000*(time.perf_counter()-t0):.0f} ms used. " + af.info() )
+	cam.exit()
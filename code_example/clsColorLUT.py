@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ../ELE610/py3/clsColorLUT.py
+#
+#  The class ColorLUT, distance from each pixel to the closest of a set of colors,
+#  and which color that is, using lookup tables (LUT) for uint8 images.
+#
+#  The distance from pixel (r,g,b) to color (R,G,B) is the Chebyshev distance
+#    d = max(abs(r-R), abs(g-G), abs(b-B)),
+#  as used by the color tools in appImageViewer3.py. Since d only depends on the
+#  pixel value, a table with d (and index of closest color) for all possible
+#  values is made once for each set of colors, and an image is mapped through
+#  the table in one pass, without float copies of the image for each color.
+#  For one color three small tables (one for each channel) are used, for more
+#  colors a table for all 2^24 RGB values (or 2^(3*bits) if bits < 8).
+#  With bits == 8, the default, the results are exact.
+#
+# October 2026
+
+# Example on how to use file:
+#   (py38) C:\..\py3> python clsColorLUT.py   # test
+# Example on how to use file in appImageViewer3.py:
+#   from clsColorLUT import ColorLUT
+#   lut = ColorLUT([(255,0,0), None, (0,0,255)])   # None is an unused color (distance 255)
+#   D = lut.distance(self.npImage)                 # uint8 BGR(A) or gray image
+#   (D, I) = lut.nearest(self.npImage)             # and index of closest color
+
+import numpy as np
+
+class ColorLUT:
+	""" Lookup tables for distance to closest color, and index of that color, in a set of colors.
+	example of use:
+		lut = ColorLUT(colors, bits=8)   # colors is list of (r,g,b) or None
+		D = lut.distance(A)              # A is uint8 image, BGR, BGRA or gray
+		(D, I) = lut.nearest(A)          # D and I are uint8 2D arrays
+	A color given as None is not used, its distance is 255 for all pixels as the
+	distance images initialized to 255 in appImageViewer3.py. For gray scale images
+	the distance is to the gray level of each color, int((r+g+b+0.5)/3).
+	Ties are resolved to the first color, as np.argmin().
+	"""
+	def __init__(self, colors, bits=8):
+		self.colors = [None if (c is None) else tuple(int(v) for v in c) for c in colors]
+		self.bits = min(max(int(bits), 1), 8)
+		self.lut3 = None   # (dist, index) for all quantized RGB values, made when needed
+		self.lut1 = None   # (dist, index) for the 256 gray levels, made when needed
+		return
+
+	def sameColors(self, colors, bits=8):
+		"""True if this object is made for 'colors' (and 'bits'), i.e. it can be used again."""
+		other = [None if (c is None) else tuple(int(v) for v in c) for c in colors]
+		return (other == self.colors) and (min(max(int(bits), 1), 8) == self.bits)
+
+	def _grayTable(self):
+		"""Make the tables for gray scale images, distance and index for each gray level."""
+		if self.lut1 is None:
+			v = np.arange(256, dtype=np.int16)
+			dist = np.full(256, 255, dtype=np.uint8)
+			index = np.zeros(256, dtype=np.uint8)
+			for (k, c) in enumerate(self.colors):
+				if (c is None):
+					d = np.full(256, 255, dtype=np.uint8)
+				else:
+					grayLevel = int((c[0] + c[1] + c[2] + 0.5)/3)
+					d = np.abs(v - grayLevel).astype(np.uint8)
+				better = (d < dist) if k else np.ones(256, dtype=bool)
+				dist[better] = d[better]
+				index[better] = k
+			self.lut1 = (dist, index)
+		return self.lut1
+
+	def _colorTable(self):
+		"""Make the tables for color images, distance and index for each (quantized) RGB value.
+		The table index is (r << 2*bits) + (g << bits) + b for quantized r, g, and b."""
+		if self.lut3 is None:
+			n = 2**self.bits
+			q = 256 // n
+			v = np.arange(n, dtype=np.int16)*q + (q//2)   # value used for each quantized level
+			dist = np.full((n,n,n), 255, dtype=np.uint8)
+			index = np.zeros((n,n,n), dtype=np.uint8)
+			for (k, c) in enumerate(self.colors):
+				if (c is None):
+					continue   # distance 255, never better than the initial (or an earlier) color
+				(dR, dG, dB) = (np.abs(v - c[i]).astype(np.uint8) for i in range(3))
+				d = np.maximum(np.maximum(dR[:,None,None], dG[None,:,None]), dB[None,None,:])
+				better = (d < dist)
+				if (k == 0):
+					better[...] = True
+				dist[better] = d[better]
+				index[better] = k
+			self.lut3 = (dist.reshape(-1), index.reshape(-1))
+		return self.lut3
+
+	def _rgbIndex(self, A):
+		"""Returns the table index for each pixel of uint8 BGR(A) image A."""
+		s = 8 - self.bits
+		b = A[:,:,0] >> s
+		g = A[:,:,1] >> s
+		r = A[:,:,2] >> s
+		return (r.astype(np.int32) << (2*self.bits)) | (g.astype(np.int32) << self.bits) | b
+
+	def _singleColor(self, A):
+		"""Distance for a color image to one color, by one small table for each channel."""
+		c = self.colors[0]
+		v = np.arange(256, dtype=np.int16)
+		(tR, tG, tB) = (np.abs(v - c[i]).astype(np.uint8) for i in range(3))
+		return np.maximum(np.maximum(tB[A[:,:,0]], tG[A[:,:,1]]), tR[A[:,:,2]])
+
+	def nearest(self, A):
+		"""Returns (D, I), the distance to the closest color and its index for each pixel in A.
+		A is uint8, 2D gray scale image, or 3D BGR or BGRA image (alpha is not used)."""
+		if (A.dtype != np.uint8):
+			A = np.clip(A, 0, 255).astype(np.uint8)
+		if (len(self.colors) == 0):
+			return (np.full(A.shape[:2], 255, dtype=np.uint8), np.zeros(A.shape[:2], dtype=np.uint8))
+		if (A.ndim == 2) or (A.shape[2] < 3):
+			(dist, index) = self._grayTable()
+			G = A if (A.ndim == 2) else A[:,:,0]
+			return (dist[G], index[G])
+		if (len(self.colors) == 1) and (self.colors[0] is not None) and (self.bits == 8):
+			return (self._singleColor(A), np.zeros(A.shape[:2], dtype=np.uint8))
+		(dist, index) = self._colorTable()
+		T = self._rgbIndex(A)
+		return (dist[T], index[T])
+
+	def distance(self, A):
+		"""Returns D, the distance to the closest color for each pixel in A, see nearest()."""
+		return self.nearest(A)[0]
+	#end class ColorLUT
+
+if __name__ == '__main__':
+	import time
+	rng = np.random.default_rng(0)
+	A = rng.integers(0, 256, size=(960,1280,3), dtype=np.uint8)   # BGR
+	colors = [(200,30,40), None, (20,180,60), (250,250,20)]
+	t0 = time.perf_counter()
+	lut = ColorLUT(colors)
+	(D, I) = lut.nearest(A)
+	t1 = time.perf_counter()
+	(D2, I2) = lut.nearest(A)
+	t2 = time.perf_counter()
+	# the loop over colors with float images as in appImageViewer3.py (before October 2026)
+	F = A.astype(np.float32)[:,:,[2,1,0]]
+	DD = 255*np.ones((A.shape[0], A.shape[1], len(colors)), dtype=np.uint8)
+	for (k, c) in enumerate(colors):
+		if c is not None:
+			DD[:,:,k] = np.max(np.abs(F - np.array(c, dtype=np.float32)), axis=2).astype(np.uint8)
+	t3 = time.perf_counter()
+	print( f"ColorLUT: first {1000*(t1-t0):.1f} ms (make table), then {1000*(t2-t1):.1f} ms, " +
+	       f"float loop {1000*(t3-t2):.1f} ms" )
+	print( f"  same distance: {np.array_equal(D, DD.min(axis=2))}, " +
+	       f"same index: {np.array_equal(I, DD.argmin(axis=2))}" )
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ../ELE610/py3/clsFrameStore.py
+#
+#  The class FrameStore, a simple file format for raw frames (numpy arrays of
+#  equal shape), written and read through memory-mapped files. There is no
+#  encoding, a frame is just copied into the file, so frames can be stored at
+#  the camera frame rate and analyzed later, ex. the rotating disk sequences.
+#
+#  File layout (little endian):
+#    header, 128 bytes:  magic 'ELEFRAME', version, height, width, channels,
+#                        dtype, capacity, count, frameBytes, indexOffset, dataOffset
+#    index, capacity x 16 bytes:  (sequence int64, timestamp float64) for each frame
+#    data, from dataOffset (4096 aligned), capacity x frameBytes, frames one after another
+#  The file is made (preallocated) for 'capacity' frames when it is created,
+#  and 'count' in the header is the number of frames written. The data part is
+#  read as one numpy memmap of shape (capacity, height, width[, channels]).
+#
+# October 2026
+
+# Example on how to use file:
+#   (py38) C:\..\py3> python clsFrameStore.py   # test and timing compared to PNG files
+# Example on how to use file in appImageViewer4V.py:
+#   from clsFrameStore import FrameStore
+#   store = FrameStore.create('disk.frames', A.shape, capacity=500)
+#   store.append(A, timestamp=t)        # for each frame
+#   store.close()
+#   store = FrameStore.open('disk.frames')
+#   A = store[10]                       # view of frame 10, timestamp in store.timestamps()[10]
+
+import os
+from threading import Lock
+import numpy as np
+
+_magic = b'ELEFRAME'
+_version = 1
+_headerDtype = np.dtype([('magic', 'S8'), ('version', '<u4'), ('height', '<u4'), ('width', '<u4'),
+                         ('channels', '<u4'), ('dtype', 'S8'), ('capacity', '<u8'), ('count', '<u8'),
+                         ('frameBytes', '<u8'), ('indexOffset', '<u8'), ('dataOffset', '<u8')])
+_headerSize = 128
+_indexDtype = np.dtype([('sequence', '<i8'), ('timestamp', '<f8')])
+
+class FrameStore:
+	""" Raw frames of equal shape in one memory-mapped file, with an index for random access.
+	example of use:
+		store = FrameStore.create(fileName, shape=(960,1280,3), capacity=1000)
+		i = store.append(A, timestamp=t, sequence=n)   # returns frame number, or -1 if full
+		store.write(i, A, timestamp=t)                 # write frame i (ex. from several threads)
+		store.close()
+		store = FrameStore.open(fileName)              # read only, mode='r+' to change it
+		len(store), store[i], store.frames(), store.timestamps(), store.sequences()
+	"""
+	def __init__(self, fileName, mode='r'):
+		"""Open an existing file, use FrameStore.create() to make a new file."""
+		self.fileName = fileName
+		self.mode = mode
+		self.header = np.memmap(fileName, dtype=_headerDtype, mode=mode, offset=0, shape=(1,))
+		h = self.header[0]
+		if (h['magic'] != _magic) or (h['version'] != _version):
+			raise IOError(f"FrameStore: {fileName} is not a frame store file (version {_version})")
+		self.dtype = np.dtype(h['dtype'].decode())
+		self.capacity = int(h['capacity'])
+		c = int(h['channels'])
+		self.shape = (int(h['height']), int(h['width'])) + ((c,) if (c > 1) else ())
+		self.index = np.memmap(fileName, dtype=_indexDtype, mode=mode,
+		                       offset=int(h['indexOffset']), shape=(self.capacity,))
+		self.data = np.memmap(fileName, dtype=self.dtype, mode=mode,
+		                      offset=int(h['dataOffset']), shape=(self.capacity,) + self.shape)
+		self.count = int(h['count'])
+		self.lock = Lock()   # for count, write() of different frames may be done in several threads
+		return
+
+	@classmethod
+	def create(cls, fileName, shape, capacity, dtype=np.uint8):
+		"""Make (preallocate) a new file for 'capacity' frames of 'shape', an existing file is overwritten."""
+		dtype = np.dtype(dtype)
+		shape = tuple(int(s) for s in shape)
+		if (len(shape) not in (2, 3)) or (capacity < 1):
+			raise ValueError(f"FrameStore: shape should be (h,w) or (h,w,c), and capacity >= 1, not {shape} and {capacity}")
+		frameBytes = int(np.prod(shape))*dtype.itemsize
+		indexOffset = _headerSize
+		dataOffset = indexOffset + capacity*_indexDtype.itemsize
+		dataOffset = ((dataOffset + 4095)//4096)*4096
+		with open(fileName, 'wb') as f:
+			f.truncate(dataOffset + capacity*frameBytes)   # sparse file on most file systems
+		header = np.memmap(fileName, dtype=_headerDtype, mode='r+', offset=0, shape=(1,))
+		header[0] = (_magic, _version, shape[0], shape[1], (shape[2] if (len(shape) == 3) else 1),
+		             dtype.str.encode(), capacity, 0, frameBytes, indexOffset, dataOffset)
+		header.flush()
+		del header
+		store = cls(fileName, mode='r+')
+		store.index['sequence'] = -1   # not written
+		return store
+
+	@classmethod
+	def open(cls, fileName, mode='r'):
+		return cls(fileName, mode)
+
+	def __len__(self):
+		return self.count
+
+	def __getitem__(self, i):
+		"""Returns frame i (or a slice of frames) as a view of the file, nothing is read before it is used."""
+		return self.data[:self.count][i]
+
+	def frames(self):
+		"""Returns the frames written as one memmap array, shape (count, height, width[, channels])."""
+		return self.data[:self.count]
+
+	def timestamps(self):
+		return np.array(self.index['timestamp'][:self.count])
+
+	def sequences(self):
+		return np.array(self.index['sequence'][:self.count])
+
+	def write(self, i, A, timestamp=0.0, sequence=None):
+		"""Write frame i, count is increased to i+1 if needed."""
+		if not (0 <= i < self.capacity):
+			raise IndexError(f"FrameStore: frame {i} is outside capacity {self.capacity}")
+		self.data[i] = A   # shape must be as the store, a copy into the mapped file
+		self.index[i] = (i if (sequence is None) else sequence, timestamp)
+		with self.lock:
+			if i >= self.count:
+				self.count = i + 1
+				self.header['count'] = self.count
+		return i
+
+	def append(self, A, timestamp=0.0, sequence=None):
+		"""Write A as the next frame, returns its number, or -1 if the store is full."""
+		if self.count >= self.capacity:
+			return -1
+		return self.write(self.count, A, timestamp, sequence)
+
+	def flush(self):
+		if self.mode != 'r':
+			self.data.flush()
+			self.index.flush()
+			self.header.flush()
+		return
+
+	def close(self):
+		"""Flush and close the file, the unused (preallocated) part is cut off."""
+		if self.data is None:
+			return
+		self.flush()
+		capacity = max(self.count, 1)
+		size = int(self.header[0]['dataOffset']) + capacity*int(self.header[0]['frameBytes'])
+		if self.mode != 'r':
+			self.header['capacity'] = capacity   # index part keeps its size, dataOffset is unchanged
+			self.header.flush()
+		self.header = self.index = self.data = None   # memmaps are closed when deleted
+		if self.mode != 'r':
+			with open(self.fileName, 'r+b') as f:
+				f.truncate(size)
+		return
+
+	def info(self):
+		return ( f"FrameStore {os.path.basename(self.fileName)}: {self.count} of {self.capacity} frames, " +
+		         f"shape {self.shape} of {self.dtype.name}" )
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, _type, value, traceback):
+		self.close()
+	#end class FrameStore
+
+if __name__ == '__main__':
+	import time
+	import tempfile
+	import cv2
+	(n, shape) = (100, (960, 1280, 3))
+	rng = np.random.default_rng(0)
+	A = np.zeros(shape, dtype=np.uint8)
+	A[:, :, 2] = rng.integers(0, 256, size=shape[1], dtype=np.uint8)   # some structure, not only noise
+	folder = tempfile.mkdtemp()
+	fn = os.path.join(folder, 'test.frames')
+	t0 = time.perf_counter()
+	with FrameStore.create(fn, shape, capacity=2*n) as store:
+		for i in range(n):
+			A[i % shape[0], :, 1] = 255
+			store.append(A, timestamp=time.perf_counter())
+	t1 = time.perf_counter()
+	for i in range(n):
+		cv2.imwrite(os.path.join(folder, f"frame_{i:04d}.png"), A)
+	t2 = time.perf_counter()
+	store = FrameStore.open(fn)
+	B = store[n//2]
+	ok = (B[n//2, 0, 1] == 255) and (B[n//2 + 1, 0, 1] == 0)
+	print( f"{store.info()}, file size {os.path.getsize(fn)/2**20:.1f} MB, frame {n//2} ok: {ok}" )
+	print( f"  write {n} frames: FrameStore {1000*(t1-t0)/n:.2f} ms/frame, PNG {1000*(t2-t1)/n:.2f} ms/frame" )
+	T = store.timestamps()
+	print( f"  timestamps from {T[0]:.3f} to {T[-1]:.3f}, mean interval {1000*np.mean(np.diff(T)):.2f} ms" )
+	store.close()
+	for f in os.listdir(folder):
+		os.remove(os.path.join(folder, f))
+	os.rmdir(folder)
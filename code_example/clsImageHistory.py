@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ../ELE610/py3/clsImageHistory.py
+#
+#  The class ImageHistory, undo and redo of images stored as numpy arrays
+#
+#  The images are not copied when stored, instead the stored array is made read
+#  only, and the viewer must copy it (copy on write, see writeableImage() in
+#  myImageTools.py) before changing it. Thus consecutive entries that are the
+#  same image share memory. The memory used is bounded by 'maxBytes', when it
+#  is exceeded the oldest images are compressed (zlib), and if that is not
+#  enough the oldest images are removed from the history.
+#
+# October 2026
+
+# Example on how to use file:
+#   (py38) C:\..\py3> python clsImageHistory.py   # test
+# Example on how to use file in appImageViewer1.py:
+#   from clsImageHistory import ImageHistory
+#   self.history = ImageHistory(maxBytes=256*2**20)
+#   self.history.push(self.npImage)            # before an edit operation
+#   B = self.history.undo(self.npImage)        # returns previous image (or None)
+
+import zlib
+import numpy as np
+
+class _HistoryEntry:
+	"""One image in the history, either as a (read only) numpy array
+	or as zlib compressed bytes."""
+	def __init__(self, A):
+		self.A = A
+		self.data = None   # compressed bytes when A is None
+		self.shape = A.shape
+		self.dtype = A.dtype
+		return
+
+	def compress(self):
+		"""Compress the image, level 1 is fast and good for images with flat areas."""
+		if (self.A is not None):
+			self.data = zlib.compress(np.ascontiguousarray(self.A).tobytes(), 1)
+			self.A = None
+		return
+
+	def image(self):
+		"""Returns the image as a read only numpy array."""
+		if (self.A is not None):
+			return self.A
+		A = np.frombuffer(zlib.decompress(self.data), dtype=self.dtype).reshape(self.shape)
+		return A   # read only since buffer is bytes
+	#end class _HistoryEntry
+
+def _memoryOwner(A):
+	"""Returns the object that owns the memory of array A."""
+	while isinstance(A, np.ndarray) and (A.base is not None):
+		A = A.base
+	return A
+
+class ImageHistory:
+	""" Undo and redo list for images stored as numpy arrays,
+	with memory use bounded by 'maxBytes' and number of images bounded by 'maxImages'.
+	example of use:
+		h = ImageHistory(maxBytes=256*2**20, maxImages=50, compress=True)
+		h.push(self.npImage)                # store image before it is changed
+		self.npImage = ...                  # the edit operation
+		if h.canUndo():
+			self.npImage = h.undo(self.npImage)   # the current image goes to redo list
+		if h.canRedo():
+			self.npImage = h.redo(self.npImage)
+	Note that push() makes the stored array read only, the array is not copied.
+	"""
+	def __init__(self, maxBytes=256*2**20, maxImages=50, compress=True):
+		self.maxBytes = maxBytes     # memory budget in bytes
+		self.maxImages = maxImages   # for undo and redo lists together
+		self.compress = compress     # compress old images before they are removed
+		self.undoList = []           # of _HistoryEntry, oldest first
+		self.redoList = []           # of _HistoryEntry, the next to redo is last
+		return
+
+	def _entry(self, A):
+		"""Make an entry of image A, which is made read only, i.e. shared and not copied."""
+		A.flags.writeable = False   # the owner of A must copy before writing (copy on write)
+		return _HistoryEntry(A)
+
+	def push(self, A):
+		"""Store image A (numpy array) as the previous image, the redo list is cleared.
+		Returns True if the image was stored.
+		"""
+		if (not isinstance(A, np.ndarray)) or (A.size == 0):
+			return False
+		#
+		self.redoList = []
+		if self.undoList and (self.undoList[-1].A is A):   # the same image, store only once
+			return True
+		self.undoList.append(self._entry(A))
+		self.fitBudget()
+		return True
+
+	def undo(self, current):
+		"""Returns the previous image, and store image 'current' in the redo list.
+		Returns None if there is nothing to undo.
+		"""
+		if not self.undoList:
+			return None
+		if isinstance(current, np.ndarray) and (current.size > 0):
+			self.redoList.append(self._entry(current))
+		return self.undoList.pop().image()
+
+	def redo(self, current):
+		"""Returns the image that was undone, and store image 'current' in the undo list.
+		Returns None if there is nothing to redo.
+		"""
+		if not self.redoList:
+			return None
+		if isinstance(current, np.ndarray) and (current.size > 0):
+			self.undoList.append(self._entry(current))
+		return self.redoList.pop().image()
+
+	def canUndo(self):
+		return (len(self.undoList) > 0)
+
+	def canRedo(self):
+		return (len(self.redoList) > 0)
+
+	def clear(self):
+		self.undoList = []
+		self.redoList = []
+		return
+
+	def nbytes(self):
+		"""Returns number of bytes used by the stored images,
+		shared memory (same owner) is only counted once."""
+		owners = {}
+		n = 0
+		for e in (self.undoList + self.redoList):
+			if (e.A is not None):
+				owners[id(_memoryOwner(e.A))] = e.A.nbytes
+			else:
+				n += len(e.data)
+		return n + sum(owners.values())
+
+	def fitBudget(self):
+		"""Compress and remove the oldest images until the history is within budget."""
+		while (len(self.undoList) + len(self.redoList)) > self.maxImages:
+			if self.undoList:
+				self.undoList.pop(0)
+			else:
+				self.redoList.pop(0)
+		#
+		while self.undoList and (self.nbytes() > self.maxBytes):
+			# the oldest uncompressed undo images are compressed first
+			e = None
+			if self.compress:
+				e = next((e for e in self.undoList if (e.A is not None)), None)
+			if (e is not None):
+				e.compress()
+			else:
+				self.undoList.pop(0)
+		#
+		return
+
+	def info(self):
+		"""Returns a short text with the state of the history."""
+		nc = sum(1 for e in (self.undoList + self.redoList) if (e.A is None))
+		return ( f"{len(self.undoList)} undo and {len(self.redoList)} redo images ({nc} compressed), " +
+		         f"{self.nbytes()/2**20:.1f} of {self.maxBytes/2**20:.1f} MB used" )
+	#end class ImageHistory
+
+if __name__ == '__main__':
+	h = ImageHistory(maxBytes=3*960*1280, maxImages=10)
+	A = np.zeros((960,1280), dtype=np.uint8)
+	for i in range(6):
+		h.push(A)
+		if (i%2):
+			A = A + 1   # a new image, else the same image is pushed again (and stored once)
+		print( f"push {i}: {h.info()}" )
+	B = h.undo(A)
+	print( f"undo:   {h.info()}, B[0,0] = {B[0,0]}" )
+	B = h.redo(B)
+	print( f"redo:   {h.info()}, B[0,0] = {B[0,0]}" )
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ../ELE610/py3/clsImageInfo.py
+#
+#  The class ImageInfo, information on an image (numpy array) that is computed
+#  when it is first asked for, and then kept until a new image is set.
+#
+#  The viewers need to know if the image is gray or color after (nearly) every
+#  edit operation, QImage.allGray() scans the full image each time it is called.
+#  Here the information is found once for each new image, and for 2D arrays the
+#  image is known to be gray without looking at the pixels at all. A color image
+#  is usually found to be color from a sparse sample of its pixels.
+#
+# October 2026
+
+# Example on how to use file:
+#   (py38) C:\..\py3> python clsImageInfo.py   # test
+# Example on how to use file in appImageViewer1.py:
+#   from clsImageInfo import ImageInfo
+#   self.imageInfo = ImageInfo()
+#   self.imageInfo.setImage(A, key=self.image.cacheKey())
+#   self.isAllGray = self.imageInfo.isGray()
+
+import numpy as np
+
+class ImageInfo:
+	""" Cached information on an image given as a numpy array, 2D (gray) or 3D (color).
+	example of use:
+		info = ImageInfo(A)
+		info.isGray()       # True if all pixels have equal first three channels
+		info.channels()     # 1, 3 or 4
+		info.minMax()       # (min, max) arrays with one value for each channel
+		info.histogram()    # array with one row of 256 bins for each channel
+		info.info()         # short text
+	The values are computed when first asked for, 'key' may be used by the owner
+	to know when the image has changed, ex. QImage.cacheKey().
+	"""
+	def __init__(self, A=None, key=None):
+		self.setImage(A, key)
+		return
+
+	def setImage(self, A, key=None, isGray=None):
+		"""Set a new image A, numpy array, and forget all information on the previous image.
+		'isGray' may be given if it is known, ex. True after a conversion to gray."""
+		if not isinstance(A, np.ndarray):
+			A = np.array([], dtype=np.uint8)
+		self.A = A
+		self.key = key
+		self._isGray = isGray
+		self._minMax = None
+		self._hist = None
+		return
+
+	def isCurrent(self, key):
+		"""True if the information is for the image with 'key'."""
+		return (self.key is not None) and (self.key == key)
+
+	def channels(self):
+		if (self.A.ndim == 3):
+			return self.A.shape[2]
+		return 1 if (self.A.size > 0) else 0
+
+	def isGray(self):
+		"""True if image is 2D, or the first three channels of each pixel are equal."""
+		if (self._isGray is None):
+			A = self.A
+			if (A.size == 0):
+				self._isGray = False
+			elif (A.ndim == 2) or (A.shape[2] < 3):
+				self._isGray = True
+			else:
+				S = A[::17, ::17]   # sample first, most color images are found here
+				self._isGray = (np.array_equal(S[:,:,0], S[:,:,1]) and np.array_equal(S[:,:,0], S[:,:,2]) and
+								np.array_equal(A[:,:,0], A[:,:,1]) and np.array_equal(A[:,:,0], A[:,:,2]))
+			#
+		return self._isGray
+
+	def minMax(self):
+		"""Returns (m, M), arrays with minimum and maximum value for each channel."""
+		if (self._minMax is None) and (self.A.size > 0):
+			B = self.A.reshape(-1, self.channels())
+			self._minMax = (B.min(axis=0), B.max(axis=0))
+		return self._minMax
+
+	def histogram(self):
+		"""Returns array (channels, 256) with number of pixels for each value, for uint8 images,
+		for other types the 256 bins are equal parts of the range from minimum to maximum value."""
+		if (self._hist is None) and (self.A.size > 0):
+			B = self.A.reshape(-1, self.channels())
+			if (self.A.dtype == np.uint8):
+				self._hist = np.array([np.bincount(B[:,c], minlength=256) for c in range(B.shape[1])])
+			else:
+				self._hist = np.array([np.histogram(B[:,c], bins=256)[0] for c in range(B.shape[1])])
+		return self._hist
+
+	def info(self):
+		"""Returns a short text with the information, min and max are computed if needed."""
+		if (self.A.size == 0):
+			return "empty image"
+		(m, M) = self.minMax()
+		txt = "gray" if self.isGray() else "color"
+		return ( f"{txt}, {self.channels()} channel(s) of {self.A.dtype.name}, " +
+		         f"min {m.tolist()}, max {M.tolist()}" )
+	#end class ImageInfo
+
+if __name__ == '__main__':
+	A = np.zeros((960,1280,4), dtype=np.uint8)
+	A[:,:,:3] = (np.arange(1280) % 256)[None,:,None].astype(np.uint8)   # gray 3D image
+	info = ImageInfo(A)
+	print( f"gray 3D:  {info.info()}" )
+	A[500,600,1] = 7   # one pixel that is not gray, found by the full test
+	info.setImage(A)
+	print( f"color 3D: {info.info()}" )
+	info.setImage(A[:,:,0])
+	print( f"gray 2D:  {info.info()}, histogram {info.histogram().shape}" )
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ../ELE610/py3/clsPreviewWorker.py
+#
+#  The class PreviewWorker, run the [Try it] computations of the dialogs in
+#  a worker thread so the GUI does not freeze while OpenCV is working.
+#
+#  Only the newest job is kept (latest wins), a job that is waiting when a new
+#  job is submitted is dropped, and a result from a job that has become stale
+#  while it was computed is not posted. The result is posted to the GUI thread
+#  by a Qt signal, as FrameThread and PyuEyeQtView in pyueye_example_*.py do.
+#
+# October 2026
+
+# Example on how to use file in appImageViewer1.py:
+#   from clsPreviewWorker import PreviewWorker
+#   self.preview = PreviewWorker()
+#   self.preview.resultReady.connect(self.showPreview)    # showPreview(jobNo, result)
+#   self.preview.submit(edgeImage, self.npImage, valK, valS)   # in tryEdges(..)
+#   self.preview.cancel()                                  # when dialog is closed
+
+from threading import Thread, Condition
+from PyQt5.QtCore import QObject, pyqtSignal
+
+class PreviewWorker(QObject):
+	""" A worker thread that runs one function at the time, the newest submitted.
+	example of use:
+		self.preview = PreviewWorker()
+		self.preview.resultReady.connect(self.showPreview)
+		jobNo = self.preview.submit(fun, A, arg1, arg2)   # result = fun(A, arg1, arg2)
+	The slot, here showPreview(jobNo, result), is called in the GUI thread and
+	should check self.preview.isCurrent(jobNo) since cancel() may have been
+	called after the result was posted, but before it was received.
+	Note that 'fun' should not change its arguments, nor any object attributes.
+	"""
+	resultReady = pyqtSignal(int, object)   # job number and result of fun(*args)
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self.cond = Condition()
+		self.job = None      # the waiting job, (jobNo, fun, args), only one is kept
+		self.jobNo = 0       # number of newest job, also increased by cancel()
+		self.busy = False    # True while a job is computed
+		self.running = True
+		self.thread = Thread(target=self.run, daemon=True)
+		self.thread.start()
+		return
+
+	def submit(self, fun, *args):
+		"""Submit a new job, any waiting job is dropped. Returns the job number."""
+		with self.cond:
+			self.jobNo += 1
+			self.job = (self.jobNo, fun, args)
+			self.cond.notify()
+			return self.jobNo
+
+	def cancel(self):
+		"""Drop the waiting job and make the job being computed stale."""
+		with self.cond:
+			self.jobNo += 1
+			self.job = None
+		return
+
+	def isCurrent(self, jobNo):
+		"""True if job 'jobNo' is the newest job, i.e. not stale."""
+		return (jobNo == self.jobNo)
+
+	def isBusy(self):
+		return (self.busy or (self.job is not None))
+
+	def run(self):
+		"""The loop in the worker thread."""
+		while True:
+			with self.cond:
+				while self.running and (self.job is None):
+					self.cond.wait()
+				if not self.running:
+					break
+				(jobNo, fun, args) = self.job
+				self.job = None
+				self.busy = True
+			#
+			try:
+				result = fun(*args)
+			except Exception as e:
+				print( f"PreviewWorker: job {jobNo} failed, {e}" )
+				result = None
+			#
+			self.busy = False
+			if self.isCurrent(jobNo) and (result is not None):
+				self.resultReady.emit(jobNo, result)
+		#end while
+		return
+
+	def stop(self):
+		"""Stop the worker thread, a job being computed is finished first."""
+		with self.cond:
+			self.running = False
+			self.job = None
+			self.cond.notify()
+		self.thread.join(timeout=2.0)
+		return
+	#end class PreviewWorker
@@ -18,7 +18,7 @@ try:
     from PyQt5.QtCore import Qt, QPoint, QRect, QSize, QT_VERSION_STR, pyqtSignal  
     from PyQt5.QtGui import QImage, QPixmap, QTransform
     from PyQt5.QtWidgets import (QApplication, QMainWindow, QAction, QFileDialog, QLabel, 
-                QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QRubberBand)
+                QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QRubberBand, QInputDialog)
 except ImportError:
     raise ImportError( f"{_appFileName}: Requires PyQt5." )
 #end try, import PyQt5 classes 
@@ -26,10 +26,11 @@ except ImportError:
 # some simple classes that define simple dialog windows
 from utils.clsThresholdDialog import ThresholdDialog
 from utils.clsResizeDialog import ResizeDialog
+from utils.clsDenoiser import Denoiser
 
 #
 # some simple methods for image processing
-from utils.myImageTools import smoothFilter, qimage2np, np2qimage
+from utils.myImageTools import smoothFilter, qimage2np, np2qimage, writeableImage, blackFrame
 
 
 myPath = "C:\Raph Stockage\Courses\Applied Robot Technology\Assignment\Images"		# path where the images are stored
@@ -164,6 +165,8 @@ class MainWindow(QMainWindow):
         self.isAllGray = False       # true when self.image.allGray(), function is slow for images without color table
         self.npImage = np.array([])  # size == 0 
         self.cropActive = False
+        self.blackTolerance = 0      # for cutBlackFrame()
+        self.denoiser = Denoiser('bilateral')   # for reduceNoise(), see 'Noise reduction method'
         #
         self.scene = QGraphicsScene()
         self.curItem = None          # (a pointer to) pixmap on scene
@@ -228,6 +231,9 @@ class MainWindow(QMainWindow):
         a.triggered.connect(self.cropStart)
         a.setToolTip('Crop the current pixmap, start by indicating rectangle to keep.')
         a.setShortcut('Ctrl+Y')  # as in IrfanView
+        a = self.qaCutFrame = QAction('Cut black frame', self)
+        a.triggered.connect(self.cutFrameDlg)
+        a.setToolTip('Cut out any frame of black (dark) rows and columns.')
         a = self.qaResize = QAction('Resize image', self)
         a.triggered.connect(self.resizeImage)
         a.setToolTip('Resize the current npImage (and pixmap)')
@@ -254,6 +260,10 @@ class MainWindow(QMainWindow):
         a.setToolTip('Reduce noise in the image')
         a.setShortcut('Ctrl+N')
         
+        a = self.qaNoiseMethod = QAction('Noise reduction method', self)
+        a.triggered.connect(self.selectDenoiser)
+        a.setToolTip('Select the method used by Reduce noise (bilateral, bilateral_small, guided, median, none)')
+        
         a = self.qaToQRcode = QAction('Detect QR code', self)
         a.triggered.connect(self.detectQRCodeCenter)
         a.setToolTip('Detect QR code(s) in the image')
@@ -281,6 +291,7 @@ class MainWindow(QMainWindow):
         #
         editMenu = self.mainMenu.addMenu('&Edit')
         editMenu.addAction(self.qaCrop)
+        editMenu.addAction(self.qaCutFrame)
         editMenu.addAction(self.qaResize)
         editMenu.addAction(self.qaUndoLast)
         editMenu.addAction(self.qaFlipImage)
@@ -292,6 +303,7 @@ class MainWindow(QMainWindow):
         functionMenu.addAction(self.qaToBinary)
         functionMenu.addAction(self.qaToContrast)
         functionMenu.addAction(self.qaToNoise)
+        functionMenu.addAction(self.qaNoiseMethod)
         functionMenu.addAction(self.qaToQRcode)
         functionMenu.setToolTipsVisible(True)
 
@@ -310,6 +322,7 @@ class MainWindow(QMainWindow):
         self.qaFlipImage.setEnabled(pixmapOK)
         #
         self.qaCrop.setEnabled(pixmapOK and (not self.cropActive))
+        self.qaCutFrame.setEnabled(pixmapOK and (not self.cropActive))
         self.qaResize.setEnabled(pixmapOK and (not self.cropActive))
         self.qaUndoLast.setEnabled(not self.prevPixmap.isNull())
         #
@@ -340,7 +353,10 @@ class MainWindow(QMainWindow):
         return
         
     def pixmap2image2np(self):
-        """Display 'self.pixmap' on scene and copy it to 'self.image' and to 'self.npImage'."""
+        """Display 'self.pixmap' on scene and copy it to 'self.image' and to 'self.npImage'.
+        Note that 'self.npImage' is a read only view of 'self.image', see qimage2np(),
+        use writeableImage() to get an image to draw into.
+        """
         if self.curItem: 
             self.scene.removeItem(self.curItem)
         self.curItem = QGraphicsPixmapItem(self.pixmap)
@@ -623,8 +639,7 @@ class MainWindow(QMainWindow):
         
         A (hidden) functionality is included. If the rectangle is small, a special 
         function is performed on image: A black frame, if it is present, is cut out.
-        It would be more user friendly (intuitive) if this functionality was behind
-        a new action in the menu system. 
+        This is also the action 'Cut black frame' in the Edit menu, see cutBlackFrame().
         To crop a (very) small rectangle should do nothing.
         """
         if not self.cropActive: 
@@ -642,80 +657,51 @@ class MainWindow(QMainWindow):
             self.pixmap2image2np()
             self.setWindowTitle( f"{self.appFileName} : cropped image" )
         else: 
-            A = self.npImage   # just use a short name for image in this part of program
             print( "cropImage(): Rubber band rectangle is small  --> Special case")
-            print( "  Cut out any frame of black rows and columns.")
-            print( f"  A = npImage is an array of {A.dtype.name}, shape {str(A.shape)}." )
-            # find what to crop,  
-            (left,right,top,bottom) = (0,0,0,0)
-            if (len(A.shape) == 3) and (A.shape[2] >= 3):  # color img
-                print("  This is a color image")
-                for column in range(0,A.shape[1]):
-                    if ((A[:,column,0].max() > 0) or 
-                        (A[:,column,1].max() > 0) or 
-                        (A[:,column,2].max() > 0)): break
-                    else: left += 1
-                for column in range(A.shape[1]-1,-1,-1):
-                    if ((A[:,column,0].max() > 0) or 
-                        (A[:,column,1].max() > 0) or 
-                        (A[:,column,2].max() > 0)): break
-                    else: right += 1
-                for row in range(0,A.shape[0]):
-                    if ((A[row,:,0].max() > 0) or 
-                        (A[row,:,1].max() > 0) or 
-                        (A[row,:,2].max() > 0)): break
-                    else: top += 1
-                for row in range(A.shape[0]-1,-1,-1):
-                    if ((A[row,:,0].max() > 0) or 
-                        (A[row,:,1].max() > 0) or 
-                        (A[row,:,2].max() > 0)): break
-                    else: bottom += 1
-                print( f"  end using   (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-            else:  # grayscale img
-                print( "  This is a gray scale image")
-                print( "  start using (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-                for column in range(0, A.shape[1]):
-                    if (A[:,column].max() > 0): break
-                    else: left += 1
-                for column in range(A.shape[1]-1,-1,-1):
-                    if (A[:,column].max() > 0): break
-                    else: right += 1
-                for row in range(0,A.shape[0]):
-                    if (A[row,:].max() > 0): break
-                    else: top += 1
-                for row in range(A.shape[0]-1,-1,-1):
-                    if (A[row,:].max() > 0): break
-                    else: bottom += 1
-                print( f"  end using   (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-            # 
-            w = A.shape[1] - left - right
-            h = A.shape[0] - top - bottom
-            if max((left,right,top,bottom)):
-                if (w <= 0) or (h <= 0):
-                    print( ("cropImage(): Don't crop since (left,right,top,bottom)" +
-                            f" = ({left},{right},{top},{bottom})") )
-                else:
-                    print( ("cropImage(): Crop outside of rectangle from (x,y)" +
-                            f"=({left},{top}) and (w,h)=({w},{h})") )
-                    self.prevPixmap = self.pixmap 
-                    if (len(A.shape) == 3) and (A.shape[2] >= 3):  # color img
-                        print("cropImage(): Crop color")
-                        B = A[top:top+w,left:left+w,:].copy() 
-                        self.np2image2pixmap(B, numpyAlso=True)
-                    else:
-                        print("cropImage(): Crop gray")
-                        B = A[top:top+w,left:left+w].copy()
-                        self.np2image2pixmap(B, numpyAlso=True)
-                    self.setWindowTitle( f"{self.appFileName} : Black frame cut from image" )
-                    self.setIsAllGray()
-            else:
-                print( "cropImage(): No black rows or black columns to crop." )
-            #
+            self.cutBlackFrame()
         # 
         self.setMenuItems()
         return
     #end function cropImage
     
+    def cutFrameDlg(self):
+        """Ask for the tolerance and cut out any frame of black rows and columns."""
+        (tol, ok) = QInputDialog.getInt(self, "Cut black frame", 
+                "Cut rows and columns with all values <= tolerance", 
+                value=self.blackTolerance, min=0, max=254)
+        if ok:
+            self.blackTolerance = tol
+            self.cutBlackFrame(tol)
+        return
+    
+    def cutBlackFrame(self, tol=None):
+        """Cut out any frame of black (or dark) rows and columns from the image.
+        A row or column is black when all values are <= tol, default 'self.blackTolerance',
+        see blackFrame() in myImageTools.py.
+        """
+        if (tol is None):
+            tol = self.blackTolerance
+        if (self.npImage.size == 0):
+            return
+        A = self.npImage   # just use a short name for image in this part of program
+        (h, w) = A.shape[:2]
+        (left,right,top,bottom) = blackFrame(A, tol)
+        print( f"cutBlackFrame(): {tol=}, (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
+        if (left+right >= w) or (top+bottom >= h):
+            print( "cutBlackFrame(): Don't crop since all of image is black." )
+        elif max((left,right,top,bottom)):
+            self.prevPixmap = self.pixmap
+            B = A[top:h-bottom, left:w-right]   # a view, np2qimage handles the strides
+            self.np2image2pixmap(B, numpyAlso=True)
+            self.status.setText( f"pixmap: (w,h) = ({B.shape[1]},{B.shape[0]})" )
+            self.setWindowTitle( f"{self.appFileName} : Black frame cut from image" )
+        else:
+            print( "cutBlackFrame(): No black rows or black columns to crop." )
+        #
+        self.setMenuItems()
+        return
+    #end function cutBlackFrame
+    
     def resizeImage(self):
         """Resize the current numpy color or gray scale image
         and copy (move) it back to current pixmap
@@ -833,10 +819,20 @@ class MainWindow(QMainWindow):
         return
     
     def reduceNoise(self):
-        """Reduce noise in the current image using bilateral filter."""
-        B = cv2.bilateralFilter(self.npImage, d=9, sigmaColor=75, sigmaSpace=75)
+        """Reduce noise in the current image, the method is given by self.denoiser."""
+        B = self.denoiser(self.npImage)
         self.np2image2pixmap(B, numpyAlso=True)
-        self.setWindowTitle(f"{self.appFileName} : noise reduced")
+        self.setWindowTitle(f"{self.appFileName} : noise reduced ({self.denoiser.method})")
+        return
+    
+    def selectDenoiser(self):
+        """Select the noise reduction method, see clsDenoiser.py (and its benchmark)."""
+        methods = list(Denoiser.METHODS)
+        (method, ok) = QInputDialog.getItem(self, "Reduce noise", "Method:", methods,
+                                            methods.index(self.denoiser.method), False)
+        if ok:
+            self.denoiser = Denoiser(method)
+            print(f"selectDenoiser: {self.denoiser.info()}")
         return
     
     def detectQRCodeCenter(self):
@@ -857,6 +853,7 @@ class MainWindow(QMainWindow):
                 print(f"detectQRCodeCenter: QR center at {center}")
                 # Optionally draw
                 pts = np.array([(p.x, p.y) for p in points], dtype=np.int32)
+                self.npImage = writeableImage(self.npImage)   # copy only if it is a view
                 cv2.polylines(self.npImage, [pts], isClosed=True, color=(0, 255, 0), thickness=2)
                 cv2.circle(self.npImage, center, radius=5, color=(255, 0, 255), thickness=-1)
                 self.np2image2pixmap(self.npImage, numpyAlso=False)
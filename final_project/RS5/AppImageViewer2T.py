@@ -5,29 +5,35 @@ _version = "2025.02.6"
 import sys
 import os.path
 import numpy as np
-import cv2
-import random
-import time
 
 try:
     from PyQt5.QtGui import QImage, QPixmap
-    from PyQt5.QtWidgets import (QApplication, QAction,QGraphicsPixmapItem, QDialog)
+    from PyQt5.QtWidgets import (QApplication, QAction,QGraphicsPixmapItem, QDialog, QInputDialog)
 except ImportError:
     raise ImportError( f"{_appFileName}: Requires PyQt5." )
 
-try:
-    from pyueye import ueye
-    from utils.pyueye_example_camera import Camera
-    from utils.pyueye_example_utils import ImageData, ImageBuffer
+if os.environ.get('UEYE_SIM'):   # a folder with images, or 'synthetic', see pyueye_example_simcamera.py
+    from utils.pyueye_example_simcamera import ueye, Camera, ImageData, ImageBuffer
     ueyeOK = True
-except ImportError:
-    ueye_error = f"{_appFileName}: Requires IDS pyueye example files (and IDS camera)." 
-    ueyeOK = False  
-
+else:
+    try:
+        from pyueye import ueye
+        from utils.pyueye_example_camera import Camera
+        from utils.pyueye_example_utils import ImageData, ImageBuffer
+        ueyeOK = True
+    except ImportError:
+        ueye_error = f"{_appFileName}: Requires IDS pyueye example files (and IDS camera)." 
+        ueyeOK = False  
+
+from utils.pyueye_example_utils import LatencyHistogram   # does not need pyueye
 from AppImageViewer1 import myPath, MainWindow as inheritedMainWindow 
 from utils.myImageTools import np2qimage
 from utils.camLuminosityDialog import LuminosityDialog
 from utils.camPropertiesDialog import CamPropertiesDialog
+from utils.clsRecorder import Recorder
+from utils.clsAutoFocus import AutoFocus
+from utils.clsCamSettings import CamSettings
+from utils.variables import CAM_PROFILES
 
 class MainWindow(inheritedMainWindow):  
     """MainWindow class for this image viewer is inherited from another image viewer."""
@@ -44,6 +50,10 @@ class MainWindow(inheritedMainWindow):
          
         self.cam = None
         self.camOn = False
+        self.settings = None   # CamSettings, made by cameraOn()
+        self.latency = LatencyHistogram()   # for the camera images, see getOneImage()
+        self.npImageTime = None   # time (s) when camera image was made, for self.timedImage
+        self.timedImage = None
         
         self.initMenu2()
         self.setMenuItems2()
@@ -51,6 +61,9 @@ class MainWindow(inheritedMainWindow):
         self.exposure_time = 1.5 #ms
         self.width_c = 1280
         self.height_c = 960
+        self.recordOutput = 'video and png'  # see record_video2()
+        self.focusROI = None                 # (x, y, w, h) for find_focus(), None is central half
+        self.focusMethod = 'laplacian'       # or 'tenengrad', see utils/clsAutoFocus.py
         
         
     
@@ -62,14 +75,21 @@ class MainWindow(inheritedMainWindow):
         a = self.qaGetOneImage = QAction('Get one image', self)
         a.setShortcut('Ctrl+N')
         a.triggered.connect(self.getOneImage)
+        a = self.qaContinuous = QAction('Continuous capture', self)
+        a.setCheckable(True)
+        a.toggled.connect(self.setContinuous)
         a  =self.qaFindFocus = QAction('Find Focus', self)
         a.triggered.connect(self.find_focus)
         a = self.qaChangeLum = QAction('Change luminosity', self)
         a.triggered.connect(self.change_lum)
         a = self.qaCamProperties = QAction('Properties', self)
         a.triggered.connect(self.properties_func)
+        a = self.qaCamProfile = QAction('Profile', self)
+        a.triggered.connect(self.select_profile)
         a = self.qaCameraOff = QAction('Camera off', self)
         a.triggered.connect(self.cameraOff)
+        a = self.qaLatency = QAction('Print latency histogram', self)
+        a.triggered.connect(self.printLatency)
         a = self.qaRecordVideo = QAction('Record video', self)
         a.triggered.connect(self.record_video2)
 
@@ -77,10 +97,13 @@ class MainWindow(inheritedMainWindow):
         camMenu.addAction(self.qaCameraOn)
         camMenu.addAction(self.qaCameraInfo)
         camMenu.addAction(self.qaGetOneImage)
+        camMenu.addAction(self.qaContinuous)
         camMenu.addAction(self.qaFindFocus)
         camMenu.addAction(self.qaChangeLum)
         camMenu.addAction(self.qaCamProperties)
+        camMenu.addAction(self.qaCamProfile)
         camMenu.addAction(self.qaRecordVideo)
+        camMenu.addAction(self.qaLatency)
         camMenu.addAction(self.qaCameraOff)
         return
 
@@ -92,9 +115,12 @@ class MainWindow(inheritedMainWindow):
         self.qaCameraOn.setEnabled(ueyeOK and (not self.camOn))
         self.qaCameraInfo.setEnabled(ueyeOK and self.camOn)
         self.qaGetOneImage.setEnabled(ueyeOK and self.camOn)
+        self.qaContinuous.setEnabled(ueyeOK and self.camOn)
+        self.qaContinuous.setChecked(ueyeOK and self.camOn and self.cam.continuous)
         self.qaCameraOff.setEnabled(ueyeOK and self.camOn)
         self.qaFindFocus.setEnabled(ueyeOK and self.camOn)
         self.qaCamProperties.setEnabled(ueyeOK and self.camOn)
+        self.qaCamProfile.setEnabled(ueyeOK and self.camOn)
         self.qaRecordVideo.setEnabled(ueyeOK and self.camOn)
         self.qaChangeLum.setEnabled(ueyeOK and self.camOn)
         return
@@ -102,7 +128,7 @@ class MainWindow(inheritedMainWindow):
     def copy_image(self, image_data):
         tempBilde = image_data.as_1d_image()
         if np.min(tempBilde) != np.max(tempBilde):
-            self.npImage = np.copy(tempBilde[:,:,[0,1,2]])
+            self.npImage = np.copy(tempBilde[:,:,:3])  # one copy, tempBilde may be a view of camera buffer
             print( ("copy_image(): 'self.npImage' is an ndarray" + 
                     f" of {self.npImage.dtype.name}, shape {str(self.npImage.shape)}.") )
         else: 
@@ -115,8 +141,10 @@ class MainWindow(inheritedMainWindow):
             self.cam = Camera()
             self.cam.init()
             self.cam.set_colormode(ueye.IS_CM_BGR8_PACKED)
-            self.cam.set_aoi(0, 0, 1280, 960)
+            self.cam.set_aoi(0, 0, self.width_c, self.height_c)   # full frame, see CamSettings.region()
             self.cam.alloc(3)
+            self.settings = CamSettings(self.cam, ueye, CAM_PROFILES, sensor=(self.width_c, self.height_c))
+            self.settings.read()
             self.camOn = True
             self.setMenuItems2()
             print( f"{self.appFileName}: cameraOn() Camera started ok" )
@@ -127,57 +155,70 @@ class MainWindow(inheritedMainWindow):
         if not self.camOn:
             print("Camera is not turned on.")
             return
-
+        self.settings.read()   # the camera may have been changed elsewhere, ex. IDS program
+        print(self.settings.info())
         d = ueye.double()
-        ui1 = ueye.uint()
-
-        retVal = ueye.is_SetFrameRate(self.cam.handle(), ueye.IS_GET_FRAMERATE, d)
-        if retVal == ueye.IS_SUCCESS:
-            print(f"  Current frame rate: {float(d):8.3f} fps")
-
-        retVal = ueye.is_Exposure(self.cam.handle(), ueye.IS_EXPOSURE_CMD_GET_EXPOSURE, d, 8)
-        if retVal == ueye.IS_SUCCESS:
-            print(f"  Current exposure time (before change): {float(d):8.3f} ms")
-
-        time.sleep(0.5)
-
-        retVal = ueye.is_Exposure(self.cam.handle(), ueye.IS_EXPOSURE_CMD_GET_EXPOSURE, d, 8)
-        if retVal == ueye.IS_SUCCESS:
-            print(f"  Current exposure time (after change): {float(d):8.3f} ms")
-
         retVal = ueye.is_Exposure(self.cam.handle(), ueye.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MIN, d, 8)
         if retVal == ueye.IS_SUCCESS:
             print(f"  Minimum exposure time: {float(d):8.3f} ms")
-
         retVal = ueye.is_Exposure(self.cam.handle(), ueye.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MAX, d, 8)
         if retVal == ueye.IS_SUCCESS:
             print(f"  Maximum exposure time: {float(d):8.3f} ms")
-
         return
-        
+    
     def find_focus(self):
-        if ueyeOK and self.camOn:
-            num_images = random.randint(15, 25)
-            print(f" Capturing {num_images} images to find focus.")
-   
-        for i in range(num_images):
-            print(f" Capturing image {i + 1} / {num_images}...")
-            self.getOneImage()
-   
-        print(f"{self.appFileName}: FindFocus() - Focus found.")
+        """Find the exposure time giving the sharpest image in the ROI, see utils/clsAutoFocus.py."""
+        if not (ueyeOK and self.camOn):
+            return
+        roiText = '' if (self.focusROI is None) else ','.join(str(v) for v in self.focusROI)
+        (text, ok) = QInputDialog.getText(self, "Find focus", 
+                                          "ROI as x,y,w,h (empty for central half of image):", text=roiText)
+        if not ok:
+            return
+        try:
+            roi = tuple(int(v) for v in text.split(',')) if text.strip() else None
+        except ValueError:
+            roi = None
+        self.focusROI = roi if ((roi is None) or (len(roi) == 4)) else None
+        af = AutoFocus(self.cam, ueye, roi=self.focusROI, method=self.focusMethod)
+        (exposure, metric) = af.run()
+        print(f"{self.appFileName}: find_focus() " + af.info())
+        if exposure is not None:
+            self.exposure_time = exposure
+            self.settings.state['exposure'] = exposure   # set by AutoFocus, keep the cache right
+        self.getOneImage()
+        return
+
+    def setContinuous(self, on):
+        """Start or stop continuous capture, i.e. live video into the ring of camera buffers."""
+        if ueyeOK and self.camOn and (on != self.cam.continuous):
+            if on:
+                self.cam.start_continuous()
+            else:
+                self.cam.stop_continuous()
+                print(f"{self.appFileName}: {self.cam.frame_count} frames fetched, {self.cam.dropped_count} dropped")
         return
-    
-    
 
     def getOneImage(self):
+        """Get one image from the camera, the newest frame when capture is continuous."""
         if ueyeOK and self.camOn:
             self.view.setMouseTracking(False)
             imBuf = ImageBuffer()
-            self.cam.freeze_video(True)
-            retVal = ueye.is_WaitForNextImage(self.cam.handle(), 1000, imBuf.mem_ptr, imBuf.mem_id)
+            if self.cam.continuous:
+                image_data = self.cam.latest_frame(1000)
+                retVal = ueye.IS_SUCCESS if (image_data is not None) else ueye.IS_TIMED_OUT
+                if image_data is not None:
+                    imBuf = image_data.img_buff
+            else:
+                self.cam.freeze_video(True)
+                retVal = ueye.is_WaitForNextImage(self.cam.handle(), 1000, imBuf.mem_ptr, imBuf.mem_id)
+                if retVal == ueye.IS_SUCCESS:
+                    image_data = ImageData(self.cam.handle(), imBuf, copy=False)
             if retVal == ueye.IS_SUCCESS:
-                self.copy_image( ImageData(self.cam.handle(), imBuf) )
+                self.copy_image(image_data)
+                image_data.mark('processed')
                 if (self.npImage.size > 0): # ok 
+                    self.setImageTime(image_data)
                     self.image = np2qimage(self.npImage)
                     if (not self.image.isNull()):
                         self.pixmap = QPixmap.fromImage(self.image)
@@ -191,8 +232,10 @@ class MainWindow(inheritedMainWindow):
                         self.status.setText( f"pixmap: (w,h) = ({w},{h})" )
                         self.scaleOne()
                         self.view.setMouseTracking(True)
+                        image_data.mark('displayed')
                     else:
                         self.pixmap = QPixmap()
+                    self.latency.add(image_data)
                 else:
                     self.image = QImage()
                     self.pixmap = QPixmap()
@@ -207,6 +250,20 @@ class MainWindow(inheritedMainWindow):
     
     
     
+    def setImageTime(self, image_data):
+        """Remember when the camera image in self.npImage was made, camera clock if available."""
+        self.npImageTime = image_data.device_time if (image_data.device_time is not None) else image_data.timestamp
+        self.timedImage = self.npImage
+
+    def imageTime(self):
+        """Time (s) when the current image was made, or None if it is not a (timed) camera image."""
+        if (self.timedImage is not None) and (self.timedImage is self.npImage):
+            return self.npImageTime
+        return None
+
+    def printLatency(self):
+        print(self.latency.summary())
+
     def change_lum(self):
         if not ueyeOK or not self.camOn:
             print("Camera is not available or not turned on.")
@@ -214,59 +271,50 @@ class MainWindow(inheritedMainWindow):
         
         dialog = LuminosityDialog(self)
         if dialog.exec_() == QDialog.Accepted:
-            luminosity_value = dialog.get_luminosity()
-            luminosity_value = max(0, min(100, luminosity_value))
-            
-            retVal = ueye.is_SetHardwareGain(self.cam.handle(), luminosity_value, ueye.IS_IGNORE_PARAMETER, 
-                                             ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER)
-            if retVal == ueye.IS_SUCCESS:
-                print(f"Luminosity set to {luminosity_value}")
-            else:
+            luminosity_value = max(0, min(100, dialog.get_luminosity()))
+            changed = self.settings.apply(gain=luminosity_value)
+            if ('gain' in changed) and (changed['gain'] != luminosity_value):
                 print("Failed to set luminosity.")
+            else:
+                print(f"Luminosity set to {luminosity_value}")
         return
     
-    
     def change_expo_time(self):
+        """Set exposure time 'self.exposure_time' in camera, if it is not set already."""
         if not self.camOn:
             print("Camera is not turned on.")
             return
-        
-        auto_exposure = ueye.double(0)
-        ret = ueye.is_SetAutoParameter(self.cam.handle(), ueye.IS_SET_ENABLE_AUTO_SHUTTER, auto_exposure, None)
-        if ret != ueye.IS_SUCCESS:
-            print("Warning: Failed to disable auto-exposure. Manual exposure might not work.")
-
-        # Set exposure time
-        exp_time = ueye.c_double(self.exposure_time)
-        ret = ueye.is_Exposure(self.cam.handle(), ueye.IS_EXPOSURE_CMD_SET_EXPOSURE, exp_time, 8)
-
-        if ret == ueye.IS_SUCCESS:
-            print(f"Exposure time successfully set to {exp_time.value} ms")
-            time.sleep(0.1)  # Small delay to let the setting take effect
-
-            # Verify the change by reading the exposure time back
-            new_exposure = ueye.double()
-            ret = ueye.is_Exposure(self.cam.handle(), ueye.IS_EXPOSURE_CMD_GET_EXPOSURE, new_exposure, 8)
-            if ret == ueye.IS_SUCCESS:
-                print(f"Verified exposure time: {new_exposure.value:.3f} ms")
-            else:
-                print("Failed to verify the updated exposure time.")
-        else:
-            print("Failed to set exposure time.")
-
-            
+        changed = self.settings.apply(exposure=self.exposure_time)
+        print(f"Exposure time is {self.settings.state['exposure']} ms" + 
+              ("" if changed else " (not changed)"))
+        return
             
     def change_framerate(self):
-        """Change the frame rate of the camera."""
-        
-        new_fps = ueye.c_double(self.fps)
-        ret = ueye.is_SetFrameRate(self.cam.handle(), new_fps, new_fps)
-
-        if ret == ueye.IS_SUCCESS:
-            print(f"Frame rate set to {new_fps.value} FPS")
-        else:
-            print("Failed to set frame rate.")
+        """Set frame rate 'self.fps' in camera, if it is not set already."""
+        changed = self.settings.apply(fps=self.fps)
+        print(f"Frame rate is {self.settings.state['fps']} FPS" + ("" if changed else " (not changed)"))
+        return
             
+    def select_profile(self):
+        """Apply one of the named camera settings profiles, see CAM_PROFILES in utils/variables.py."""
+        names = list(self.settings.profiles)
+        if not names:
+            return
+        current = names.index(self.settings.profile) if (self.settings.profile in names) else 0
+        (name, ok) = QInputDialog.getItem(self, "Camera profile", "Profile", names, current, False)
+        if ok:
+            self.use_profile(name)
+        return
+            
+    def use_profile(self, name, **override):
+        """Apply the named camera settings profile, only the changed settings are sent to the camera."""
+        changed = self.settings.use(name, **override)
+        if self.settings.state['exposure'] is not None:
+            self.exposure_time = self.settings.state['exposure']
+        if self.settings.state['fps'] is not None:
+            self.fps = self.settings.state['fps']
+        print(f"{self.appFileName}: profile '{name}', changed {changed} in {self.settings.calls} calls")
+        return
             
     def properties_func(self):
         """Opens a dialog to change camera properties (exposure time & frame rate) without closing the main window."""
@@ -280,14 +328,14 @@ class MainWindow(inheritedMainWindow):
         
         if dialog.exec_():  # Runs modal dialog and waits for user input
             self.exposure_time, self.fps = dialog.get_values()
-            print(self.fps, self.exposure_time)
-            self.change_expo_time()
-            self.change_framerate()
+            changed = self.settings.apply(fps=self.fps, exposure=self.exposure_time)   # frame rate first
+            print(f"Camera properties changed: {changed}")
         
     
 
     def record_video2(self):
-        """Record video from the IDS camera and save it as both video and images."""
+        """Record video from the IDS camera and save it as video, images or raw frames.
+        Frames are captured in one thread and written in other threads, see utils/clsRecorder.py."""
         if not (ueyeOK and self.camOn):
             print("Camera is not available or not turned on.")
             return
@@ -295,73 +343,39 @@ class MainWindow(inheritedMainWindow):
         duration = 2  # Video duration in seconds
         save_folder = r"C:\Raph Stockage\Courses\Applied Robot Technology\Assignment_IA\Video"
 
-        # Ensure the save folder exists
-        if not os.path.exists(save_folder):
-            os.makedirs(save_folder)
-
-        # Video file path
-        video_path = os.path.join(save_folder, "output.mp4")
-
-        # Video writer setup
-        fourcc = cv2.VideoWriter_fourcc(*'XVID')  # Codec
-        out = cv2.VideoWriter(video_path, fourcc, self.fps, (self.width_c, self.height_c))
-
-        print(f"Recording video: {video_path}")
-
-        self.cam.alloc(3)  # Allocate memory for the image buffer
-        
-        frame_count = 0
-        expected_frames = int(self.fps * duration)
-
-        start_time = time.time()
-
-        while frame_count < expected_frames:
-            imBuf = ImageBuffer()
-            self.cam.freeze_video(True)
-            retVal = ueye.is_WaitForNextImage(self.cam.handle(), 1000, imBuf.mem_ptr, imBuf.mem_id)
-
-            if retVal == ueye.IS_SUCCESS:
-                self.copy_image(ImageData(self.cam.handle(), imBuf))
-                
-                if self.npImage.size > 0:
-                    frame = self.npImage
-                    
-                    # Convert to BGR format if needed
-                    # frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR) if frame.shape[-1] == 3 else frame
-                    
-                    # Save frame as an image
-                    img_filename = os.path.join(save_folder, f"frame_{frame_count:04d}.png")
-                    cv2.imwrite(img_filename, frame)
-
-                    # Write frame to video
-                    out.write(frame)
-                    frame_count += 1
-                else:
-                    print("Warning: Empty frame captured.")
-            else:
-                print("Failed to capture frame.")
-                break
-
-            # Ensure correct frame pacing
-            elapsed_time = time.time() - start_time
-            expected_time = frame_count / self.fps
-            if elapsed_time < expected_time:
-                time.sleep(expected_time - elapsed_time)
-
-        out.release()
-        print(f"Video recording finished. Saved to {video_path}")
-        print(f"Recorded {frame_count} frames at {self.fps} FPS.")
-
-            
-        
-        
-        
-
+        choices = ['video and png', 'video', 'png', 'raw']
+        (choice, ok) = QInputDialog.getItem(self, "Record video", "Output", choices, 
+                                            choices.index(self.recordOutput), False)
+        if not ok:
+            return
+        self.recordOutput = choice
+        output = ('video', 'png') if (choice == 'video and png') else (choice,)
+
+        self.change_framerate()  # the camera gives the frames at the requested rate
+        wasContinuous = self.cam.continuous
+        if not wasContinuous:
+            self.cam.start_continuous()
+
+        def grab(timeout):
+            frame = self.cam.next_frame(timeout, copy=True)
+            if frame is None:
+                return None
+            frame.unlock()  # the array is a copy
+            return frame.as_1d_image()
+
+        rec = Recorder(save_folder, fps=self.fps, output=output, video_name="output.mp4", codec='mp4v')
+        print(f"Recording {duration} s to {save_folder}, output: {choice}")
+        rec.start(grab, duration=duration)
+        rec.wait()
+        if not wasContinuous:
+            self.cam.stop_continuous()
+        print(rec.info())
+        return
 
-        
     def cameraOff(self):
         """Turn IDS camera off and print some information."""
         if ueyeOK and self.camOn:
+            self.setContinuous(False)
             self.cam.exit()
             self.camOn = False
             self.setMenuItems2()
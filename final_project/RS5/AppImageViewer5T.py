@@ -18,6 +18,7 @@ import time
 from rwsuis import RWS
 
 from utils.variables import T_500, T_250, T_500_bis
+from utils.clsPuckDetector import PuckDetector, PuckTracker, draw_pucks
 
 norbert_ip = "http://152.94.160.198"
 robot = RWS.RWS(norbert_ip)
@@ -69,11 +70,16 @@ class MainWindow(inheritedMainWindow):
         self.meanColorActive = False
         self.mastership = False  
         self.center = None
+        self.pucks = []       # dicts with id, center, angle, ... from the last detection
+        self.detector = PuckDetector(max_frames=3,   # the given image and at most 2 new frames
+                                     tracker=PuckTracker(full_every=5))   # decode around the last positions first
         self.t_center = []
         
         self.better = False
         self.temp_center = None
         self.block = False
+        self.expected_center = (658, 291)   # puck center (flipped image) when the gripper is above it at 250 mm
+        self.puck_region = (658 - 200, 291 - 200, 400, 400)   # AOI used then, full frame pixels (flipped)
         #
         self.initMenu3()
         self.setMenuItems3()
@@ -171,21 +177,39 @@ class MainWindow(inheritedMainWindow):
         robot.start_RAPID()
         
         
-    def get_center(self):
+    def grab_frame(self, timeout=1000):
         """
-        Return the center of the QR codes find in the images.
+        A new camera image as numpy array, flipped as flip_image(), the view is not updated.
         """
-        self.reduceNoise()
-        self.increaseContrast()
-        self.toGray()
-        self.tryBinary(t=132)
-        self.center = self.detectQRCodeCenter()
-        
-        # small coding blocks to redo if self.center is None
-        if self.center:
-            return
+        if not (ueyeOK and self.camOn):
+            return None
+        if self.cam.continuous:
+            image_data = self.cam.latest_frame(timeout)
         else:
-            self.get_center()
+            imBuf = ImageBuffer()
+            self.cam.freeze_video(True)
+            if ueye.is_WaitForNextImage(self.cam.handle(), timeout, imBuf.mem_ptr, imBuf.mem_id) != ueye.IS_SUCCESS:
+                return None
+            image_data = ImageData(self.cam.handle(), imBuf, copy=False)
+        if image_data is None:
+            return None
+        with image_data:   # buffer is unlocked when the copy is made
+            return np.flipud(image_data.as_1d_image()[:, :, :3]).copy()
+        
+    def get_center(self):
+        """
+        Find the centers of the QR codes (pucks) in the image, without the GUI. 
+        If none are found new frames are taken, a bounded number of times. 
+        """
+        self.detector.denoiser = self.denoiser   # as selected for Reduce noise
+        self.pucks = self.detector.run(self.npImage, grab=self.grab_frame)
+        self.center = [p['center'] for p in self.pucks]
+        print(self.detector.info())
+        for p in self.pucks:
+            print(f"get_center: puck {p['id']} at {p['center']}, angle {p['angle']:.1f}")
+        if self.pucks:   # show the result once, in the frame they were found
+            self.np2image2pixmap(draw_pucks(self.detector.image, self.pucks), numpyAlso=False)
+        return self.center
         
         
     def detect_pucks(self):
@@ -194,12 +218,18 @@ class MainWindow(inheritedMainWindow):
         Then gives to RAPID the number of puck detected.
         """
         self.t_center = []
+        height = int(robot.get_gripper_height())
+        if self.camOn:   # full frame, or only the area around the expected puck, only changed values are set
+            if self.better and (height < 375):
+                self.use_profile('puck', aoi=self.settings.region(*self.puck_region, flip=0))
+            else:
+                self.use_profile('puck')
         self.getOneImage()
         self.flip_image()
         self.get_center()   # return a list of tuples [(541,325), (10,20), ...]
-
+        if self.camOn and self.center:   # from the AOI image to full frame pixels, as for T_250 and T_500
+            self.center = [self.settings.to_full(c, flip=0) for c in self.center]
         
-        height = int(robot.get_gripper_height())
         
         if len(self.center) > 0:
         
@@ -220,7 +250,7 @@ class MainWindow(inheritedMainWindow):
                 elif center and 240 <= height <= 260 and self.better:
                     # Here is the process to have a better accuracy for the picking of pucks 
                     # (take a photo and compute the offset needed for an accurate pick of the puck)
-                    expected_center = np.array([658, 291, 1])   # maybe need to change ot the images is the wrong upside-down direction(need to flip it)
+                    expected_center = np.array([self.expected_center[0], self.expected_center[1], 1])   # maybe need to change ot the images is the wrong upside-down direction(need to flip it)
                     actual_center = self.center
                     
                     expected_table = T_250 @ expected_center
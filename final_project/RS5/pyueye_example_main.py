@@ -100,6 +100,8 @@ def main():
 
 	thread.stop()
 	thread.join()
+	for txt in thread.stats():   # frames handled and dropped by each view
+		print(txt)
 
 	cam.stop_video()
 	cam.exit()
@@ -0,0 +1,701 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ../ELE610/py3/pyueye_example_simcamera.py
+#
+#  A simulated IDS uEye camera, the classes Camera, ImageData and ImageBuffer
+#  have the same methods and attributes as in pyueye_example_camera.py and
+#  pyueye_example_utils.py, and 'ueye' has the (few) constants and is_xxx()
+#  functions the viewers use. The camera replays the images in a folder, or
+#  makes synthetic images, at a given frame rate with some timing jitter.
+#  Thus the acquisition and detection code (FrameThread, viewers, ...) can be
+#  tested and timed on a computer without the camera and the IDS driver.
+#
+#  The images (PNG, JPG, BMP) are read when the camera is initialized, and then
+#  replayed from memory, the sensor size is the size of the first image and the
+#  AOI is cut from the sensor image. Frames are written into a ring of buffers,
+#  and as for the real camera a frame is dropped when no buffer is free, i.e.
+#  all buffers are locked or waiting in the image queue.
+#  Exposure time (is_Exposure) scales the image intensity, and frame rate
+#  (is_SetFrameRate) is the replay rate.
+#  In trigger mode (is_SetExternalTrigger) a burst of frames is exposed for each
+#  trigger, given by trigger() or is_ForceTrigger(), or by a simulated trigger
+#  line, start_trigger_source(period), that gives an edge every period seconds.
+#
+# October 2026
+
+# Example on how to use file:
+#   (py38) C:\..\py3> python pyueye_example_simcamera.py ..\final_project\image   # benchmark
+#   (py38) C:\..\py3> python pyueye_example_simcamera.py synthetic 60 5            # 60 fps, 5 s
+#   the benchmark is run with FrameThread(copy=True) and with copy=False
+# Example on how to use file in appImageViewer2.py (instead of the camera),
+#   set environment variable UEYE_SIM to a folder with images, or 'synthetic':
+#   (py38) C:\..\py3> set UEYE_SIM=..\final_project\image
+#   (py38) C:\..\py3> python appImageViewer2.py
+#   UEYE_SIM_FPS may be set to frame rate (default 25), UEYE_SIM_JITTER to
+#   standard deviation of frame time as fraction of frame period (default 0.05).
+#   UEYE_SIM_TRIGGER may be set to the period (s) of the simulated trigger line.
+
+import os
+import glob
+import time
+import random
+from threading import Thread, Condition, Timer, Lock
+from collections import deque
+from copy import copy as shallow_copy
+import numpy as np
+import cv2
+
+class _Value:
+	"""Stand-in for ueye.int(), ueye.double(), ueye.c_mem_p(), ... i.e. a value given by reference."""
+	def __init__(self, value=0):
+		self.value = value
+	def __int__(self):
+		return int(self.value)
+	def __float__(self):
+		return float(self.value)
+	def __index__(self):
+		return int(self.value)
+	def __and__(self, other):
+		return int(self.value) & int(other)
+	def __str__(self):
+		return str(self.value)
+
+class _SimUeye:
+	""" The part of pyueye.ueye used by the viewers, the functions work on a simulated Camera
+	(given as the handle, i.e. cam.handle()). Functions not defined here return IS_NO_SUCCESS,
+	so features not simulated are just not available. Constants not defined here raise
+	AttributeError, as a value would be taken as another constant (many of them are 0).
+	"""
+	IS_SUCCESS = 0
+	IS_NO_SUCCESS = -1
+	IS_INVALID_CAMERA_HANDLE = 1
+	IS_TIMED_OUT = 122
+	IS_CAPTURE_RUNNING = 140
+	IS_IGNORE_PARAMETER = -1
+	IS_WAIT = 1
+	IS_DONT_WAIT = 0
+	IS_FORCE_VIDEO_STOP = 0x4000
+	IS_GET_COLOR_MODE = 0x8000
+	IS_GET_FRAMERATE = 0x8000
+	IS_GET_MASTER_GAIN = 0x8000
+	IS_SET_ENABLE_AUTO_SHUTTER = 0x8802
+	IS_AOI_IMAGE_SET_AOI = 0x0001
+	IS_AOI_IMAGE_GET_AOI = 0x0002
+	IS_CM_BGRA8_PACKED = 0
+	IS_CM_BGR8_PACKED = 1
+	IS_CM_MONO8 = 6
+	IS_CM_RGB8_PACKED = 129
+	IS_EXPOSURE_CMD_GET_EXPOSURE_DEFAULT = 5
+	IS_EXPOSURE_CMD_GET_EXPOSURE = 7
+	IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MIN = 8
+	IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MAX = 9
+	IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_INC = 10
+	IS_EXPOSURE_CMD_SET_EXPOSURE = 12
+	IS_SET_TRIGGER_OFF = 0
+	IS_SET_TRIGGER_HI_LO = 1
+	IS_SET_TRIGGER_LO_HI = 2
+	IS_SET_TRIGGER_SOFTWARE = 0x1000
+	IS_GET_EXTERNALTRIGGER = 0x8000
+	IS_TRIGGER_CMD_GET_BURST_SIZE = 3
+	IS_TRIGGER_CMD_SET_BURST_SIZE = 4
+	int = INT = uint = UINT = double = c_double = c_mem_p = IS_RECT = _Value
+
+	def __getattr__(self, name):
+		if name.startswith('is_'):
+			return lambda *args: self.IS_NO_SUCCESS
+		raise AttributeError(f"simulated ueye has no '{name}'")
+
+	def is_WaitForNextImage(self, h_cam, timeout, mem_ptr, mem_id):
+		img_buff = h_cam.wait_buffer(timeout)
+		if img_buff is None:
+			return self.IS_TIMED_OUT
+		mem_ptr.value = img_buff.mem_ptr.value
+		mem_id.value = img_buff.mem_id.value
+		return self.IS_SUCCESS
+
+	def is_UnlockSeqBuf(self, h_cam, mem_id, mem_ptr):
+		h_cam.release(int(mem_id))
+		return self.IS_SUCCESS
+
+	def is_FreezeVideo(self, h_cam, wait):
+		return h_cam.freeze_video(wait == self.IS_WAIT)
+
+	def is_CaptureVideo(self, h_cam, wait):
+		return h_cam.capture_video(wait == self.IS_WAIT)
+
+	def is_StopLiveVideo(self, h_cam, wait):
+		return h_cam.stop_video()
+
+	def is_SetColorMode(self, h_cam, mode):
+		if mode == self.IS_GET_COLOR_MODE:
+			return h_cam.get_colormode()
+		h_cam.set_colormode(mode)
+		return self.IS_SUCCESS
+
+	def is_SetFrameRate(self, h_cam, fps, new_fps):
+		if float(fps) != self.IS_GET_FRAMERATE:
+			h_cam.fps = min(max(float(fps), 0.5), 500.0)
+		new_fps.value = h_cam.fps
+		return self.IS_SUCCESS
+
+	def is_SetExternalTrigger(self, h_cam, mode):
+		if mode == self.IS_GET_EXTERNALTRIGGER:
+			return h_cam.trigger_mode
+		with h_cam.cond:
+			h_cam.trigger_mode = mode
+			h_cam.cond.notify_all()
+		return self.IS_SUCCESS
+
+	def is_ForceTrigger(self, h_cam):
+		return h_cam.trigger()
+
+	def is_Trigger(self, h_cam, cmd, param, size):
+		if cmd == self.IS_TRIGGER_CMD_SET_BURST_SIZE:
+			h_cam.burst_size = max(1, int(param))
+		elif cmd == self.IS_TRIGGER_CMD_GET_BURST_SIZE:
+			param.value = h_cam.burst_size
+		else:
+			return self.IS_NO_SUCCESS
+		return self.IS_SUCCESS
+
+	def is_Exposure(self, h_cam, cmd, d, size):
+		if cmd == self.IS_EXPOSURE_CMD_SET_EXPOSURE:
+			h_cam.exposure = min(max(float(d), h_cam.exposure_range[0]), h_cam.exposure_range[1])
+			d.value = h_cam.exposure
+		elif cmd == self.IS_EXPOSURE_CMD_GET_EXPOSURE:
+			d.value = h_cam.exposure
+		elif cmd == self.IS_EXPOSURE_CMD_GET_EXPOSURE_DEFAULT:
+			d.value = h_cam.exposure_default
+		elif cmd == self.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MIN:
+			d.value = h_cam.exposure_range[0]
+		elif cmd == self.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MAX:
+			d.value = h_cam.exposure_range[1]
+		elif cmd == self.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_INC:
+			d.value = 0.01
+		else:
+			return self.IS_NO_SUCCESS
+		return self.IS_SUCCESS
+	#end class _SimUeye
+
+ueye = _SimUeye()
+
+_bits_per_pixel = { ueye.IS_CM_MONO8: 8, ueye.IS_CM_BGR8_PACKED: 24,
+                    ueye.IS_CM_RGB8_PACKED: 24, ueye.IS_CM_BGRA8_PACKED: 32 }
+
+def get_bits_per_pixel(color_mode):
+	return _bits_per_pixel[color_mode]
+
+class Rect:
+	def __init__(self, x=0, y=0, width=0, height=0):
+		self.x = x
+		self.y = y
+		self.width = width
+		self.height = height
+
+class ImageBuffer:
+	def __init__(self):
+		self.mem_ptr = _Value(0)
+		self.mem_id = _Value(-1)
+
+class MemoryInfo:
+	def __init__(self, width, height, bits):
+		self.x = width
+		self.y = height
+		self.bits = bits
+		self.pitch = width*((bits + 7)//8)
+		self.width = width
+		self.height = height
+
+_users_lock = Lock()   # for ImageData.users, references may be unlocked by different threads
+
+class ImageData:
+	""" Image data of a (locked) buffer of the simulated camera, as in pyueye_example_utils.py,
+	with copy=False the array is a view of the buffer, only valid until unlock() is called.
+	The simulated camera clock is time.perf_counter(), i.e. the same as the host clock.
+	"""
+	def __init__(self, h_cam, img_buff, copy=True):
+		self.timestamp = time.perf_counter()   # host receive time
+		self.times = {'received': self.timestamp}
+		self.h_cam = h_cam
+		self.img_buff = img_buff
+		self.locked = True
+		self.users = [1]
+		buff = h_cam.buffers[int(img_buff.mem_id)]
+		self.sequence = buff['sequence']
+		self.frame_number = buff['sequence']     # frame number given by the camera
+		self.device_time = buff['timestamp']     # time when the frame was made
+		(h, w) = buff['image'].shape[:2]
+		self.color_mode = h_cam.get_colormode()
+		self.bits_per_pixel = get_bits_per_pixel(self.color_mode)
+		self.mem_info = MemoryInfo(w, h, self.bits_per_pixel)
+		self.array = buff['image'].reshape(-1)
+		if copy:
+			self.array = self.array.copy()
+
+	def __str__(self):
+		m = self.mem_info
+		return 'ImageData object: w = %i, h = %i, bits = %i, pitch = %i' % (m.width, m.height, m.bits, m.pitch)
+
+	def mark(self, stage):
+		self.times[stage] = time.perf_counter()
+
+	def as_1d_image(self):
+		channels = int((7 + self.bits_per_pixel) / 8)
+		if channels > 1:
+			return np.reshape(self.array, (self.mem_info.height, self.mem_info.width, channels))
+		else:
+			return np.reshape(self.array, (self.mem_info.height, self.mem_info.width))
+
+	def lock(self):
+		if not self.locked:
+			with _users_lock:
+				if self.users[0] <= 0:
+					self.h_cam.lock(int(self.img_buff.mem_id))
+				self.users[0] += 1
+			self.locked = True
+
+	def unlock(self):
+		if self.locked:
+			self.locked = False
+			with _users_lock:
+				self.users[0] -= 1
+				last = (self.users[0] <= 0)
+			if last:
+				self.h_cam.release(int(self.img_buff.mem_id))
+
+	def share(self, n):
+		if n <= 0:
+			self.unlock()
+			return []
+		refs = [shallow_copy(self) for i in range(n)]
+		for ref in refs:
+			ref.times = dict(self.times)
+		if self.locked:
+			with _users_lock:
+				self.users[0] += n - 1
+			self.locked = False
+		return refs
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, _type, value, traceback):
+		self.unlock()
+
+_backgrounds = {}   # background image for each size, made once
+
+def synthetic_image(k, width=1280, height=960):
+	"""Returns BGR image number k of a synthetic sequence, three discs (pucks) moving on
+	a gray background, and frame number as text."""
+	if (width, height) not in _backgrounds:
+		B = np.empty((height, width, 3), dtype=np.uint8)
+		B[:] = np.linspace(90, 150, width).astype(np.uint8)[None,:,None]   # some light gradient
+		_backgrounds[(width, height)] = B
+	A = _backgrounds[(width, height)].copy()
+	r = min(width, height)//12
+	for (i, color) in enumerate([(40,40,200), (40,170,40), (200,80,30)]):
+		a = 0.03*k + 2.1*i
+		x = int(width/2 + (width/3)*np.cos(a))
+		y = int(height/2 + (height/3)*np.sin(1.3*a))
+		cv2.circle(A, (x, y), r, color, -1)
+	cv2.putText(A, f"{k:06d}", (20, height - 20), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 2)
+	return A
+
+class Camera:
+	""" Simulated camera with the methods of Camera in pyueye_example_camera.py.
+	example of use:
+		cam = Camera(source='../final_project/image', fps=30)   # or source='synthetic'
+		cam.init()
+		cam.set_colormode(ueye.IS_CM_BGR8_PACKED)
+		cam.alloc(3)
+		cam.start_continuous()
+		with cam.latest_frame() as frame:
+			A = frame.as_1d_image()
+	'source' and 'fps' are by default given by environment variables UEYE_SIM and UEYE_SIM_FPS.
+	"""
+	def __init__(self, device_id=0, source=None, fps=None, jitter=None, max_images=200):
+		self.device_id = device_id
+		self.source = source or os.environ.get('UEYE_SIM', 'synthetic')
+		self.fps = float(fps or os.environ.get('UEYE_SIM_FPS', 25))
+		self.jitter = float(jitter if (jitter is not None) else os.environ.get('UEYE_SIM_JITTER', 0.05))
+		self.max_images = max_images
+		self.h_cam = None
+		self.images = []          # the source images (BGR), used when source is a folder
+		self.sensor = (1280, 960)   # (width, height)
+		self.aoi = Rect(0, 0, 1280, 960)
+		self.color_mode = ueye.IS_CM_BGR8_PACKED
+		self.exposure_default = 10.0   # ms, the images are replayed as they are at this exposure
+		self.exposure = self.exposure_default
+		self.exposure_range = (0.05, 200.0)
+		self.img_buffers = []
+		self.buffers = []         # dict with 'image', 'sequence', 'timestamp' for each buffer
+		self.locked = set()       # id of locked buffers
+		self.queue = deque()      # id of buffers with a new frame, oldest first
+		self.cond = Condition()
+		self.live = False
+		self.running = False
+		self.thread = None
+		self.sequence = 0         # frames made by the sensor
+		self.sensor_dropped = 0   # frames lost since no buffer was free
+		self.continuous = False
+		self.frame_count = 0
+		self.dropped_count = 0
+		self.trigger_mode = ueye.IS_SET_TRIGGER_OFF
+		self.burst_size = 1
+		self.triggers = 0         # triggers waiting to be exposed
+		self.trigger_count = 0    # triggers given in trigger mode
+		self.trigger_period = None   # period (s) of the simulated trigger line, when it is on
+
+	def __enter__(self):
+		self.init()
+		return self
+
+	def __exit__(self, _type, value, traceback):
+		self.exit()
+
+	def handle(self):
+		return self.h_cam
+
+	def init(self):
+		if os.path.isdir(self.source):
+			files = []
+			for ext in ('*.png', '*.jpg', '*.jpeg', '*.bmp'):
+				files += glob.glob(os.path.join(self.source, ext))
+			for fn in sorted(files)[:self.max_images]:
+				A = cv2.imread(fn, cv2.IMREAD_COLOR)
+				if A is not None:
+					if self.images and (A.shape != self.images[0].shape):
+						A = cv2.resize(A, (self.images[0].shape[1], self.images[0].shape[0]))
+					self.images.append(A)
+			if not self.images:
+				raise IOError(f"Simulated camera: no images in {self.source}")
+			self.sensor = (self.images[0].shape[1], self.images[0].shape[0])
+		elif self.source != 'synthetic':
+			raise IOError(f"Simulated camera: source should be a folder or 'synthetic', not {self.source}")
+		self.aoi = Rect(0, 0, self.sensor[0], self.sensor[1])
+		self.h_cam = self
+		self.running = True
+		self.thread = Thread(target=self.run, daemon=True)
+		self.thread.start()
+		if os.environ.get('UEYE_SIM_TRIGGER'):
+			self.start_trigger_source(float(os.environ['UEYE_SIM_TRIGGER']))
+		return ueye.IS_SUCCESS
+
+	def exit(self):
+		if self.h_cam is not None:
+			self.stop_continuous()
+			self.stop_trigger_source()
+			with self.cond:
+				self.running = False
+				self.live = False
+				self.cond.notify_all()
+			self.thread.join(timeout=2.0)
+			self.h_cam = None
+		return
+
+	def alloc(self, buffer_count=3):
+		(w, h) = (self.aoi.width, self.aoi.height)
+		channels = (get_bits_per_pixel(self.color_mode) + 7)//8
+		shape = (h, w, channels) if (channels > 1) else (h, w)
+		with self.cond:
+			self.queue.clear()
+			self.locked.clear()
+			self.buffers = [{'image': np.zeros(shape, dtype=np.uint8), 'sequence': 0, 'timestamp': 0.0}
+			                for i in range(buffer_count)]
+			self.img_buffers = []
+			for i in range(buffer_count):
+				buff = ImageBuffer()
+				buff.mem_ptr.value = i
+				buff.mem_id.value = i
+				self.img_buffers.append(buff)
+		return
+
+	def get_aoi(self):
+		return Rect(self.aoi.x, self.aoi.y, self.aoi.width, self.aoi.height)
+
+	def set_aoi(self, x, y, width, height):
+		"""the AOI is cut from the sensor image, it is made smaller if it is outside the sensor"""
+		x = min(max(int(x), 0), self.sensor[0] - 1)
+		y = min(max(int(y), 0), self.sensor[1] - 1)
+		self.aoi = Rect(x, y, min(int(width), self.sensor[0] - x), min(int(height), self.sensor[1] - y))
+		return ueye.IS_SUCCESS
+
+	def set_colormode(self, colormode):
+		if colormode not in _bits_per_pixel:
+			raise ValueError(f"Simulated camera: color mode {colormode} is not simulated")
+		self.color_mode = colormode
+
+	def get_colormode(self):
+		return self.color_mode
+
+	def get_format_list(self):
+		return []
+
+	def capture_video(self, wait=False):
+		with self.cond:
+			self.live = True
+			self.cond.notify_all()
+		return ueye.IS_SUCCESS
+
+	def stop_video(self):
+		with self.cond:
+			self.live = False
+			self.cond.notify_all()
+		return ueye.IS_SUCCESS
+
+	def freeze_video(self, wait=False):
+		"""expose one frame, it takes one frame period"""
+		self.stop_video()
+		if wait:
+			time.sleep(1.0/self.fps)
+			self.expose()
+		else:
+			Timer(1.0/self.fps, self.expose).start()
+		return ueye.IS_SUCCESS
+
+	def start_continuous(self, buffer_count=None):
+		if (buffer_count is not None) or (not self.img_buffers):
+			self.alloc(buffer_count or 3)
+		self.frame_count = 0
+		self.dropped_count = 0
+		self.capture_video(wait=False)
+		self.continuous = True
+
+	def stop_continuous(self):
+		if self.continuous:
+			self.stop_video()
+			self.continuous = False
+
+	def set_trigger_mode(self, mode):
+		ueye.is_SetExternalTrigger(self, mode)
+
+	def set_burst_size(self, n):
+		ueye.is_Trigger(self, ueye.IS_TRIGGER_CMD_SET_BURST_SIZE, ueye.uint(n), 4)
+		return self.burst_size
+
+	def start_triggered(self, mode=None, burst=1, buffer_count=None):
+		self.stop_continuous()
+		self.set_trigger_mode(ueye.IS_SET_TRIGGER_HI_LO if (mode is None) else mode)
+		count = max(self.set_burst_size(burst), buffer_count or len(self.img_buffers) or 3)   # all frames of a burst are locked
+		self.start_continuous(count if (count != len(self.img_buffers)) else None)
+
+	def stop_triggered(self):
+		self.stop_continuous()
+		self.set_trigger_mode(ueye.IS_SET_TRIGGER_OFF)
+
+	def force_trigger(self):
+		return ueye.is_ForceTrigger(self)
+
+	def wait_trigger(self, timeout=1000, frames=None, copy=False):
+		out = []
+		for i in range(frames or self.burst_size):
+			frame = self.next_frame(timeout, copy)
+			if frame is None:
+				break
+			out.append(frame)
+		return out
+
+	def trigger(self):
+		"""a trigger edge, ignored unless live video in trigger mode"""
+		with self.cond:
+			if not (self.live and (self.trigger_mode != ueye.IS_SET_TRIGGER_OFF)):
+				return ueye.IS_NO_SUCCESS
+			self.triggers += 1
+			self.trigger_count += 1
+			self.cond.notify_all()
+		return ueye.IS_SUCCESS
+
+	def start_trigger_source(self, period, jitter=0.0):
+		"""simulated trigger line, an edge every period (s) until stop_trigger_source()"""
+		self.trigger_period = period
+		def source():
+			while self.trigger_period and self.running:
+				time.sleep(max(0.0, random.gauss(self.trigger_period, jitter*self.trigger_period)))
+				if self.trigger_period:
+					self.trigger()
+		Thread(target=source, daemon=True).start()
+
+	def stop_trigger_source(self):
+		self.trigger_period = None
+
+	def wait_buffer(self, timeout=1000):
+		"""returns ImageBuffer of the oldest frame in the queue, locked, or None at timeout (ms)"""
+		with self.cond:
+			if not self.queue:
+				self.cond.wait_for(lambda: bool(self.queue), timeout/1000.0)
+			if not self.queue:
+				return None
+			i = self.queue.popleft()
+			self.locked.add(i)
+		self.frame_count += 1
+		return self.img_buffers[i]
+
+	def unlock_buffer(self, img_buffer):
+		self.release(int(img_buffer.mem_id))
+
+	def lock(self, i):
+		with self.cond:
+			self.locked.add(i)
+
+	def release(self, i):
+		with self.cond:
+			self.locked.discard(i)
+
+	def next_frame(self, timeout=1000, copy=False):
+		img_buffer = self.wait_buffer(timeout)
+		if img_buffer is None:
+			return None
+		return ImageData(self, img_buffer, copy=copy)
+
+	def latest_frame(self, timeout=1000, copy=False):
+		img_buffer = self.wait_buffer(timeout)
+		if img_buffer is None:
+			return None
+		while True:
+			newer = self.wait_buffer(0)
+			if newer is None:
+				break
+			self.unlock_buffer(img_buffer)
+			self.dropped_count += 1
+			img_buffer = newer
+		return ImageData(self, img_buffer, copy=copy)
+
+	def sensor_image(self, k):
+		"""Returns the AOI of sensor image number k, in the color mode and for the exposure time."""
+		if self.images:
+			A = self.images[k % len(self.images)]
+		else:
+			A = synthetic_image(k, self.sensor[0], self.sensor[1])
+		a = self.aoi
+		A = A[a.y:a.y+a.height, a.x:a.x+a.width]
+		if self.exposure != self.exposure_default:
+			A = cv2.convertScaleAbs(A, alpha=self.exposure/self.exposure_default)
+		if self.color_mode == ueye.IS_CM_MONO8:
+			A = cv2.cvtColor(A, cv2.COLOR_BGR2GRAY)
+		elif self.color_mode == ueye.IS_CM_RGB8_PACKED:
+			A = cv2.cvtColor(A, cv2.COLOR_BGR2RGB)
+		elif self.color_mode == ueye.IS_CM_BGRA8_PACKED:
+			A = cv2.cvtColor(A, cv2.COLOR_BGR2BGRA)
+		return A
+
+	def expose(self):
+		"""Make a new frame in a free buffer (not locked, not in queue), or drop it if none is free."""
+		with self.cond:
+			busy = self.locked.union(self.queue)
+			n = len(self.buffers)
+			free = [i for i in range(n) if i not in busy]
+			self.sequence += 1
+			if not free:
+				self.sensor_dropped += 1
+				return False
+			i = min(free, key=lambda i: (i - self.sequence) % n)   # as a ring
+		buff = self.buffers[i]
+		A = self.sensor_image(self.sequence - 1)
+		if A.shape == buff['image'].shape:
+			np.copyto(buff['image'], A)
+		else:   # AOI or color mode changed after alloc()
+			buff['image'] = np.ascontiguousarray(A)
+		buff['sequence'] = self.sequence
+		buff['timestamp'] = time.perf_counter()
+		with self.cond:
+			self.queue.append(i)
+			self.cond.notify_all()
+		return True
+
+	def run(self):
+		"""The sensor, makes frames at the frame rate when live video is on."""
+		t_next = None
+		while True:
+			with self.cond:
+				self.cond.wait_for(lambda: self.live or (not self.running))
+				if not self.running:
+					break
+				burst = 0
+				if self.trigger_mode != ueye.IS_SET_TRIGGER_OFF:   # wait for a trigger
+					self.cond.wait_for(lambda: self.triggers or (not self.live) or (not self.running)
+					                   or (self.trigger_mode == ueye.IS_SET_TRIGGER_OFF))
+					if self.triggers and self.live and self.running:
+						self.triggers -= 1
+						burst = self.burst_size
+					else:
+						t_next = None
+						continue
+			if burst:   # frames of the burst one frame period apart
+				for i in range(burst):
+					if i:
+						time.sleep(1.0/self.fps)
+					self.expose()
+				t_next = None
+				continue
+			period = 1.0/self.fps
+			now = time.perf_counter()
+			if (t_next is None) or (t_next < now - 5*period):
+				t_next = now   # start, or far behind (the frames are then lost)
+			t_next += period
+			delay = t_next + random.gauss(0.0, self.jitter*period) - time.perf_counter()
+			if delay > 0:
+				time.sleep(delay)
+			with self.cond:
+				if not (self.live and self.running):
+					t_next = None
+					continue
+			self.expose()
+		#end while
+		return
+	#end class Camera
+
+def benchmark(source='synthetic', fps=25, seconds=5.0, copy=True, queue_size=2, policy='drop_oldest'):
+	"""Run FrameThread with a display-like view and a slow (HoughCircles) view, print the rates.
+	With copy=False the views hold the camera buffers, and a slow view makes the camera drop frames."""
+	from pyueye_example_utils import FrameThread
+	class CircleView:
+		def __init__(self):
+			self.found = 0
+			self.latency = []
+		def handle(self, image_data):
+			A = cv2.cvtColor(image_data.as_1d_image(), cv2.COLOR_BGR2GRAY)
+			A = cv2.medianBlur(A, 5)
+			circles = cv2.HoughCircles(A, cv2.HOUGH_GRADIENT, dp=2, minDist=20,
+			                           param1=150, param2=100, minRadius=10, maxRadius=120)
+			self.found += 0 if (circles is None) else 1
+			self.latency.append(time.perf_counter() - image_data.device_time)
+	class CopyView:
+		def __init__(self):
+			self.latency = []
+		def handle(self, image_data):
+			np.copy(image_data.as_1d_image())   # the copy a view makes, it is not used
+			self.latency.append(time.perf_counter() - image_data.device_time)
+	#
+	cam = Camera(source=source, fps=fps)
+	cam.init()
+	cam.set_colormode(ueye.IS_CM_BGR8_PACKED)
+	cam.alloc(3)
+	cam.capture_video()
+	views = [CopyView(), CircleView()]
+	thread = FrameThread(cam, views, copy=copy, queue_size=queue_size, policy=policy)
+	t0 = time.perf_counter()
+	thread.start()
+	time.sleep(seconds)
+	thread.stop()
+	thread.join()
+	t = time.perf_counter() - t0
+	cam.exit()
+	print( f"Simulated camera {source}: {cam.sensor[0]}x{cam.sensor[1]} at {fps} fps for {t:.1f} s" )
+	print( f"  sensor made {cam.sequence} frames ({cam.sequence/t:.1f} fps), {cam.sensor_dropped} dropped by camera" )
+	print( f"  FrameThread got {thread.sequence} frames ({thread.sequence/t:.1f} fps), policy {policy}, copy={copy}" )
+	for (view, txt) in zip(views, thread.stats()):
+		if view.latency:
+			L = 1000*np.array(view.latency)
+			print( f"  {txt}, latency median {np.median(L):.1f} ms, 95% {np.percentile(L, 95):.1f} ms" )
+		else:
+			print( f"  {txt}" )
+	return
+
+if __name__ == '__main__':
+	import sys
+	source = sys.argv[1] if (len(sys.argv) > 1) else 'synthetic'
+	fps = float(sys.argv[2]) if (len(sys.argv) > 2) else 25
+	seconds = float(sys.argv[3]) if (len(sys.argv) > 3) else 5.0
+	for copy in (True, False):
+		benchmark(source, fps, seconds, copy=copy)
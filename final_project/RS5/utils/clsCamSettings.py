@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# clsCamSettings.py
+#
+#  The class CamSettings, a cache of the IDS camera settings (AOI, color mode,
+#  frame rate, exposure time and gain). Settings are read from the camera
+#  once, and a set of settings (a profile) is applied in one call where only
+#  the values that differ from the cache are sent to the driver, in the order
+#  the camera needs them:
+#    color mode and AOI   (buffers are allocated again, live video is restarted)
+#    frame rate           (limits the maximum exposure time)
+#    exposure time
+#    gain
+#  The driver returns the value actually set for frame rate and exposure, so
+#  no waiting and reading back is needed. Named profiles can be switched
+#  quickly, ex. between the two heights used in a robot cycle.
+#  A region of the full frame can be used as AOI, region() gives the AOI on the
+#  camera steps, and to_full() maps pixels in the AOI image back to the full
+#  frame, so calibration made on full frames (utils/variables.py) can be used.
+#
+# October 2026
+
+# Example on how to use file in AppImageViewer2T.py:
+#   from utils.clsCamSettings import CamSettings
+#   from utils.variables import CAM_PROFILES
+#   self.settings = CamSettings(self.cam, ueye, CAM_PROFILES)
+#   self.settings.apply(exposure=2.0, fps=20)   # only changed values are set
+#   self.settings.use('puck')                   # a named profile
+#   print(self.settings.info())                 # cached values, no driver calls
+#   self.settings.apply(aoi=self.settings.region(458, 91, 400, 400))   # smaller AOI
+#   (x, y) = self.settings.to_full((xa, ya))    # pixel in AOI image -> full frame
+
+class CamSettings:
+    """Cached camera settings, applied as a whole profile with only the changed values set."""
+    KEYS = ('color_mode', 'aoi', 'fps', 'exposure', 'gain')   # the order they are applied
+
+    def __init__(self, cam, ueye, profiles=None, buffer_count=3, sensor=(1280, 960),
+                 aoi_pos_step=4, aoi_size_step=16):
+        self.cam = cam
+        self.ueye = ueye
+        self.profiles = dict(profiles or {})   # name -> dict with (some of) KEYS
+        self.buffer_count = buffer_count
+        self.sensor = tuple(sensor)            # (width, height) of full frame
+        self.aoi_pos_step = aoi_pos_step       # AOI steps, conservative, the camera may adjust more
+        self.aoi_size_step = aoi_size_step
+        self.state = {key: None for key in CamSettings.KEYS}   # None is unknown
+        self.profile = None          # name of the last profile used
+        self.auto_shutter_off = False
+        self.calls = 0               # driver calls made by the last apply()
+
+    def read(self):
+        """Read all settings from the camera into the cache."""
+        ueye = self.ueye
+        h = self.cam.handle()
+        self.state['color_mode'] = int(self.cam.get_colormode())
+        r = self.cam.get_aoi()
+        self.state['aoi'] = (int(r.x), int(r.y), int(r.width), int(r.height))
+        d = ueye.double()
+        if ueye.is_SetFrameRate(h, ueye.IS_GET_FRAMERATE, d) == ueye.IS_SUCCESS:
+            self.state['fps'] = float(d)
+        d = ueye.double()
+        if ueye.is_Exposure(h, ueye.IS_EXPOSURE_CMD_GET_EXPOSURE, d, 8) == ueye.IS_SUCCESS:
+            self.state['exposure'] = float(d)
+        gain = ueye.is_SetHardwareGain(h, ueye.IS_GET_MASTER_GAIN, ueye.IS_IGNORE_PARAMETER,
+                                       ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER)
+        self.state['gain'] = int(gain) if (0 <= int(gain) <= 100) else None
+        return dict(self.state)
+
+    def invalidate(self):
+        """Forget the cache, ex. after the settings are changed by another program."""
+        self.state = {key: None for key in CamSettings.KEYS}
+
+    def changes(self, values):
+        """Returns dict with the values that differ from the cache."""
+        out = {}
+        for key in CamSettings.KEYS:
+            v = values.get(key)
+            if v is None:
+                continue
+            if key == 'aoi':
+                v = tuple(int(a) for a in v)
+            if key in ('fps', 'exposure'):
+                same = (self.state[key] is not None) and (abs(self.state[key] - v) < 1e-3*max(abs(v), 1.0))
+            else:
+                same = (self.state[key] == v)
+            if not same:
+                out[key] = v
+        return out
+
+    def apply(self, values=None, **kwargs):
+        """Apply settings (a dict and/or keyword arguments), only the changed values are set.
+        Returns dict with the changed settings as set by the camera."""
+        ueye = self.ueye
+        values = dict(values or {}, **kwargs)
+        unknown = [key for key in values if key not in CamSettings.KEYS]
+        if unknown:
+            raise ValueError(f"CamSettings: unknown settings {unknown}, use {CamSettings.KEYS}")
+        todo = self.changes(values)
+        self.calls = 0
+        if not todo:
+            return {}
+        h = self.cam.handle()
+        if ('color_mode' in todo) or ('aoi' in todo):
+            was_continuous = self.cam.continuous
+            self.cam.stop_continuous()
+            if 'color_mode' in todo:
+                self.cam.set_colormode(todo['color_mode'])
+                self.state['color_mode'] = todo['color_mode']
+                self.calls += 1
+            if 'aoi' in todo:
+                self.cam.set_aoi(*todo['aoi'])
+                r = self.cam.get_aoi()   # the camera may adjust AOI to its step sizes
+                self.state['aoi'] = (int(r.x), int(r.y), int(r.width), int(r.height))
+                self.calls += 2
+            self.cam.alloc(self.buffer_count)   # buffer size is given by AOI and color mode
+            if was_continuous:
+                self.cam.start_continuous()
+            self.state['fps'] = None   # the camera may change the frame rate when AOI is changed
+            self.calls += 1
+            if ('fps' in values) and ('fps' not in todo) and (values['fps'] is not None):
+                todo['fps'] = values['fps']
+        if 'fps' in todo:
+            d = ueye.double()
+            if ueye.is_SetFrameRate(h, ueye.double(todo['fps']), d) == ueye.IS_SUCCESS:
+                self.state['fps'] = float(d)   # the frame rate set by the camera
+            self.calls += 1
+            if 'exposure' not in todo:   # the camera may have reduced exposure to fit the frame rate
+                d = ueye.double()
+                if ueye.is_Exposure(h, ueye.IS_EXPOSURE_CMD_GET_EXPOSURE, d, 8) == ueye.IS_SUCCESS:
+                    self.state['exposure'] = float(d)
+                self.calls += 1
+        if 'exposure' in todo:
+            if not self.auto_shutter_off:   # manual exposure needs auto shutter off, done once
+                ueye.is_SetAutoParameter(h, ueye.IS_SET_ENABLE_AUTO_SHUTTER, ueye.double(0), ueye.double(0))
+                self.auto_shutter_off = True
+                self.calls += 1
+            d = ueye.double(todo['exposure'])
+            if ueye.is_Exposure(h, ueye.IS_EXPOSURE_CMD_SET_EXPOSURE, d, 8) == ueye.IS_SUCCESS:
+                self.state['exposure'] = float(d)   # the exposure set, rounded by the camera
+            self.calls += 1
+        if 'gain' in todo:
+            gain = max(0, min(100, int(todo['gain'])))
+            if ueye.is_SetHardwareGain(h, gain, ueye.IS_IGNORE_PARAMETER, ueye.IS_IGNORE_PARAMETER,
+                                       ueye.IS_IGNORE_PARAMETER) == ueye.IS_SUCCESS:
+                self.state['gain'] = gain
+            self.calls += 1
+        return {key: self.state[key] for key in todo}
+
+    def region(self, x, y, w, h, flip=None):
+        """Returns AOI (x, y, w, h) covering a region given in full frame pixels, on the AOI
+        steps and inside the sensor. With flip (as cv2.flip, 0 is np.flipud) the region is
+        given in the flipped full frame, as the images are flipped in AppImageViewer5T."""
+        (W, H) = self.sensor
+        (x, y, w, h) = self.unflip((int(x), int(y), int(w), int(h)), flip)
+        (p, q) = (self.aoi_pos_step, self.aoi_size_step)
+        (x0, y0) = (max(0, (x//p)*p), max(0, (y//p)*p))
+        w = min(W, -(-(x + w - x0)//q)*q)   # round up to the size step
+        h = min(H, -(-(y + h - y0)//q)*q)
+        x0 = min(x0, ((W - w)//p)*p)
+        y0 = min(y0, ((H - h)//p)*p)
+        return (x0, y0, w, h)
+
+    def unflip(self, rect, flip=None):
+        """Rectangle (x, y, w, h) in the flipped full frame to the (not flipped) full frame, or back."""
+        (x, y, w, h) = rect
+        (W, H) = self.sensor
+        if flip in (0, -1):
+            y = H - y - h
+        if flip in (1, -1):
+            x = W - x - w
+        return (x, y, w, h)
+
+    def to_full(self, point, flip=None):
+        """Maps pixel (x, y) in the AOI image to the full frame, both flipped as given by flip."""
+        aoi = self.state['aoi'] or (0, 0) + self.sensor
+        (ax, ay, aw, ah) = self.unflip(aoi, flip)   # where the (flipped) AOI is in the flipped frame
+        return (point[0] + ax, point[1] + ay)
+
+    def full_frame(self):
+        """Use the full sensor as AOI."""
+        return self.apply(aoi=(0, 0) + self.sensor)
+
+    def use(self, name, **override):
+        """Apply the named profile, keyword arguments override values in it, ex. aoi=..."""
+        if name not in self.profiles:
+            raise KeyError(f"CamSettings: no profile '{name}', profiles are {list(self.profiles)}")
+        changed = self.apply(dict(self.profiles[name], **override))
+        self.profile = name
+        return changed
+
+    def save(self, name):
+        """Store the cached settings as a named profile."""
+        self.profiles[name] = {key: v for (key, v) in self.state.items() if v is not None}
+
+    def info(self):
+        s = self.state
+        txt = f"CamSettings (profile {self.profile}):"
+        txt += f"\n  color mode {s['color_mode']}, AOI {s['aoi']}"
+        txt += "\n  frame rate " + ("unknown" if (s['fps'] is None) else f"{s['fps']:.3f} fps")
+        txt += ", exposure " + ("unknown" if (s['exposure'] is None) else f"{s['exposure']:.3f} ms")
+        txt += ", gain " + ("unknown" if (s['gain'] is None) else f"{s['gain']}")
+        return txt
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# clsPuckDetector.py
+#
+#  The class PuckDetector, find the pucks (QR codes 'Puck #n') in an image
+#  given as a numpy array, without the GUI. Each attempt is a preprocessing
+#  of the original image followed by QR decoding (pyzbar):
+#    gray                 only gray scale, fastest
+#    contrast             noise reduction (clsDenoiser.py, default bilateral filter as
+#                         get_center() did), contrast 1.5 (YUV) and gray
+#    binary 132/100/160   as contrast, then threshold
+#    otsu                 as contrast, then Otsu threshold
+#    clahe                CLAHE on the gray image
+#  The attempts stop when the expected number of pucks is found, or if no
+#  number is expected, at the first attempt that finds any puck. Pucks found
+#  in different attempts are merged by their ID. If no attempt is good
+#  enough, a new frame may be taken (grab) and tried, at most 'max_frames'.
+#  For each puck the center, angle (degrees) and decoded ID are returned.
+#  The class PuckTracker remembers the last polygon for each puck ID, and
+#  decodes first in padded ROIs around them. The full frame is decoded only
+#  when a tracked puck is missing, fewer than expected are found, nothing is
+#  tracked yet, or every 'full_every' frame (to find new pucks). The pucks
+#  barely move between the shots in a collect cycle, so most frames are
+#  decoded in the ROIs only.
+#
+# October 2026
+
+# Example on how to use file in AppImageViewer5T.py:
+#   from utils.clsPuckDetector import PuckDetector
+#   self.detector = PuckDetector(max_frames=3)
+#   pucks = self.detector.run(self.npImage, grab=self.grab_frame)   # grab(timeout) returns a new image or None
+#   centers = [p['center'] for p in pucks]    # and p['id'], p['angle'], p['text'], p['polygon']
+#   print(self.detector.info())
+#   self.detector = PuckDetector(tracker=PuckTracker())   # decode around the last positions first
+
+import time
+import numpy as np
+import cv2
+from pyzbar.pyzbar import decode
+try:
+    from utils.clsDenoiser import Denoiser
+except ImportError:   # run as a script, python final_project/RS5/utils/clsPuckDetector.py
+    from clsDenoiser import Denoiser
+
+ORIENTATION = {'UP': 0, 'RIGHT': 90, 'DOWN': 180, 'LEFT': 270}
+
+def to_gray(A):
+    if A.ndim == 2:
+        return A
+    return cv2.cvtColor(A, cv2.COLOR_BGRA2GRAY if (A.shape[2] == 4) else cv2.COLOR_BGR2GRAY)
+
+def contrast_gray(A, denoiser=None):
+    """Noise reduction (default bilateral filter), contrast 1.5 on Y (YUV) and gray, the steps get_center() did."""
+    denoiser = denoiser or Denoiser('bilateral')
+    if A.ndim == 2:
+        return np.clip(denoiser(A) * 1.5, 0, 255).astype(np.uint8)
+    B = denoiser(np.ascontiguousarray(A[:, :, :3]))
+    yuv = cv2.cvtColor(B, cv2.COLOR_BGR2YUV)
+    yuv[:, :, 0] = cv2.multiply(yuv[:, :, 0], 1.5)
+    return cv2.cvtColor(cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR), cv2.COLOR_BGR2GRAY)
+
+def binary(t):
+    def f(G):
+        if t < 2:
+            return cv2.threshold(G, 1, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+        return cv2.threshold(G, t, 255, cv2.THRESH_BINARY)[1]
+    return f
+
+def clahe(G):
+    return cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(G)
+
+# (name, base, step), base is 'gray' or 'contrast', computed once for each frame
+ATTEMPTS = [('gray', 'gray', None),
+            ('contrast', 'contrast', None),
+            ('binary 132', 'contrast', binary(132)),
+            ('binary 100', 'contrast', binary(100)),
+            ('binary 160', 'contrast', binary(160)),
+            ('otsu', 'contrast', binary(0)),
+            ('clahe', 'gray', clahe)]
+
+def puck_of(obj, offset=(0, 0)):
+    """Dict with id, text, center, angle and polygon for a decoded QR code, or None.
+    offset is added to the pixel positions, i.e. where the decoded image (ROI) is in the frame."""
+    points = obj.polygon
+    if len(points) != 4:
+        return None
+    text = obj.data.decode('utf-8', errors='replace')
+    try:
+        puck_id = int(text.split("#")[1]) if ("Puck #" in text) else None
+    except ValueError:
+        puck_id = None
+    P = np.array([(p.x + offset[0], p.y + offset[1]) for p in points], dtype=np.float32)
+    (cx, cy) = P.mean(axis=0)
+    (_, _, angle) = cv2.minAreaRect(P)   # the square's side angle, modulo 90 degrees
+    angle = (angle % 90.0) + ORIENTATION.get(getattr(obj, 'orientation', None), 0)
+    return {'id': puck_id, 'text': text, 'center': (int(cx), int(cy)),
+            'angle': float(angle % 360.0), 'polygon': P.astype(np.int32)}
+
+def key_of(puck):
+    return puck['id'] if (puck['id'] is not None) else puck['text']
+
+def decode_pucks(G, offset=(0, 0)):
+    """Pucks decoded in image G (gray), positions plus offset."""
+    pucks = [puck_of(obj, offset) for obj in decode(G)]
+    return [p for p in pucks if p is not None]
+
+class PuckTracker:
+    """Remember the last polygon for each puck, decode in padded ROIs around them first."""
+
+    def __init__(self, pad=0.5, min_pad=32, max_age=2, full_every=0):
+        self.pad = pad               # ROI padding as fraction of the QR code size
+        self.min_pad = min_pad       # pixels
+        self.max_age = max_age       # frames a puck is remembered after it was last seen
+        self.full_every = full_every # decode full frame every n'th frame too, 0 is never
+        self.reset()
+
+    def reset(self):
+        self.known = {}     # key (id, or text) -> (polygon, frames since seen)
+        self.shape = None
+        self.frames = 0
+        self.roi_decodes = 0
+        self.full_frames = 0
+
+    def start(self, A):
+        """A new frame, tracked positions are forgotten if the frame size is changed (ex. new AOI)."""
+        if A.shape[:2] != self.shape:
+            self.reset()
+            self.shape = A.shape[:2]
+
+    def roi(self, P):
+        """Padded bounding box (x0, y0, x1, y1) of polygon P, inside the frame."""
+        (x0, y0) = P.min(axis=0)
+        (x1, y1) = P.max(axis=0)
+        d = max(self.min_pad, int(self.pad*max(x1 - x0, y1 - y0)))
+        (h, w) = self.shape
+        return (max(0, int(x0) - d), max(0, int(y0) - d), min(w, int(x1) + d + 1), min(h, int(y1) + d + 1))
+
+    def decode(self, A, prep, have=()):
+        """Pucks in the ROIs of the tracked pucks not in 'have' (keys already found),
+        prep(B) makes the gray image to decode from the ROI B of A."""
+        found = {}
+        for (key, (P, age)) in self.known.items():
+            if (key in have) or (key in found):
+                continue
+            (x0, y0, x1, y1) = self.roi(P)
+            for p in decode_pucks(prep(A[y0:y1, x0:x1]), (x0, y0)):
+                found.setdefault(key_of(p), p)
+            self.roi_decodes += 1
+        return list(found.values())
+
+    def complete(self, found, expected=None):
+        """True if all tracked pucks (and as many as expected) are found, no full frame decoding is needed."""
+        return (bool(self.known) and all((key in found) for key in self.known)
+                and ((not expected) or (len(found) >= expected)))
+
+    def need_full(self, found, expected=None):
+        return ((not self.complete(found, expected)) or
+                (bool(self.full_every) and (self.frames % self.full_every == 0)))
+
+    def update(self, pucks):
+        """Remember the pucks found in a frame, forget pucks not seen for more than max_age frames."""
+        self.frames += 1
+        seen = {key_of(p): p['polygon'] for p in pucks}
+        for (key, (P, age)) in list(self.known.items()):
+            if key not in seen:
+                if age >= self.max_age:
+                    del self.known[key]
+                else:
+                    self.known[key] = (P, age + 1)
+        for (key, P) in seen.items():
+            self.known[key] = (P, 0)
+
+    def info(self):
+        return (f"PuckTracker: {len(self.known)} pucks tracked, {self.frames} frames, " +
+                f"{self.roi_decodes} ROI decodes, full frame decoded in {self.full_frames} frames")
+
+class PuckDetector:
+    """Find pucks (QR codes) in numpy images, a bounded number of attempts and frames."""
+
+    def __init__(self, attempts=None, max_frames=3, expected=None, timeout=1000, tracker=None, denoiser=None):
+        self.attempts = list(ATTEMPTS if (attempts is None) else attempts)
+        self.max_frames = max(1, max_frames)   # the given image and new frames from grab
+        self.expected = expected     # stop when this many pucks are found, None: any puck
+        self.timeout = timeout       # for grab (ms)
+        self.log = []                # (frame, attempt name, pucks found so far, ms) for the last run
+        self.image = None            # the frame the pucks of the last run were found in
+        self.tracker = tracker       # PuckTracker, or None to decode the full frame
+        self.denoiser = denoiser or Denoiser('bilateral')   # for the 'contrast' attempts
+
+    def enough(self, found, expected):
+        return (len(found) >= expected) if expected else (len(found) > 0)
+
+    def detect(self, A, expected=None, frame=0):
+        """Pucks in image A, the attempts are tried until enough pucks are found.
+        With a tracker the attempts are first done in the ROIs of the tracked pucks, and
+        then in the full frame only if some are missing."""
+        expected = self.expected if (expected is None) else expected
+        tracker = self.tracker
+        found = {}   # key (id, or text if no id) -> puck
+        if tracker:
+            tracker.start(A)
+            for (name, base, step) in (self.attempts if tracker.known else []):
+                t0 = time.perf_counter()
+                def prep(B, base=base, step=step):
+                    G = contrast_gray(B, self.denoiser) if (base == 'contrast') else to_gray(B)
+                    return G if (step is None) else step(G)
+                for puck in tracker.decode(A, prep, found):
+                    found.setdefault(key_of(puck), puck)
+                self.log.append((frame, name + ' (ROI)', len(found), 1000*(time.perf_counter() - t0)))
+                if tracker.complete(found, expected):
+                    break
+        if (not tracker) or tracker.need_full(found, expected):
+            bases = {}
+            for (name, base, step) in self.attempts:
+                t0 = time.perf_counter()
+                if base not in bases:
+                    bases[base] = contrast_gray(A, self.denoiser) if (base == 'contrast') else to_gray(A)
+                G = bases[base] if (step is None) else step(bases[base])
+                for puck in decode_pucks(G):
+                    found.setdefault(key_of(puck), puck)
+                self.log.append((frame, name, len(found), 1000*(time.perf_counter() - t0)))
+                if self.enough(found, expected) and ((not tracker) or tracker.complete(found, expected)
+                                                     or (not tracker.known)):
+                    break
+            if tracker:
+                tracker.full_frames += 1
+        if tracker:
+            tracker.update(found.values())
+        return list(found.values())
+
+    def run(self, A, grab=None, expected=None):
+        """Pucks in image A, and if not enough found, in up to max_frames-1 new frames from grab(timeout)."""
+        expected = self.expected if (expected is None) else expected
+        self.log = []
+        pucks = []
+        self.image = A
+        for frame in range(self.max_frames):
+            if frame > 0:
+                A = grab(self.timeout) if grab else None
+                if A is None:
+                    break
+            found = self.detect(A, expected, frame)
+            if len(found) > len(pucks):
+                (pucks, self.image) = (found, A)
+            if self.enough(pucks, expected):
+                break
+        return sorted(pucks, key=lambda p: (p['id'] is None, p['id'] or 0, p['text']))
+
+    def info(self):
+        frames = (self.log[-1][0] + 1) if self.log else 0
+        txt = f"PuckDetector: {len(self.log)} attempts on {frames} frames"
+        for (frame, name, n, ms) in self.log:
+            txt += f"\n  frame {frame}, {name:18s}: {n} pucks, {ms:.1f} ms"
+        return txt
+
+def draw_pucks(A, pucks):
+    """Returns a copy of A (gray or BGR) with the puck polygons, centers and IDs drawn."""
+    B = cv2.cvtColor(A, cv2.COLOR_GRAY2BGR) if (A.ndim == 2) else np.ascontiguousarray(A[:, :, :3]).copy()
+    for p in pucks:
+        cv2.polylines(B, [p['polygon']], isClosed=True, color=(0, 255, 0), thickness=2)
+        cv2.circle(B, p['center'], radius=5, color=(255, 0, 255), thickness=-1)
+        cv2.putText(B, f"{p['id']} {p['angle']:.0f}", (p['center'][0] + 8, p['center'][1] - 8),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
+    return B
+
+if __name__ == '__main__':
+    import sys
+    expected = int(sys.argv[2]) if (len(sys.argv) > 2) else None
+    detector = PuckDetector(expected=expected)
+    A = cv2.imread(sys.argv[1] if (len(sys.argv) > 1) else 'final_project/image/puck_image_0_0_f.png')
+    pucks = detector.run(A)
+    print(detector.info())
+    for p in pucks:
+        print(f"  puck {p['id']}: center {p['center']}, angle {p['angle']:.1f}")
+    # repeated detection in the same scene, with and without tracking
+    tracked = PuckDetector(expected=expected, tracker=PuckTracker())
+    for (name, d) in (('full frame', detector), ('tracker', tracked)):
+        t0 = time.perf_counter()
+        n = [len(d.run(A)) for i in range(10)]
+        print(f"{name:10s}: {100*(time.perf_counter() - t0):.1f} ms/frame, pucks found {n}")
+    print(tracked.info())
+    print(tracked.tracker.info())
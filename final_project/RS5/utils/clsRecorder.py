@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# clsRecorder.py
+#
+#  The class Recorder, record frames from a camera without letting disk
+#  writing and encoding slow down the capture. One thread captures frames
+#  and puts them into bounded queues, other threads write them:
+#    'video'  one writer thread (cv2.VideoWriter needs the frames in order)
+#    'png'    a pool of threads, each frame as a PNG file
+#    'raw'    the same pool, all frames into one raw frame file (clsFrameStore.py),
+#             no encoding, the file is preallocated and written through memory map
+#  If a queue is full the frame is dropped (for that output) and counted, so
+#  the capture keeps the camera frame rate. A report gives requested and
+#  achieved frame rate, and the number of frames written and dropped.
+#
+# October 2026
+
+# Example on how to use file in AppImageViewer2T.py:
+#   from utils.clsRecorder import Recorder
+#   rec = Recorder(save_folder, fps=self.fps, output=('video', 'png'))
+#   rec.start(grab, duration=2.0)   # grab(timeout) returns an image (numpy array) or None
+#   report = rec.wait()             # dict, and rec.info() is a short text
+
+import os
+import time
+import queue
+from threading import Thread, Lock
+import numpy as np
+import cv2
+from utils.clsFrameStore import FrameStore
+
+class Recorder:
+    """Capture frames in one thread and write them to disk in other threads."""
+    OUTPUTS = ('video', 'png', 'raw')
+
+    def __init__(self, folder, fps=20.0, output='video', queue_size=64, workers=2,
+                 codec='XVID', video_name='output.avi', png_compression=3, raw_name='frames.frames'):
+        if isinstance(output, str):
+            output = (output,)
+        for out in output:
+            if out not in Recorder.OUTPUTS:
+                raise ValueError(f"Recorder: output should be in {Recorder.OUTPUTS}, not '{out}'")
+        self.folder = folder
+        self.fps = float(fps)              # requested frame rate, also used in the video file
+        self.output = tuple(output)
+        self.queue_size = queue_size
+        self.workers = max(1, workers)     # number of threads for 'png' and 'raw'
+        self.codec = codec
+        self.video_path = os.path.join(folder, video_name)
+        self.png_compression = png_compression
+        self.raw_path = os.path.join(folder, raw_name)
+        self.store = None          # FrameStore for 'raw', made when the first frame is written
+        self.raw_capacity = 0
+        self.raw_slots = 0         # slots given out in the FrameStore, the capture index is the sequence
+        self.lock = Lock()
+        self.queues = {}    # one bounded queue for 'video', one shared by the pool for 'png'/'raw'
+        self.threads = []
+        self.capture_thread = None
+        self.running = False
+        self.captured = 0
+        self.timeouts = 0
+        self.dropped = {out: 0 for out in self.output}
+        self.written = {out: 0 for out in self.output}
+        self.timestamps = []
+        self.t_start = None
+        self.t_capture = None   # time when capture ended
+        self.t_end = None       # time when all frames were written
+
+    def start(self, grab, duration=None, max_frames=None):
+        """Start capture, grab(timeout_ms) should return a new frame (numpy array) or None."""
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        self.running = True
+        if max_frames is not None:
+            self.raw_capacity = max_frames
+        elif duration is not None:   # room for twice the requested frame rate, unused part is cut on close
+            self.raw_capacity = int(2*duration*max(self.fps, 1.0)) + self.queue_size
+        else:
+            self.raw_capacity = 10000
+        if 'video' in self.output:
+            self.queues['video'] = queue.Queue(self.queue_size)
+            self.threads.append(Thread(target=self.video_writer, daemon=True))
+        files = [out for out in self.output if out != 'video']
+        if files:
+            self.queues['files'] = queue.Queue(self.queue_size)
+            for i in range(self.workers):
+                self.threads.append(Thread(target=self.file_writer, daemon=True))
+        for t in self.threads:
+            t.start()
+        self.t_start = time.perf_counter()
+        self.capture_thread = Thread(target=self.capture, args=(grab, duration, max_frames), daemon=True)
+        self.capture_thread.start()
+
+    def capture(self, grab, duration, max_frames):
+        """The capture loop, runs until stop(), duration (s) or max_frames."""
+        while self.running:
+            if (duration is not None) and (time.perf_counter() - self.t_start >= duration):
+                break
+            if (max_frames is not None) and (self.captured >= max_frames):
+                break
+            A = grab(1000)
+            if A is None:
+                self.timeouts += 1
+                continue
+            t = time.perf_counter()
+            self.timestamps.append(t)
+            n = self.captured
+            self.captured += 1
+            if 'video' in self.queues:
+                self.put('video', (n, t, A), ('video',))
+            if 'files' in self.queues:
+                self.put('files', (n, t, A), [out for out in self.output if out != 'video'])
+        self.t_capture = time.perf_counter()
+        for (name, q) in self.queues.items():   # one end mark for each writer thread
+            for i in range(1 if (name == 'video') else self.workers):
+                q.put(None)
+
+    def put(self, name, item, outputs):
+        try:
+            self.queues[name].put_nowait(item)
+        except queue.Full:
+            with self.lock:
+                for out in outputs:
+                    self.dropped[out] += 1
+
+    def video_writer(self):
+        writer = None
+        q = self.queues['video']
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            (n, t, A) = item
+            if writer is None:   # size and color from the first frame
+                (h, w) = A.shape[:2]
+                writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*self.codec),
+                                         self.fps, (w, h), (A.ndim == 3))
+            if (A.ndim == 3) and (A.shape[2] == 4):
+                A = cv2.cvtColor(A, cv2.COLOR_BGRA2BGR)
+            writer.write(A)
+            with self.lock:
+                self.written['video'] += 1
+        if writer is not None:
+            writer.release()
+
+    def file_writer(self):
+        q = self.queues['files']
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            (n, t, A) = item
+            if 'png' in self.output:
+                cv2.imwrite(os.path.join(self.folder, f"frame_{n:04d}.png"), A,
+                            [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression])
+                with self.lock:
+                    self.written['png'] += 1
+            if 'raw' in self.output:
+                self.write_raw(n, t, A)
+
+    def write_raw(self, n, t, A):
+        with self.lock:
+            if self.store is None:   # shape from the first frame
+                self.store = FrameStore.create(self.raw_path, A.shape, self.raw_capacity, A.dtype)
+            slot = self.raw_slots   # next free slot, so dropped frames leave no empty slots
+            if (slot >= self.store.capacity) or (A.shape != self.store.shape):
+                self.dropped['raw'] += 1
+                return
+            self.raw_slots += 1
+        self.store.write(slot, A, timestamp=t, sequence=n)   # the threads write different slots
+        with self.lock:
+            self.written['raw'] += 1
+
+    def stop(self):
+        """Stop capture, the frames in the queues are still written, see wait()."""
+        self.running = False
+
+    def wait(self):
+        """Wait until capture has ended and all frames are written, returns report()."""
+        if self.capture_thread is not None:
+            self.capture_thread.join()
+        for t in self.threads:
+            t.join()
+        if self.store is not None:
+            self.store.close()
+        self.t_end = time.perf_counter()
+        self.threads = []
+        return self.report()
+
+    def report(self):
+        """Returns dict with requested and achieved frame rate, frames written and dropped."""
+        t_capture = (self.t_capture or time.perf_counter()) - (self.t_start or 0)
+        T = np.diff(self.timestamps) if (len(self.timestamps) > 1) else np.array([0.0])
+        return { 'requested_fps': self.fps,
+                 'achieved_fps': ((len(self.timestamps) - 1)/(self.timestamps[-1] - self.timestamps[0])
+                                  if (len(self.timestamps) > 1) else 0.0),
+                 'captured': self.captured,
+                 'capture_time': t_capture,
+                 'write_time': ((self.t_end - self.t_start) if self.t_end else None),
+                 'max_frame_interval': float(T.max()),
+                 'timeouts': self.timeouts,
+                 'written': dict(self.written),
+                 'dropped': dict(self.dropped) }
+
+    def info(self):
+        r = self.report()
+        txt = (f"Recorder: {r['captured']} frames in {r['capture_time']:.2f} s, " +
+               f"{r['achieved_fps']:.1f} fps (requested {r['requested_fps']:.1f} fps), " +
+               f"longest frame interval {1000*r['max_frame_interval']:.0f} ms")
+        for out in self.output:
+            txt += f"\n  {out}: {r['written'][out]} written, {r['dropped'][out]} dropped"
+        if r['write_time'] is not None:
+            txt += f"\n  all frames written after {r['write_time']:.2f} s"
+        return txt
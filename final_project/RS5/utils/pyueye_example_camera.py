@@ -32,12 +32,17 @@
 
 from pyueye import ueye
 from utils.pyueye_example_utils import (uEyeException, Rect, get_bits_per_pixel,
-								  ImageBuffer, check)
+								  ImageBuffer, ImageData, check)
 
 class Camera:
 	def __init__(self, device_id=0):
 		self.h_cam = ueye.HIDS(device_id)
 		self.img_buffers = []
+		self.continuous = False   # True while live video fills the sequence buffers
+		self.frame_count = 0      # frames fetched in continuous mode
+		self.dropped_count = 0    # frames skipped by latest_frame()
+		self.trigger_mode = ueye.IS_SET_TRIGGER_OFF   # free run
+		self.burst_size = 1       # frames exposed for each trigger
 
 	def __enter__(self):
 		self.init()
@@ -53,8 +58,12 @@ class Camera:
 		rect = self.get_aoi()
 		bpp = get_bits_per_pixel(self.get_colormode())
 
+		if self.img_buffers:
+			ueye.is_ExitImageQueue(self.h_cam)
+			ueye.is_ClearSequence(self.h_cam)
 		for buff in self.img_buffers:
 			check(ueye.is_FreeImageMem(self.h_cam, buff.mem_ptr, buff.mem_id))
+		self.img_buffers = []
 
 		for i in range(buffer_count):
 			buff = ImageBuffer()
@@ -80,6 +89,7 @@ class Camera:
 	def exit(self):
 		ret = None
 		if self.h_cam is not None:
+			self.stop_continuous()
 			ret = ueye.is_ExitCamera(self.h_cam)
 		if ret == ueye.IS_SUCCESS:
 			self.h_cam = None
@@ -117,6 +127,120 @@ class Camera:
 		wait_param = ueye.IS_WAIT if wait else ueye.IS_DONT_WAIT
 		return ueye.is_FreezeVideo(self.h_cam, wait_param)
 
+	def start_continuous(self, buffer_count=None):
+		"""
+		start live video into the sequence buffers allocated by alloc(), the camera
+		then fills the buffers as a ring at the sensor frame rate, and a frame is
+		fetched by next_frame() or latest_frame() without a trigger for each frame
+		"""
+		if (buffer_count is not None) or (not self.img_buffers):
+			self.alloc(buffer_count or 3)
+		self.frame_count = 0
+		self.dropped_count = 0
+		check(self.capture_video(wait=False))
+		self.continuous = True
+
+	def stop_continuous(self):
+		if self.continuous:
+			self.stop_video()
+			self.continuous = False
+
+	def wait_buffer(self, timeout=1000):
+		"""
+		returns ImageBuffer of the oldest frame in the image queue, the buffer is locked,
+		returns None if no frame is ready within timeout (ms)
+		"""
+		img_buffer = ImageBuffer()
+		ret = ueye.is_WaitForNextImage(self.h_cam, timeout, img_buffer.mem_ptr, img_buffer.mem_id)
+		if ret != ueye.IS_SUCCESS:
+			return None
+		self.frame_count += 1
+		return img_buffer
+
+	def unlock_buffer(self, img_buffer):
+		check(ueye.is_UnlockSeqBuf(self.h_cam, img_buffer.mem_id, img_buffer.mem_ptr))
+
+	def next_frame(self, timeout=1000, copy=False):
+		"""
+		returns ImageData of the next frame in continuous mode, or None at timeout,
+		the array is a view of the (locked) camera buffer, not a copy (unless copy=True),
+		the caller must unlock() it, ex:  with cam.next_frame() as frame: ...
+		"""
+		img_buffer = self.wait_buffer(timeout)
+		if img_buffer is None:
+			return None
+		return ImageData(self.h_cam, img_buffer, copy=copy)
+
+	def latest_frame(self, timeout=1000, copy=False):
+		"""
+		as next_frame(), but older frames waiting in the queue are unlocked (dropped)
+		so the newest frame is returned, i.e. latency is at most one frame period
+		"""
+		img_buffer = self.wait_buffer(timeout)
+		if img_buffer is None:
+			return None
+		while True:
+			newer = self.wait_buffer(0)
+			if newer is None:
+				break
+			self.unlock_buffer(img_buffer)
+			self.dropped_count += 1
+			img_buffer = newer
+		return ImageData(self.h_cam, img_buffer, copy=copy)
+
+	def set_trigger_mode(self, mode):
+		"""
+		mode is ueye.IS_SET_TRIGGER_OFF (free run), IS_SET_TRIGGER_HI_LO (falling edge),
+		IS_SET_TRIGGER_LO_HI (rising edge) or IS_SET_TRIGGER_SOFTWARE (force_trigger())
+		"""
+		check(ueye.is_SetExternalTrigger(self.h_cam, mode))
+		self.trigger_mode = mode
+
+	def set_burst_size(self, n):
+		"""
+		frames exposed for each trigger, returns the burst size set by the camera,
+		1 if the camera does not support trigger bursts
+		"""
+		size = ueye.uint(n)
+		if ueye.is_Trigger(self.h_cam, ueye.IS_TRIGGER_CMD_SET_BURST_SIZE, size, ueye.sizeof(size)) != ueye.IS_SUCCESS:
+			n = 1
+		self.burst_size = n
+		return n
+
+	def start_triggered(self, mode=None, burst=1, buffer_count=None):
+		"""
+		live video in trigger mode, i.e. each trigger exposes a burst of frames into
+		the sequence buffers, the frames are fetched by wait_trigger(), there are at
+		least as many buffers as frames in a burst since wait_trigger() locks them all
+		"""
+		self.stop_continuous()
+		self.set_trigger_mode(ueye.IS_SET_TRIGGER_HI_LO if (mode is None) else mode)
+		count = max(self.set_burst_size(burst), buffer_count or len(self.img_buffers) or 3)
+		self.start_continuous(count if (count != len(self.img_buffers)) else None)
+
+	def stop_triggered(self):
+		self.stop_continuous()
+		self.set_trigger_mode(ueye.IS_SET_TRIGGER_OFF)
+
+	def force_trigger(self):
+		"""software trigger, in IS_SET_TRIGGER_SOFTWARE mode"""
+		return ueye.is_ForceTrigger(self.h_cam)
+
+	def wait_trigger(self, timeout=1000, frames=None, copy=False):
+		"""
+		waits, blocked in the driver (is_WaitForNextImage), until a trigger has exposed
+		a burst of frames, returns a list of ImageData (locked, each must be unlocked),
+		the list is empty if no trigger within timeout (ms), frames is by default the
+		burst size, the rest of the burst is waited for at most timeout too
+		"""
+		out = []
+		for i in range(frames or self.burst_size):
+			frame = self.next_frame(timeout, copy)
+			if frame is None:
+				break
+			out.append(frame)
+		return out
+
 	def set_colormode(self, colormode):
 		check(ueye.is_SetColorMode(self.h_cam, colormode))
 		
@@ -30,8 +30,15 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #------------------------------------------------------------------------------
 
-from pyueye import ueye
-from threading import Thread
+try:
+	from pyueye import ueye
+except ImportError:
+	ueye = None   # FrameThread may still be used, with the camera in pyueye_example_simcamera.py
+from threading import Thread, Condition, Lock, current_thread
+from collections import deque
+from bisect import bisect_right
+import time
+from copy import copy as shallow_copy
 from ctypes import byref
 
 def get_bits_per_pixel(color_mode):
@@ -100,10 +107,33 @@ class MemoryInfo:
 									  self.img_buff.mem_id, self.x, self.y, self.bits, self.pitch))
 
 
+_users_lock = Lock()   # for ImageData.users, references may be unlocked by different threads
+
+def _value(v):
+	return getattr(v, 'value', v)   # pyueye types have the value in .value
+
 class ImageData:
-	def __init__(self, h_cam, img_buff):
+	""" Image data of a (locked) camera buffer, with copy=False the array is
+	a view of the buffer memory, and it is only valid until unlock() is called.
+	Timing: device_time is the camera timestamp (s, camera clock) and frame_number
+	the camera frame counter, both from is_GetImageInfo() (None if not available),
+	timestamp is host receive time (time.perf_counter()), and times has the host
+	time for each stage, times['received'] and those set by mark(stage).
+	"""
+	def __init__(self, h_cam, img_buff, copy=True):
+		self.timestamp = time.perf_counter()
+		self.times = {'received': self.timestamp}
 		self.h_cam = h_cam
 		self.img_buff = img_buff
+		self.locked = True   # buffer from is_WaitForNextImage is locked until unlocked
+		self.users = [1]     # locked references to the buffer, shared by share()
+		self.sequence = 0    # frame number, set by FrameThread
+		self.device_time = None
+		self.frame_number = None
+		info = ueye.UEYEIMAGEINFO()
+		if ueye.is_GetImageInfo(h_cam, img_buff.mem_id, info, ueye.sizeof(info)) == ueye.IS_SUCCESS:
+			self.device_time = int(_value(info.u64TimestampDevice))*1e-7   # unit is 0.1 us
+			self.frame_number = int(_value(info.u64FrameNumber))
 		self.mem_info = MemoryInfo(h_cam, img_buff)
 		self.color_mode = ueye.is_SetColorMode(h_cam, ueye.IS_GET_COLOR_MODE)
 		self.bits_per_pixel = get_bits_per_pixel(self.color_mode)
@@ -112,11 +142,15 @@ class ImageData:
 								   self.mem_info.height,
 								   self.mem_info.bits,
 								   self.mem_info.pitch,
-								   True)
+								   copy)
 	def __str__(self):
 		m = self.mem_info
 		return 'ImageData object: w = %i, h = %i, bits = %i, pitch = %i' % (m.width, m.height, m.bits, m.pitch)
 		
+	def mark(self, stage):
+		"""store host time for a stage, ex. 'processed' or 'displayed', also after unlock()"""
+		self.times[stage] = time.perf_counter()
+
 	def as_1d_image(self):  # or as_cv_image() ??
 		channels = int((7 + self.bits_per_pixel) / 8)
 		import numpy
@@ -125,8 +159,119 @@ class ImageData:
 		else:
 			return numpy.reshape(self.array, (self.mem_info.height, self.mem_info.width))
 		
+	def lock(self):
+		if not self.locked:
+			with _users_lock:
+				if self.users[0] <= 0:
+					check(ueye.is_LockSeqBuf(self.h_cam, ueye.IS_IGNORE_PARAMETER, self.img_buff.mem_ptr))
+				self.users[0] += 1
+			self.locked = True
+
 	def unlock(self):
-		check(ueye.is_UnlockSeqBuf(self.h_cam, self.img_buff.mem_id, self.img_buff.mem_ptr))
+		"""
+		unlock this reference, the camera buffer is unlocked when no references are locked
+		"""
+		if self.locked:
+			self.locked = False
+			with _users_lock:
+				self.users[0] -= 1
+				last = (self.users[0] <= 0)
+			if last:
+				check(ueye.is_UnlockSeqBuf(self.h_cam, self.img_buff.mem_id, self.img_buff.mem_ptr))
+
+	def share(self, n):
+		"""
+		returns a list of n references to this image data (same buffer and array), each of
+		them must be unlocked, this object should not be used after the call
+		"""
+		if n <= 0:
+			self.unlock()
+			return []
+		refs = [shallow_copy(self) for i in range(n)]
+		for ref in refs:
+			ref.times = dict(self.times)   # each reference marks its own stages
+		if self.locked:
+			with _users_lock:
+				self.users[0] += n - 1
+			self.locked = False   # the references hold the lock now
+		return refs
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, _type, value, traceback):
+		self.unlock()
+
+class LatencyHistogram:
+	""" Latency of frames in stages (ms), from the timing in ImageData:
+		'interval'    time between frames, device_time of consecutive frames (camera clock)
+		'exposure'    device_time to host receive time, the camera clock has an unknown
+		              offset to the host clock, so this is relative to the smallest seen
+		'processing'  host receive time to times['processed']
+		'display'     times['processed'] to times['displayed']
+	Each stage counts values in fixed logarithmic bins, and the last 'keep' values
+	are kept for percentiles. example of use:
+		latency = LatencyHistogram()
+		latency.add(image_data)   # after image_data.mark('processed') and mark('displayed')
+		print( latency.summary() )
+	"""
+	STAGES = ('interval', 'exposure', 'processing', 'display')
+	EDGES = tuple(0.1*2**(k/2) for k in range(33))   # 0.1 ms to 6.5 s, factor sqrt(2)
+
+	def __init__(self, keep=1000):
+		self.keep = keep
+		self.reset()
+
+	def reset(self):
+		self.counts = {s: [0]*(len(LatencyHistogram.EDGES) + 1) for s in LatencyHistogram.STAGES}
+		self.values = {s: deque(maxlen=self.keep) for s in LatencyHistogram.STAGES}
+		self.offset = None        # smallest (receive - device_time) seen
+		self.last_device = None   # device_time of last frame added
+		self.frames = 0
+
+	def add_value(self, stage, ms):
+		self.counts[stage][bisect_right(LatencyHistogram.EDGES, ms)] += 1
+		self.values[stage].append(ms)
+
+	def add(self, image_data):
+		t = image_data.times
+		received = t['received']
+		dev = image_data.device_time
+		if dev is not None:
+			if (self.last_device is not None) and (dev > self.last_device):
+				self.add_value('interval', 1000*(dev - self.last_device))
+			self.last_device = dev
+			d = received - dev
+			self.offset = d if (self.offset is None) else min(self.offset, d)
+			self.add_value('exposure', 1000*(d - self.offset))
+		if 'processed' in t:
+			self.add_value('processing', 1000*(t['processed'] - received))
+			if 'displayed' in t:
+				self.add_value('display', 1000*(t['displayed'] - t['processed']))
+		self.frames += 1
+
+	def percentile(self, stage, p):
+		v = sorted(self.values[stage])
+		return v[min(len(v) - 1, int(p/100*len(v)))] if v else None
+
+	def summary(self, width=40):
+		"""returns text with count, mean and percentiles, and a histogram, for each stage"""
+		edges = LatencyHistogram.EDGES
+		txt = f"Latency for {self.frames} frames (ms):"
+		for s in LatencyHistogram.STAGES:
+			v = self.values[s]
+			if not v:
+				continue
+			txt += (f"\n  {s:10s} n={len(v)}, mean {sum(v)/len(v):.2f}, median {self.percentile(s, 50):.2f}," +
+			        f" 95% {self.percentile(s, 95):.2f}, max {max(v):.2f}")
+			c = self.counts[s]
+			top = max(c)
+			for k in range(len(c)):
+				if c[k]:
+					lo = f"{edges[k-1]:8.2f}" if (k > 0) else "       0"
+					hi = f"{edges[k]:8.2f}" if (k < len(edges)) else "     inf"
+					txt += f"\n    {lo} -{hi} {c[k]:6d} " + '#'*max(1, round(width*c[k]/top))
+		return txt
 
 class Rect:
 	def __init__(self, x=0, y=0, width=0, height=0):
@@ -140,39 +285,145 @@ class Rect:
 class FrameThread(Thread):
 	""" An object of the FrameThread class captures images from the IDS ueye camera,
 	i.e. image buffer of video frames. The thread should be initialized by a
-	camera and a list of views, or more precise, an object or a list of objects,
+	camera (also the simulated one) and a list of views, or more precise, an object or a list of objects,
 	where each object should have a  handle(image_data)  function. This function 
 	is called, for each of the objects in the list, using the image_data argument
 	each time a new image is captured (from camera video input)
+
+	Each view has its own thread and a queue of at most 'queue_size' frames, so a
+	slow view does not stall the capture loop nor the other views. When a queue is
+	full 'policy' decides what happens:
+	  DROP_OLDEST  the oldest waiting frame is dropped (and unlocked)
+	  LATEST_ONLY  only the newest frame is kept, i.e. queue_size is 1
+	  BLOCK        the capture loop waits for the view (no frames dropped in the queue,
+	               but then the camera may drop frames)
+	Each frame gets a sequence number, image_data.sequence, and dropped frames are
+	counted for each view, see stats(). With copy=True the image is copied from the
+	camera buffer and the buffer is unlocked at once, with copy=False the array is a
+	view of the buffer, which is unlocked when all views have called unlock().
 	"""
-	def __init__(self, cam, views=None, copy=True):
+	DROP_OLDEST = 'drop_oldest'
+	LATEST_ONLY = 'latest_only'
+	BLOCK = 'block'
+
+	def __init__(self, cam, views=None, copy=True, queue_size=2, policy='drop_oldest'):
 		# super(FrameThread, self).__init__()  # or
 		super().__init__()
 		self.timeout = 1000
 		self.cam = cam
 		self.running = True
+		if (views is not None) and (type(views) is not list):
+			views = [views]
 		self.views = views
 		self.copy = copy
+		self.sequence = 0   # number of frames captured
+		if policy == FrameThread.LATEST_ONLY:
+			queue_size = 1
+		self.workers = [ViewWorker(view, queue_size, policy) for view in (views or [])]
 
 	def run(self):
+		for worker in self.workers:
+			worker.start()
 		while self.running:
-			img_buffer = ImageBuffer()
-			ret = ueye.is_WaitForNextImage(self.cam.handle(),
-										   self.timeout,
-										   img_buffer.mem_ptr,
-										   img_buffer.mem_id)
-			if ret == ueye.IS_SUCCESS:
-				self.notify( ImageData(self.cam.handle(), img_buffer) )
+			image_data = self.cam.next_frame(self.timeout, copy=self.copy)
+			if image_data is not None:
+				self.sequence += 1
+				image_data.sequence = self.sequence
+				if self.copy:
+					image_data.unlock()   # the array is a copy, the camera may use the buffer again
+				self.notify(image_data)
 
 			#break
+		for worker in self.workers:
+			worker.stop()
 
 	def notify(self, image_data):
-		if self.views:
-			if type(self.views) is not list:
-				self.views = [self.views]
-			for view in self.views:
-				view.handle(image_data)
+		"""Put the frame into the queue of each view, the views share the (locked) buffer."""
+		if not self.workers:
+			image_data.unlock()
+			return
+		for (worker, data) in zip(self.workers, image_data.share(len(self.workers))):
+			worker.put(data)
+
+	def stats(self):
+		"""Returns a list with a short text for each view, frames handled and dropped."""
+		return [worker.stats(self.sequence) for worker in self.workers]
 
 	def stop(self):
 		self.cam.stop_video()
-		self.running = False
\ No newline at end of file
+		self.running = False
+		for worker in self.workers:
+			worker.stop()
+
+
+class ViewWorker(Thread):
+	""" Thread that calls view.handle(image_data) for the frames in a bounded queue,
+	used by FrameThread, see there for 'policy'. The frame is unlocked after handle(),
+	unlock() may also be called by the view itself.
+	"""
+	def __init__(self, view, queue_size=2, policy='drop_oldest'):
+		super().__init__(daemon=True)
+		self.view = view
+		self.queue = deque()
+		self.queue_size = max(1, queue_size)
+		self.policy = policy
+		self.cond = Condition()
+		self.running = True
+		self.received = 0   # frames put into the queue
+		self.handled = 0    # frames given to view.handle()
+		self.dropped = 0    # frames dropped from the queue
+
+	def put(self, image_data):
+		dropped = []
+		with self.cond:
+			if self.policy == FrameThread.BLOCK:
+				while self.running and (len(self.queue) >= self.queue_size):
+					self.cond.wait()
+			while len(self.queue) >= self.queue_size:
+				dropped.append(self.queue.popleft())
+			self.received += 1
+			self.dropped += len(dropped)
+			if self.running:
+				self.queue.append(image_data)
+			else:
+				dropped.append(image_data)
+			self.cond.notify_all()
+		for data in dropped:
+			data.unlock()
+
+	def run(self):
+		while True:
+			with self.cond:
+				while self.running and (not self.queue):
+					self.cond.wait()
+				if not self.running:
+					break
+				image_data = self.queue.popleft()
+				self.cond.notify_all()   # a blocked put() may continue
+			try:
+				self.view.handle(image_data)
+			finally:
+				image_data.unlock()
+			self.handled += 1
+		self.clear()
+
+	def clear(self):
+		with self.cond:
+			dropped = list(self.queue)
+			self.queue.clear()
+		for data in dropped:
+			data.unlock()
+
+	def stats(self, sequence=None):
+		txt = f"{type(self.view).__name__}: {self.handled} handled, {self.dropped} dropped"
+		if sequence is not None:
+			txt += f" of {sequence} frames"
+		return txt
+
+	def stop(self):
+		with self.cond:
+			self.running = False
+			self.cond.notify_all()
+		if self.is_alive() and (self is not current_thread()):
+			self.join(timeout=2.0)
+		self.clear()
\ No newline at end of file
@@ -87,3 +87,13 @@ T_500_bis = np.array([
     [-0.4057, -0.0066,  275.3436],
     [ 0.0,    -0.0,      1.0]
 ])
+
+
+# ------------------------ Camera profiles ------------------------
+# Used by CamSettings (clsCamSettings.py), only values given are set. The same
+# settings are used at both robot heights (500 mm and 250 mm), add a profile for
+# a height when other values are found better in the lab (Camera menu, 'Profile').
+
+CAM_PROFILES = {
+    'puck': {'aoi': (0, 0, 1280, 960), 'fps': 20.0, 'exposure': 1.5},
+}
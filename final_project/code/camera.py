@@ -2,6 +2,8 @@ import cv2
 from pyzbar.pyzbar import decode
 import numpy as np
 import math
+from qr_pyramid import decode3_QR_code
+from clsDenoiser import Denoiser
 
 def take_picture():
     # Ouvrir la caméra (0 = webcam par défaut ou ton IDS camera si elle est détectée ici)
@@ -36,19 +38,21 @@ def take_picture():
     cap.release()
 
   
-def reduce_image_noise(image_path):
+def reduce_image_noise(image_path, method="bilateral"):
     """
-    Réduit le bruit de l'image en utilisant un filtre gaussien.
+    Réduit le bruit de l'image.
     :param image_path: Chemin de l'image à traiter.
+    :param method: 'bilateral', 'bilateral_small', 'guided', 'median' ou 'none', voir clsDenoiser.py.
     :return: Image traitée.
     """
     # Lire l'image
     image = cv2.imread(image_path)
 
-    # Appliquer un filtre gaussien pour réduire le bruit
+    # Appliquer le filtre choisi pour réduire le bruit
     #denoised_image = cv2.medianBlur(image, 30)
     #denoised_image = cv2.GaussianBlur(image, (5, 5), 0)
-    denoised_image = cv2.bilateralFilter(image,9,75,75)
+    #denoised_image = cv2.bilateralFilter(image,9,75,75)
+    denoised_image = Denoiser(method)(image)
 
 
     # Enregistrer l'image traitée
@@ -209,11 +213,13 @@ if __name__ == "__main__":
         flip_image(input_path, flipped_path)
 
         # Traitement
-        reduce_image_noise(flipped_path)
+        #reduce_image_noise(flipped_path)
         #increase_contrast("final_project/image/denoised_image.png")
 
         # Decode et récupère les données dans le format voulu
-        data = decode2_QR_code("final_project/image/denoised_image.png", [x, y, 500])
+        #data = decode2_QR_code("final_project/image/denoised_image.png", [x, y, 500])
+        # Finder patterns on a half resolution image, then decode only crops around them
+        data = decode3_QR_code(flipped_path, [x, y, 500])
         images_data.append(data)
 
     # Afficher la structure finale
@@ -3,6 +3,12 @@ from pyzbar.pyzbar import decode
 import numpy as np
 import math
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BLUR_METHODS = ["median", "gaussian", "bilateral"]
+CONTRAST_FACTORS = [1.2, 1.5, 2.0]
 
 def take_picture():
     cap = cv2.VideoCapture(0)
@@ -57,7 +63,9 @@ def binarize_image(image):
     return cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
 
 def decode2_QR_code(image_path, camera_pos):
-    image = cv2.imread(image_path)
+    return decode_QR_array(cv2.imread(image_path), camera_pos)
+
+def decode_QR_array(image, camera_pos):
     decoded_objects = decode(image)
     detections = {}
     if decoded_objects:
@@ -72,7 +80,68 @@ def decode2_QR_code(image_path, camera_pos):
                     detections[puck_id] = (cx, cy)
     return {"camera_pos": camera_pos, "detections": detections}
 
-def process_best_combination(input_path, camera_pos, temp_dir):
+def search_blur(base_img, blur, camera_pos, expected=None):
+    # All combinations for one blur method, each intermediate image is made once:
+    # blur -> contrast (3 factors) -> CLAHE or not -> binarize or not.
+    # Returns (detections, combination index, data) for the best combination
+    # (the first one in the loop order if several are equally good).
+    start = BLUR_METHODS.index(blur) * len(CONTRAST_FACTORS) * 4
+    pos = [camera_pos[0], camera_pos[1], 500]
+    best = (-1, start, None)
+    blurred = apply_denoise(base_img, blur)
+    idx = start
+    for factor in CONTRAST_FACTORS:
+        contrasted = apply_contrast(blurred, factor)
+        for img in (contrasted, apply_CLAHE(contrasted)):
+            for binarize in (False, True):
+                data = decode_QR_array(binarize_image(img) if binarize else img, pos)
+                if len(data["detections"]) > best[0]:
+                    best = (len(data["detections"]), idx, data)
+                if (expected is not None) and (best[0] >= expected):
+                    return best
+                idx += 1
+    return best
+
+def best_of(results, camera_pos):
+    best = (-1, 0, None)
+    for r in results:
+        if (r[0] > best[0]) or ((r[0] == best[0]) and (r[1] < best[1])):
+            best = r
+    return best[2] if best[2] else {"camera_pos": [camera_pos[0], camera_pos[1], 500], "detections": {}}
+
+def process_best_combination(input_path, camera_pos, temp_dir=None, expected=None):
+    # In memory, no temporary files (temp_dir is not used), stops when 'expected'
+    # pucks are found. The result is as process_best_combination_png() when expected is None.
+    base_img = cv2.imread(input_path)
+    results = []
+    for blur in BLUR_METHODS:
+        results.append(search_blur(base_img, blur, camera_pos, expected))
+        if (expected is not None) and (results[-1][0] >= expected):
+            break
+    return best_of(results, camera_pos)
+
+def process_positions(camera_positions, image_path, expected=None, workers=None):
+    # All images in a process pool, one task for each (image, blur method).
+    # When an image has 'expected' pucks, its tasks not yet started are cancelled.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = []
+        for x, y in camera_positions:
+            base_img = cv2.imread(image_path.format(x=x, y=y))
+            tasks.append([pool.submit(search_blur, base_img, blur, [x, y], expected) for blur in BLUR_METHODS])
+        images_data = []
+        for (x, y), futures in zip(camera_positions, tasks):
+            results = []
+            for f in futures:
+                if f.cancelled():
+                    continue
+                results.append(f.result())
+                if (expected is not None) and (results[-1][0] >= expected):
+                    for g in futures:
+                        g.cancel()
+            images_data.append(best_of(results, [x, y]))
+    return images_data
+
+def process_best_combination_png(input_path, camera_pos, temp_dir):
     base_img = cv2.imread(input_path)
     blur_methods = ["median", "gaussian", "bilateral"]
     contrast_factors = [1.2, 1.5, 2.0]
@@ -104,6 +173,27 @@ def process_best_combination(input_path, camera_pos, temp_dir):
                     idx += 1
     return best_data if best_data else {"camera_pos": [camera_pos[0], camera_pos[1], 500], "detections": {}}
 
+def benchmark(camera_positions, image_path, temp_dir, expected=None):
+    # The serial search with temporary PNG files against the in-memory search
+    t0 = time.perf_counter()
+    old = [process_best_combination_png(image_path.format(x=x, y=y), [x, y], temp_dir)
+           for x, y in camera_positions]
+    t1 = time.perf_counter()
+    new = [process_best_combination(image_path.format(x=x, y=y), [x, y]) for x, y in camera_positions]
+    t2 = time.perf_counter()
+    par = process_positions(camera_positions, image_path)
+    t3 = time.perf_counter()
+    early = process_positions(camera_positions, image_path, expected) if expected else None
+    t4 = time.perf_counter()
+    n = len(camera_positions)
+    print(f"{n} images, {len(BLUR_METHODS) * len(CONTRAST_FACTORS) * 4} combinations each")
+    print(f"  PNG files, serial:     {t1 - t0:6.2f} s")
+    print(f"  in memory, serial:     {t2 - t1:6.2f} s, same result: {new == old}")
+    print(f"  in memory, pool:       {t3 - t2:6.2f} s, same result: {par == old}")
+    if early:
+        found = sum(len(d["detections"]) >= expected for d in early)
+        print(f"  pool, stop at {expected} pucks: {t4 - t3:6.2f} s, {found} of {n} images have {expected} pucks")
+
 if __name__ == "__main__":
     camera_positions = [
         [-100, -100], [-100, 0], [-100, 100],
@@ -111,19 +201,24 @@ if __name__ == "__main__":
         [100, -100], [100, 0], [100, 100]
     ]
 
+    # python final_project/code/camera2.py [expected pucks] [benchmark]
+    numbers = [int(a) for a in sys.argv[1:] if a.isdigit()]
+    expected = numbers[0] if numbers else None
+
     temp_dir = "final_project/image/temp"
     os.makedirs(temp_dir, exist_ok=True)
 
-    images_data = []
-
     for x, y in camera_positions:
         input_path = f"final_project/image/puck_image_{x}_{y}.png"
         flipped_path = f"final_project/image/puck_image_{x}_{y}_f.png"
 
         flip_image(input_path, flipped_path)
 
-        data = process_best_combination(flipped_path, [x, y], temp_dir)
-        images_data.append(data)
+    if "benchmark" in sys.argv[1:]:
+        benchmark(camera_positions, "final_project/image/puck_image_{x}_{y}_f.png", temp_dir, expected)
+        sys.exit(0)
+
+    images_data = process_positions(camera_positions, "final_project/image/puck_image_{x}_{y}_f.png", expected)
 
     print("\nimages_data = [")
     for item in images_data:
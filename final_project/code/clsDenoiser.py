@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# clsDenoiser.py
+#
+#  The class Denoiser, a selectable noise reduction stage before QR detection.
+#  The methods are:
+#    'bilateral'        cv2.bilateralFilter(image, 9, 75, 75) on the full color image (as before)
+#    'bilateral_small'  bilateral filter on the luminance downscaled by 'scale', the change
+#                       made by the filter is upsampled and added to the full resolution
+#                       luminance, so fine details (the QR modules) are not blurred
+#    'guided'           guided filter (box filters, the image is its own guide) on the luminance
+#    'median'           median filter on the luminance only
+#    'none'             no filtering
+#  All methods except 'bilateral' filter only the luminance (Y of YCrCb), as the
+#  QR decoding uses only one channel. With gray=True the (filtered) luminance is
+#  returned, else the color image with the filtered luminance.
+#  benchmark() gives time and number of decoded QR codes for each method on the
+#  stored puck images, to choose the cheapest method that decodes as well.
+#
+# October 2026
+
+# Example on how to use file in AppImageViewer1.py:
+#   from utils.clsDenoiser import Denoiser
+#   self.denoiser = Denoiser('bilateral_small')
+#   B = self.denoiser(self.npImage)      # same shape as npImage
+# Example on how to use file:
+#   python final_project/RS5/utils/clsDenoiser.py   # benchmark on final_project/image/puck_image_*_f.png
+
+import time
+import numpy as np
+import cv2
+
+class Denoiser:
+    """Noise reduction, the method is selected when the object is made."""
+    METHODS = ('bilateral', 'bilateral_small', 'guided', 'median', 'none')
+
+    def __init__(self, method='bilateral', gray=False, scale=0.25, d=9, sigma_color=None, sigma_space=75,
+                 radius=2, eps=100.0, ksize=3):
+        if method not in Denoiser.METHODS:
+            raise ValueError(f"Denoiser: method should be in {Denoiser.METHODS}, not '{method}'")
+        self.method = method
+        self.gray = gray                 # return only the luminance
+        self.scale = scale               # for 'bilateral_small'
+        self.d = d                       # bilateral filter diameter (full resolution pixels)
+        self.sigma_color = sigma_color if (sigma_color is not None) else (30 if (method == 'bilateral_small') else 75)
+        self.sigma_space = sigma_space
+        self.radius = radius             # for 'guided', box filter radius
+        self.eps = eps                   # for 'guided', regularization (gray levels squared)
+        self.ksize = ksize               # for 'median'
+
+    def __call__(self, image):
+        if self.method == 'bilateral':
+            B = cv2.bilateralFilter(image, self.d, self.sigma_color, self.sigma_space)
+            return self.to_gray(B) if self.gray else B
+        if image.ndim == 2:
+            return self.filter(image)
+        if self.gray:
+            return self.filter(self.to_gray(image))
+        ycc = cv2.cvtColor(np.ascontiguousarray(image[:, :, :3]), cv2.COLOR_BGR2YCrCb)
+        ycc[:, :, 0] = self.filter(ycc[:, :, 0])
+        return cv2.cvtColor(ycc, cv2.COLOR_YCrCb2BGR)
+
+    def to_gray(self, image):
+        if image.ndim == 2:
+            return image
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if (image.shape[2] == 4) else cv2.COLOR_BGR2GRAY)
+
+    def filter(self, Y):
+        """Filter the luminance Y (uint8)."""
+        if self.method == 'bilateral_small':
+            (h, w) = Y.shape
+            small = cv2.resize(Y, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+            d = max(3, int(round(self.d*self.scale)) | 1)
+            change = cv2.bilateralFilter(small, d, self.sigma_color, self.sigma_space*self.scale)
+            change = change.astype(np.int16) - small
+            change = cv2.resize(change, (w, h), interpolation=cv2.INTER_LINEAR)
+            return np.clip(Y + change, 0, 255).astype(np.uint8)
+        if self.method == 'guided':
+            return self.guided(Y)
+        if self.method == 'median':
+            return cv2.medianBlur(Y, self.ksize)
+        return Y
+
+    def guided(self, Y):
+        """Guided filter (He et al.) with Y as its own guide, O(1) per pixel using box filters."""
+        I = Y.astype(np.float32)
+        size = (2*self.radius + 1, 2*self.radius + 1)
+        mean_I = cv2.boxFilter(I, -1, size)
+        var_I = cv2.boxFilter(I*I, -1, size) - mean_I*mean_I
+        a = var_I/(var_I + self.eps)          # edges (large variance) are kept, flat areas smoothed
+        b = mean_I - a*mean_I
+        q = cv2.boxFilter(a, -1, size)*I + cv2.boxFilter(b, -1, size)
+        return np.clip(q + 0.5, 0, 255).astype(np.uint8)
+
+    def info(self):
+        return f"Denoiser: {self.method}" + (" (gray)" if self.gray else "")
+
+def benchmark(files, methods=None, repeat=3):
+    """Time (ms/image) and decoded QR codes for each method, on the images in files."""
+    from pyzbar.pyzbar import decode
+    images = [cv2.imread(f) for f in files]
+    images = [A for A in images if A is not None]
+    results = []
+    for method in (methods or Denoiser.METHODS):
+        den = Denoiser(method, gray=True)   # the luminance is what the decoding uses
+        t0 = time.perf_counter()
+        for i in range(repeat):
+            out = [den(A) for A in images]
+        ms = 1000*(time.perf_counter() - t0)/(repeat*max(len(images), 1))
+        codes = set()
+        for (k, B) in enumerate(out):
+            codes |= {(k, obj.data.decode('utf-8', errors='replace')) for obj in decode(B)}
+        results.append((method, ms, len(codes)))
+    print(f"Denoiser benchmark, {len(images)} images")
+    for (method, ms, n) in results:
+        print(f"  {method:16s} {ms:7.1f} ms/image, {n} QR codes decoded")
+    return results
+
+if __name__ == '__main__':
+    import sys
+    import glob
+    files = sys.argv[1:] or sorted(glob.glob('final_project/image/puck_image_*_f.png'))
+    benchmark(files)
@@ -22,7 +22,7 @@ try:
 	from PyQt5.QtCore import Qt, QPoint, QRect, QSize, QT_VERSION_STR, pyqtSignal  
 	from PyQt5.QtGui import QImage, QPixmap, QTransform
 	from PyQt5.QtWidgets import (QApplication, QMainWindow, QAction, QFileDialog, QLabel, 
-				QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QRubberBand)
+				QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QRubberBand, QInputDialog)
 except ImportError:
 	raise ImportError( f"{_appFileName}: Requires PyQt5." )
 
@@ -33,10 +33,59 @@ from clsResizeDialog import ResizeDialog
 from clsQrCodeDialog import QrCodeDialog
 
 # some simple methods for image processing
-from myImageTools import qimage2np, np2qimage
+from myImageTools import qimage2np, np2qimage, cropBlackFrame
+# [Try it] in the dialogs is computed in a worker thread
+from clsPreviewWorker import PreviewWorker
 
 
 myPath = "UIS/ELE610/final_project\image"                # path where you may have some images
+
+# Functions used by both the try-methods, which run them in the preview worker thread,
+# and the to-methods of MainWindow. They only read the input image A.
+def binaryImage(A, t=0):
+	"""Threshold image A by 't', or by Otsu method if t < 2."""
+	if (t < 2):
+		(used_thr,B) = cv2.threshold(A, thresh=1, maxval=255, type=cv2.THRESH_OTSU)
+	else:
+		(used_thr,B) = cv2.threshold(A, thresh=t, maxval=255, type=cv2.THRESH_BINARY)
+	#
+	print( f"binaryImage: The used threshold value is {used_thr}" )
+	return B
+
+def qrCodeImage(A, valDiameter=0, valSigmaColor=0, valSigmaSpace=0):
+	"""Bilateral filter image A, decode the 'Puck #' QR codes and draw them on the filtered image."""
+	B= cv2.bilateralFilter(A,valDiameter,valSigmaColor,valSigmaSpace)
+	decoded_objects = decode(B)
+	detections = {}		
+	if decoded_objects:
+		for obj in decoded_objects:
+			text = obj.data.decode('utf-8')
+			if "Puck #" in text:
+				puck_id = int(text.split("#")[1])
+				points = obj.polygon
+				if len(points) == 4:
+					pts = np.array([(point.x, point.y) for point in points], dtype=np.int32)
+					cv2.polylines(B, [pts], isClosed=True, color=(0, 255, 0), thickness=2)	
+					cx = sum(point.x for point in points) / 4
+					cy = sum(point.y for point in points) / 4
+					detections[puck_id] = (cx, cy)	
+					center = (int(cx), int(cy))
+					cv2.circle(B, center, 5, (255, 0, 255), -1)
+
+					p1 = points[0]
+					p4 = points[3]
+					dx = p4.x - p1.x
+					dy = p4.y - p1.y		
+					angle_rad = math.atan2(dy, dx)
+					angle_deg = math.degrees(angle_rad)
+					cv2.arrowedLine(B, (p1.x, p1.y), (p4.x, p4.y), (0, 0, 255), 2, tipLength=0.2)
+					cv2.putText(B, f"{angle_deg:.1f} deg", (p1.x + 10, p1.y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+
+		print("        \"detections\": {")
+		for k, v in detections.items():
+			print(f"            {k}: {v},")
+		print("        }")
+	return B
  
 
 
@@ -124,6 +173,7 @@ class MainWindow(QMainWindow):
 		self.isAllGray = False       # true when self.image.allGray(), function is slow for images without color table
 		self.npImage = np.array([])  # size == 0 
 		self.cropActive = False
+		self.blackTolerance = 0      # for cutBlackFrame()
 		#
 		self.scene = QGraphicsScene()
 		self.curItem = None          # (a pointer to) pixmap on scene
@@ -131,6 +181,8 @@ class MainWindow(QMainWindow):
 		self.view.rubberBandRectGiven.connect(self.cropEnd)
 		self.status = QLabel('Open image to display it.', parent = self)
 		self.posInfo = QLabel(' ', parent = self)
+		self.preview = PreviewWorker(parent=self)   # computes [Try it] results in a thread
+		self.preview.resultReady.connect(self.showPreview)
 		#
 		self.initMenu()
 		#
@@ -181,6 +233,9 @@ class MainWindow(QMainWindow):
 		a.triggered.connect(self.cropStart)
 		a.setToolTip('Crop the current pixmap, start by indicating rectangle to keep.')
 		a.setShortcut('Ctrl+Y')  # as in IrfanView
+		a = self.qaCutFrame = QAction('Cut black frame', self)
+		a.triggered.connect(self.cutFrameDlg)
+		a.setToolTip('Cut out any frame of black (dark) rows and columns.')
 		a = self.qaResize = QAction('Resize image', self)
 		a.triggered.connect(self.resizeImage)
 		a.setToolTip('Resize the current npImage (and pixmap)')
@@ -216,6 +271,7 @@ class MainWindow(QMainWindow):
 		#
 		editMenu = self.mainMenu.addMenu('&Edit')
 		editMenu.addAction(self.qaCrop)
+		editMenu.addAction(self.qaCutFrame)
 		editMenu.addAction(self.qaResize)
 		editMenu.addAction(self.qaToGray)
 		editMenu.addAction(self.qaToQrCode)
@@ -237,6 +293,7 @@ class MainWindow(QMainWindow):
 		self.qaScaleDown.setEnabled(pixmapOK)
 		#
 		self.qaCrop.setEnabled(cv2isOK and pixmapOK and (not self.cropActive))
+		self.qaCutFrame.setEnabled(pixmapOK and (not self.cropActive))
 		self.qaResize.setEnabled(cv2isOK and pixmapOK and (not self.cropActive))
 		self.qaToGray.setEnabled(cv2isOK and pixmapOK and (not self.isAllGray))
 		self.qaToQrCode.setEnabled(cv2isOK and pixmapOK and self.isAllGray)
@@ -263,7 +320,10 @@ class MainWindow(QMainWindow):
 		return
 
 	def pixmap2image2np(self):
-		"""Display 'self.pixmap' on scene and copy it to 'self.image' and to 'self.npImage'."""
+		"""Display 'self.pixmap' on scene and copy it to 'self.image' and to 'self.npImage'.
+		Note that 'self.npImage' is a read only view of 'self.image', see qimage2np(),
+		use writeableImage() to get an image to draw into.
+		"""
 		if self.curItem: 
 			self.scene.removeItem(self.curItem)
 		self.curItem = QGraphicsPixmapItem(self.pixmap)
@@ -448,6 +508,18 @@ class MainWindow(QMainWindow):
 		self.close()   # the correct way to quit, is as (upper right) window frame symbol "X" 
 		return
 
+	def closeEvent(self, event):
+		"""Stop the preview worker thread when the main window is closed."""
+		self.preview.stop()
+		event.accept()
+		return
+
+	def showPreview(self, jobNo, B):
+		"""Display image B from the preview worker thread, if it is not stale."""
+		if self.preview.isCurrent(jobNo):
+			self.np2image2pixmap(B, numpyAlso=False)   # note: self.npImage is not updated
+		return
+
 # M	thods for actions on the Scale-menu, which modify the view transform
 	def scaleOne(self):
 		"""Scale to 1, i.e. set the transform to identity matrix"""
@@ -493,80 +565,46 @@ class MainWindow(QMainWindow):
 			self.pixmap2image2np()
 			self.setWindowTitle( f"{self.appFileName} : cropped image" )
 		else: 
-			A = self.npImage   # just use a short name for image in this part of program
 			print( "cropImage(): Rubber band rectangle is small  --> Special case")
-			print( "  Cut out any frame of black rows and columns.")
-			print( f"  A = npImage is an array of {A.dtype.name}, shape {str(A.shape)}." )
-			# find what to crop,  
-			(left,right,top,bottom) = (0,0,0,0)
-			if (len(A.shape) == 3) and (A.shape[2] >= 3):  # color img
-				print("  This is a color image")
-				for column in range(0,A.shape[1]):
-					if ((A[:,column,0].max() > 0) or 
-						(A[:,column,1].max() > 0) or 
-						(A[:,column,2].max() > 0)): break
-					else: left += 1
-				for column in range(A.shape[1]-1,-1,-1):
-					if ((A[:,column,0].max() > 0) or 
-						(A[:,column,1].max() > 0) or 
-						(A[:,column,2].max() > 0)): break
-					else: right += 1
-				for row in range(0,A.shape[0]):
-					if ((A[row,:,0].max() > 0) or 
-						(A[row,:,1].max() > 0) or 
-						(A[row,:,2].max() > 0)): break
-					else: top += 1
-				for row in range(A.shape[0]-1,-1,-1):
-					if ((A[row,:,0].max() > 0) or 
-						(A[row,:,1].max() > 0) or 
-						(A[row,:,2].max() > 0)): break
-					else: bottom += 1
-				print( f"  end using   (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-			else:  # grayscale img
-				print( "  This is a gray scale image")
-				print( "  start using (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-				for column in range(0, A.shape[1]):
-					if (A[:,column].max() > 0): break
-					else: left += 1
-				for column in range(A.shape[1]-1,-1,-1):
-					if (A[:,column].max() > 0): break
-					else: right += 1
-				for row in range(0,A.shape[0]):
-					if (A[row,:].max() > 0): break
-					else: top += 1
-				for row in range(A.shape[0]-1,-1,-1):
-					if (A[row,:].max() > 0): break
-					else: bottom += 1
-				print( f"  end using   (left,right,top,bottom) = ({left},{right},{top},{bottom})" )
-			# 
-			w = A.shape[1] - left - right
-			h = A.shape[0] - top - bottom
-			if max((left,right,top,bottom)):
-				if (w <= 0) or (h <= 0):
-					print( ("cropImage(): Don't crop since (left,right,top,bottom)" +
-					        f" = ({left},{right},{top},{bottom})") )
-				else:
-					print( ("cropImage(): Crop outside of rectangle from (x,y)" +
-					        f"=({left},{top}) and (w,h)=({w},{h})") )
-					self.prevPixmap = self.pixmap 
-					if (len(A.shape) == 3) and (A.shape[2] >= 3):  # color img
-						print("cropImage(): Crop color")
-						B = A[top:top+w,left:left+w,:].copy() 
-						self.np2image2pixmap(B, numpyAlso=True)
-					else:
-						print("cropImage(): Crop gray")
-						B = A[top:top+w,left:left+w].copy()
-						self.np2image2pixmap(B, numpyAlso=True)
-					self.setWindowTitle( f"{self.appFileName} : Black frame cut from image" )
-					self.setIsAllGray()
-			else:
-				print( "cropImage(): No black rows or black columns to crop." )
-			#
+			self.cutBlackFrame()
 		# 
 		self.setMenuItems()
 		return
-
-
+	
+	def cutFrameDlg(self):
+		"""Ask for the tolerance and cut out any frame of black rows and columns."""
+		(tol, ok) = QInputDialog.getInt(self, "Cut black frame", 
+				"Cut rows and columns with all values <= tolerance", 
+				value=self.blackTolerance, min=0, max=254)
+		if ok:
+			self.blackTolerance = tol
+			self.cutBlackFrame(tol)
+		return
+	
+	def cutBlackFrame(self, tol=None):
+		"""Cut out any frame of black (or dark) rows and columns from the image.
+		A row or column is black when all values are <= tol, default 'self.blackTolerance',
+		see cropBlackFrame() in myImageTools.py.
+		"""
+		if (tol is None):
+			tol = self.blackTolerance
+		if (self.npImage.size == 0):
+			return
+		A = self.npImage   # just use a short name for image in this part of program
+		B = cropBlackFrame(A, tol)   # a view, np2qimage handles the strides
+		print( f"cutBlackFrame(): {tol=}, (w,h) = ({A.shape[1]},{A.shape[0]}) -> ({B.shape[1]},{B.shape[0]})" )
+		if (B.shape != A.shape):
+			self.prevPixmap = self.pixmap
+			self.np2image2pixmap(B, numpyAlso=True)
+			self.status.setText( f"pixmap: (w,h) = ({B.shape[1]},{B.shape[0]})" )
+			self.setWindowTitle( f"{self.appFileName} : Black frame cut from image" )
+		else:
+			print( "cutBlackFrame(): No black frame to crop, or all of image is black." )
+		#
+		self.setMenuItems()
+		return
+	#end function cutBlackFrame
+	
 	def resizeImage(self):
      
 		B = self.npImage
@@ -606,14 +644,7 @@ class MainWindow(QMainWindow):
 		return 
 
 	def tryBinary(self, t=0):
-		B = self.npImage
-		if (t < 2):
-			(used_thr,B) = cv2.threshold(B, thresh=1, maxval=255, type=cv2.THRESH_OTSU)
-			print( f"tryBinary: The used Otsu threshold value is {used_thr}" ) 
-		else:
-			(used_thr,B) = cv2.threshold(B, thresh=t, maxval=255, type=cv2.THRESH_BINARY)
-		#
-		self.np2image2pixmap(B, numpyAlso=False)   # note: self.npImage is not updated
+		self.preview.submit(binaryImage, self.npImage, t)
 		return
 	#end function tryBinary()
 
@@ -624,13 +655,9 @@ class MainWindow(QMainWindow):
 		self.prevPixmap = self.pixmap   
 		d = ThresholdDialog(parent=self)   # create object (but does not run it)
 		t = d.getValues()   # display dialog and return values
+		self.preview.cancel()   # a late [Try it] result should not be shown
 		if d.result():   # 1 if accepted (OK), 0 if rejected (Cancel)
-			if (t < 2):
-				(used_thr,B) = cv2.threshold(B, thresh=1, maxval=255, type=cv2.THRESH_OTSU)
-			else:
-				(used_thr,B) = cv2.threshold(B, thresh=t, maxval=255, type=cv2.THRESH_BINARY)
-			#
-			print( f"toBinary: The used threshold value is {used_thr}" )
+			B = binaryImage(B, t)
 			self.np2image2pixmap(B, numpyAlso=True)
 			self.setWindowTitle( f"{self.appFileName} : binary image" )
 		else:
@@ -644,41 +671,7 @@ class MainWindow(QMainWindow):
  
 	# Note that threshold dialog is in another file: clsThresholdDialog.py
 	def tryQrCode(self,valDiameter=0, valSigmaColor=0, valSigmaSpace=0):
-
-		B = self.npImage
-		B= cv2.bilateralFilter(B,valDiameter,valSigmaColor,valSigmaSpace)
-		decoded_objects = decode(B)
-		detections = {}		
-		if decoded_objects:
-			for obj in decoded_objects:
-				text = obj.data.decode('utf-8')
-				if "Puck #" in text:
-					puck_id = int(text.split("#")[1])
-					points = obj.polygon
-					if len(points) == 4:
-						pts = np.array([(point.x, point.y) for point in points], dtype=np.int32)
-						cv2.polylines(B, [pts], isClosed=True, color=(0, 255, 0), thickness=2)	
-						cx = sum(point.x for point in points) / 4
-						cy = sum(point.y for point in points) / 4
-						detections[puck_id] = (cx, cy)	
-						center = (int(cx), int(cy))
-						cv2.circle(B, center, 5, (255, 0, 255), -1)
-    
-						p1 = points[0]
-						p4 = points[3]
-						dx = p4.x - p1.x
-						dy = p4.y - p1.y		
-						angle_rad = math.atan2(dy, dx)
-						angle_deg = math.degrees(angle_rad)
-						cv2.arrowedLine(B, (p1.x, p1.y), (p4.x, p4.y), (0, 0, 255), 2, tipLength=0.2)
-						cv2.putText(B, f"{angle_deg:.1f} deg", (p1.x + 10, p1.y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-      
-			print("        \"detections\": {")
-			for k, v in detections.items():
-				print(f"            {k}: {v},")
-			print("        }")
-   		
-		self.np2image2pixmap(B, numpyAlso=False)   # note: self.npImage is not updated
+		self.preview.submit(qrCodeImage, self.npImage, valDiameter, valSigmaColor, valSigmaSpace)
 		return
 
 	def toQrCode(self):
@@ -687,40 +680,9 @@ class MainWindow(QMainWindow):
 		self.prevPixmap = self.pixmap   
 		d = QrCodeDialog(parent=self)   # create object (but does not run it)
 		valDiameter, valSigmaColor, valSigmaSpace = d.getValues()   # display dialog and return values
+		self.preview.cancel()   # a late [Try it] result should not be shown
 		if d.result():   # 1 if accepted (OK), 0 if rejected (Cancel)
-			B= cv2.bilateralFilter(B,valDiameter,valSigmaColor,valSigmaSpace)
-			decoded_objects = decode(B)
-			detections = {}		
-			if decoded_objects:
-				for obj in decoded_objects:
-					text = obj.data.decode('utf-8')
-					if "Puck #" in text:
-						puck_id = int(text.split("#")[1])
-						points = obj.polygon
-						if len(points) == 4:
-							pts = np.array([(point.x, point.y) for point in points], dtype=np.int32)
-							cv2.polylines(B, [pts], isClosed=True, color=(0, 255, 0), thickness=2)	
-							cx = sum(point.x for point in points) / 4
-							cy = sum(point.y for point in points) / 4
-							detections[puck_id] = (cx, cy)	
-							center = (int(cx), int(cy))
-							cv2.circle(B, center, 5, (255, 0, 255), -1)
-       
-							p1 = points[0]
-							p4 = points[3]
-							dx = p4.x - p1.x
-							dy = p4.y - p1.y		
-							angle_rad = math.atan2(dy, dx)
-							angle_deg = math.degrees(angle_rad)
-							cv2.arrowedLine(B, (p1.x, p1.y), (p4.x, p4.y), (0, 0, 255), 2, tipLength=0.2)
-							cv2.putText(B, f"{angle_deg:.1f} deg", (p1.x + 10, p1.y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-       
-
-			print("        \"detections\": {")
-			for k, v in detections.items():
-				print(f"            {k}: {v},")
-			print("        }")
-  
+			B = qrCodeImage(B, valDiameter, valSigmaColor, valSigmaSpace)
 			self.np2image2pixmap(B, numpyAlso=True)
 			self.setWindowTitle( f"{self.appFileName} : QrCode" )
 		else:
@@ -6,20 +6,35 @@
 #  Some tools (functions) for image processing. The functions are:
 #  qimage2np() and np2qimage2np() convert image from Qt to numpy (and back)
 #    as used for appImageViewer*.py, the work is done by the qimage2ndarray 
-#    package if it is available, else simple (and slow) file write and read is used.
+#    package if it is available, else the QImage memory is viewed directly.
+#    np2qimage() let the QImage use the memory of the numpy array (no copy),
+#    the (slow) file write and read is only used for unusual arrays.
+#    qimage2np() returns a read only view (default), a writeable view or a copy,
+#    isQtMemory() tells if an array use memory owned by a QImage and
+#    writeableImage() copies an image only if it can not be written to.
 #  smoothFilter()  returns a simple low-pass filter
+#  blackFrame() and cropBlackFrame() find and cut a frame of black (dark) rows and columns
+#  benchAll()  measure frames per second for the conversions
 #
 # Karl Skretting, UiS, February 2019, November 2020 (need Python 3.6 ->), June 2022
 #      minor updates January 2024
+#      October 2026, buffer sharing conversion for gray, BGR and BGRA arrays
+#                    blackFrame() and cropBlackFrame()
 
 # Example on how to use file:
 #   >>> from myImageTools import smoothFilter, qimage2np, np2qimage
 #   >>> import myImageTools
 #   (py38) C:\..\py3> python myImageTools.py   # test
+#   (py38) C:\..\py3> python myImageTools.py bench   # frames per second
 
 import sys
 import os.path
-from PyQt5.QtGui import QImage
+import time
+from PyQt5.QtGui import QImage, qRgb
+try:
+	from PyQt5 import sip   # PyQt5 >= 5.11
+except ImportError:
+	import sip
 import numpy as np
 try:
 	import cv2
@@ -41,6 +56,9 @@ except ImportError:
 
 empty_ndarray = np.array([], dtype=np.uint8)
 tempFile = 'temp.png'
+grayColorTable = [qRgb(i,i,i) for i in range(256)]   # for QImage.Format_Indexed8
+# QImage.Format_BGR888 is new in Qt 5.14, for older Qt the BGR array is converted to RGB
+bgr888_ok = hasattr(QImage, 'Format_BGR888')
 
 def smoothFilter(len=3):
 	"""Generate and returns a small simple low-pass FIR filter with given length (3,5,7 or 9)."""
@@ -57,36 +75,179 @@ def smoothFilter(len=3):
 	#
 	return a 
 
+def blackFrame(A, tol=0):
+	"""Find the frame of black (or dark) rows and columns around image A.
+	
+	A row or column is black when all its values are <= tol, for color images
+	the first three channels are checked (alpha is not). The maximum of each 
+	row and column is found by two numpy reductions, no loop over the lines.
+	ex.: (left,right,top,bottom) = blackFrame(A, tol=10)
+	
+	Parameters
+	----------
+	A: numpy.ndarray, gray scale (h,w) or color (h,w,c) image
+	tol: int, values less or equal to tol are black, default 0
+	
+	Returns
+	-------
+	(left,right,top,bottom): tuple of int, number of black columns and rows at 
+	  each side of the image, (w,w,h,h) if all of A is black
+	"""
+	(h, w) = A.shape[:2]
+	if (A.ndim == 3):
+		M = A[:,:,:3].max(axis=2)   # brightest channel of each pixel
+	else:
+		M = A
+	cols = np.flatnonzero(M.max(axis=0) > tol)
+	rows = np.flatnonzero(M.max(axis=1) > tol)
+	if (cols.size == 0):
+		return (w, w, h, h)
+	return (int(cols[0]), int(w-1-cols[-1]), int(rows[0]), int(h-1-rows[-1]))
+#end function blackFrame
+
+def cropBlackFrame(A, tol=0):
+	"""Returns image A without the frame of black (or dark) rows and columns.
+	
+	The returned array is a view of A (not a copy), see blackFrame() for the
+	arguments. If A is all black, or has no black frame, A itself is returned.
+	ex.: B = cropBlackFrame(A, tol=10)
+	"""
+	(h, w) = A.shape[:2]
+	(left,right,top,bottom) = blackFrame(A, tol)
+	if (left+right >= w) or (top+bottom >= h):
+		return A
+	return A[top:h-bottom, left:w-right]
+#end function cropBlackFrame
+
+class _QImageMemory:
+	"""Expose the bytes of a QImage as a numpy array interface.
+
+	The object keeps a reference to the QImage, and since numpy keeps a reference
+	to this object (as base of the array) the QImage memory is valid as long as
+	the array (or any view of it) exists.
+	"""
+	def __init__(self, qImage, readOnly=False):
+		self.qImage = qImage
+		if readOnly:
+			ptr = qImage.constBits()
+		else:
+			ptr = qImage.bits()   # may detach, i.e. make the image memory unique
+		#
+		self.__array_interface__ = { 'version': 3, 'typestr': '|u1',
+				'shape': (qImage.height(), qImage.bytesPerLine()),
+				'data': (int(ptr), readOnly) }
+		return
+	#end class _QImageMemory
+
+def qimage2view(qImage, readOnly=False):
+	"""Returns a numpy array that is a view of the memory of a QImage object.
+
+	The returned array is 3D, (height, width, bytes per pixel), like the
+	byte_view() function in qimage2ndarray package, for 32 bit formats the
+	bytes are BGRA on little endian machines. Padding at the end of each 
+	scanline is handled by the strides of the returned array, no data is copied.
+	ex.: B = qimage2view(qImage)
+	
+	Parameters
+	----------
+	qImage: QImage
+	readOnly: bool, if True the returned array is not writeable
+	
+	Returns
+	-------
+	B: numpy.ndarray (of uint8) 
+	"""
+	if qImage.isNull():
+		return empty_ndarray
+	#
+	(w, h) = (qImage.width(), qImage.height())
+	bpp = qImage.depth() // 8   # bytes per pixel, 1 for gray, 3 for RGB888, 4 for RGB32
+	if (bpp < 1):   # monochrome (1 bit) images
+		qImage = qImage.convertToFormat(QImage.Format_Grayscale8)
+		bpp = 1
+	#
+	A = np.asarray(_QImageMemory(qImage, readOnly))   # (h, bytesPerLine)
+	return A[:, :w*bpp].reshape(h, w, bpp)
+#end function qimage2view
+
+def isQtMemory(B):
+	"""Returns True if numpy array B is a view of memory owned by a QImage object.
+	
+	This is the case for arrays returned by qimage2np() in 'view' or 'write' mode, 
+	and for any slice or reshape of them. The chain of base objects is followed 
+	until the owner of the memory is found.
+	"""
+	b = B
+	while isinstance(b, np.ndarray):
+		b = b.base
+	#
+	if isinstance(b, memoryview):   # numpy may keep the buffer as memoryview
+		b = b.obj
+	return isinstance(b, (_QImageMemory, sip.voidptr))
+#end function isQtMemory
+
+def writeableImage(B):
+	"""Returns image B if it may be written to, else a copy of B.
+	
+	Use this before drawing into an image, i.e. copy on write. Arrays that
+	are views of QImage memory, and read only arrays, are copied, while arrays 
+	owning their memory are returned as they are (no copy).
+	ex.: self.npImage = writeableImage(self.npImage)
+	     cv2.circle(self.npImage, center, radius, (255, 0, 255), 3)
+	"""
+	if isinstance(B, np.ndarray) and ((not B.flags.writeable) or isQtMemory(B)):
+		return B.copy()
+	return B
+#end function writeableImage
+
 # could these functions be simplified if we include isAllGray?
-def qimage2np(qImage):
+def qimage2np(qImage, mode='view', bgr=False):
 	"""Converts a QImage object into a numpy array 2D or 3D (for color).
 
 	The best (fastest) way to do this is to use a function that extract the 
 	bytes inside the QImage memory representation. Here we try to use the
-	qimage2ndarray package, but if import of this is unsuccessful an alternative
-	is used; the image is saved in a file and then read by OpenCV function imread.
+	qimage2ndarray package, but if import of this is unsuccessful the memory
+	is viewed by qimage2view() which does the same.
+	Who owns the memory of the returned array is given by argument 'mode':
+	  'view'  - (default) a read only view of the QImage memory, attempts to
+	            write into the array, by numpy or OpenCV, raise an error,
+	  'write' - a writeable view, changes in the array change the QImage too,
+	  'copy'  - a copy, the array owns its memory and may be changed freely.
+	For 32 bit images 'bgr' = True drops the alpha channel, in view modes 
+	this is done by strides only, i.e. the returned array is B[:,:,:3].
 	ex.: B = qimage2np(qImage)
+	     B = qimage2np(qImage, mode='copy', bgr=True)
 	
 	Parameters
 	----------
 	qImage: QImage
+	mode: str, 'view', 'write' or 'copy'
+	bgr: bool, return 3 channels (BGR) for 4 channel (BGRA) images
 
 	Returns
 	-------
 	B: numpy.ndarray (of uint8) 
 	"""
+	if mode not in ('view', 'write', 'copy'):
+		print( f"qimage2np: Unknown mode '{mode}', use 'view'." )
+		mode = 'view'
+	#
 	if q2n_ok:
 		if (not qImage.isNull()):
 			B = q2n.byte_view(qImage)   # B may be 2D or 3D (RGBA/BRGA)
 		else:
 			B = empty_ndarray
 	else: 
-		print("qimage2np: qimage2ndarray (q2n) is not imported, make image B (numpy array) by writing and reading a file.")
-		if qImage.save(tempFile,quality=100):   #  True if successfully saved
-			B = cv2.imread(tempFile)
-		else:
-			B = empty_ndarray
-		#
+		B = qimage2view(qImage)
+	#
+	if bgr and (B.ndim == 3) and (B.shape[2] == 4):
+		B = B[:,:,:3]   # a view, no copy
+	#
+	if (mode == 'copy'):
+		B = B.copy()
+	elif (mode == 'view') and (B.size > 0):
+		B = B.view()   # a new array object, so flag below is only for this view
+		B.flags.writeable = False
 	#
 	return B
 #end function qimage2np
@@ -94,12 +255,17 @@ def qimage2np(qImage):
 def np2qimage(B):
 	"""Converts a numpy array to QImage object.
 
-	This is done by gray2qimage() method in qimage2ndarray package but only
-	for gray scale images. For color image, i.e. 3D array B, the image is saved 
-	in a file by OpenCV imwrite() function and then read by when QImage object
-	is created. If B is not an array representing an image, an empty QImage
-	object is returned.
-	ex.: qImage = qimage2np(B)
+	For arrays of uint8 representing gray (2D), BGR or BGRA (3D) images the
+	QImage object is made to use the memory of the array, thus no data is 
+	copied. The numpy array is stored as attribute 'ndarray' of the returned
+	QImage object (as in qimage2ndarray package) so the memory is valid as 
+	long as the QImage object exists. Note that changes in array B will 
+	change the QImage object too, use qImage.copy() for an independent image. 
+	Arrays where each line is not contiguous, ex. B[:,::2], are copied first.
+	Other arrays, ex. uint16 arrays, are saved in a file by OpenCV imwrite() 
+	function and then read by when QImage object is created (this is slow).
+	If B is not an array representing an image, an empty QImage object is returned.
+	ex.: qImage = np2qimage(B)
 	
 	Parameters
 	----------
@@ -113,9 +279,36 @@ def np2qimage(B):
 		print("np2qimage: Ignore illegal argument B (not numpy array), return empty QImage.")
 		return QImage()  
 	#
-	if q2n_ok and ((len(B.shape) == 2) or ((len(B.shape) == 3) and (B.shape[2] == 1))):
-		qImage = q2n.gray2qimage(B)   # must be gray for this, and qImage.format = 3 (indexed)
-	elif cv2_ok and (len(B.shape) == 2) or (len(B.shape) == 3):   # must be 2D or 3D array 
+	if (B.ndim == 3) and (B.shape[2] == 1):
+		B = B[:,:,0]
+	#
+	if (B.size > 0) and (B.dtype == np.uint8) and ((B.ndim == 2) or 
+			((B.ndim == 3) and (B.shape[2] in (3,4)))):
+		if (B.ndim == 3) and (B.shape[2] == 3) and (not bgr888_ok):
+			if cv2_ok:
+				B = cv2.cvtColor(B, cv2.COLOR_BGR2RGB)
+			else:
+				B = np.ascontiguousarray(B[:,:,::-1])
+			fmt = QImage.Format_RGB888
+		elif (B.ndim == 3) and (B.shape[2] == 3):
+			fmt = QImage.Format_BGR888
+		elif (B.ndim == 3):
+			fmt = QImage.Format_ARGB32   # memory is BGRA on little endian machines
+		else:
+			fmt = QImage.Format_Indexed8   # as gray2qimage() in qimage2ndarray
+		#
+		# each line must be contiguous, but lines may be anywhere (bytesPerLine)
+		pixelBytes = B.shape[2] if (B.ndim == 3) else 1
+		(h, w) = B.shape[:2]
+		if ((B.strides[1] != pixelBytes) or ((B.ndim == 3) and (B.strides[2] != 1)) or 
+				(B.strides[0] < w*pixelBytes)):
+			B = np.ascontiguousarray(B)
+		#
+		qImage = QImage(sip.voidptr(B.ctypes.data), w, h, B.strides[0], fmt)
+		if (fmt == QImage.Format_Indexed8):
+			qImage.setColorTable(grayColorTable)
+		qImage.ndarray = B   # keep a reference to the memory used by qImage
+	elif cv2_ok and ((B.ndim == 2) or (B.ndim == 3)):   # must be 2D or 3D array 
 		# print( f"np2qimage: write image B (numpy array) to file {tempFile}" )
 		cv2.imwrite(tempFile, B)
 		# print( f"np2qimage: and read it from file {tempFile} into qImage" )
@@ -189,7 +382,39 @@ def testAll():
 	#
 	return
 
+def benchAll(w=1280, h=960, n=50):
+	"""Measure frames per second for conversions of (w,h) images, both ways.
+	
+	The file write and read (as used before October 2026) is included to show
+	what is gained. The uEye camera gives 1280x960 images, which is default here.
+	"""
+	def fps(fun, B):
+		t0 = time.perf_counter()
+		for i in range(n):
+			fun(B)
+		return n/(time.perf_counter() - t0)
+	#
+	def fileWriteRead(B):
+		cv2.imwrite(tempFile, B)
+		return QImage(tempFile)
+	#
+	rng = np.random.default_rng(0)
+	print( f"myImageTools.py: benchAll()  # {n} conversions of ({w},{h}) images" )
+	for (txt, shape) in (("gray", (h,w)), ("BGR", (h,w,3)), ("BGRA", (h,w,4))):
+		B = rng.integers(0, 256, size=shape, dtype=np.uint8)
+		qImage = np2qimage(B).copy()   # image with its own memory
+		print( f"  {txt:5s} np2qimage   {fps(np2qimage, B):9.1f} fps" )
+		if cv2_ok:
+			print( f"  {txt:5s} file w+r    {fps(fileWriteRead, B):9.1f} fps" )
+		print( f"  {txt:5s} qimage2np   {fps(qimage2np, qImage):9.1f} fps" )
+		print( f"  {txt:5s} qimage2view {fps(qimage2view, qImage):9.1f} fps" )
+	#
+	return
+
 # This is the standard boilerplate that calls the main() function.
 if __name__ == '__main__':
-	testAll()
+	if (len(sys.argv) >= 2) and (sys.argv[1] == 'bench'):
+		benchAll()
+	else:
+		testAll()
 
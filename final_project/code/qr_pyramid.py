@@ -0,0 +1,206 @@
+import cv2
+from pyzbar.pyzbar import decode
+import numpy as np
+import math
+import time
+
+# Coarse-to-fine QR detection: the finder patterns (the three nested squares
+# in the corners of a QR code) are found as contours on a downsampled pyramid
+# level, grouped into QR code candidates, and only (upscaled) crops of the
+# full resolution image around the candidates are decoded.
+
+ORIENTATION = {'UP': 0, 'RIGHT': 90, 'DOWN': 180, 'LEFT': 270}
+
+def to_gray(image):
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+
+def find_finder_patterns(gray, min_size=4):
+    # Finder patterns are dark squares with a light square and a dark square inside,
+    # i.e. contours with (at least) two levels of nested contours that are all square-like.
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, 5)
+    contours, hierarchy = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    if hierarchy is None:
+        return []
+    hierarchy = hierarchy[0]
+
+    def square(i):
+        (w, h) = cv2.minAreaRect(contours[i])[1]
+        area = cv2.contourArea(contours[i])
+        return (min(w, h) >= min_size * 0.4) and (max(w, h) <= 1.5 * min(w, h)) and (area >= 0.6 * w * h)
+
+    patterns = []
+    for i in range(len(contours)):
+        child = hierarchy[i][2]
+        if child < 0 or hierarchy[child][2] < 0:
+            continue
+        grandchild = hierarchy[child][2]
+        if not (square(i) and square(child) and square(grandchild)):
+            continue
+        (center, (w, h), _) = cv2.minAreaRect(contours[i])
+        (inner, (wi, hi), _) = cv2.minAreaRect(contours[grandchild])
+        # outer square is 7 modules, inner 3 modules, and they are concentric
+        if (max(w, h) < min_size) or not (1.6 < (w + h) / max(wi + hi, 1) < 4.0):
+            continue
+        if math.dist(center, inner) > 0.2 * max(w, h):
+            continue
+        patterns.append((center[0], center[1], (w + h) / 2))
+    return patterns
+
+def group_patterns(patterns, max_modules=45):
+    # Finder patterns of the same QR code have about the same size, and are
+    # at most 'max_modules' modules (version 7) apart, one module is size/7.
+    n = len(patterns)
+    parent = list(range(n))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(n):
+        for j in range(i + 1, n):
+            (xi, yi, si) = patterns[i]
+            (xj, yj, sj) = patterns[j]
+            if (max(si, sj) < 1.5 * min(si, sj)) and (math.hypot(xi - xj, yi - yj) < max_modules * (si + sj) / 14):
+                parent[root(i)] = root(j)
+    groups = {}
+    for i in range(n):
+        groups.setdefault(root(i), []).append(patterns[i])
+    return list(groups.values())
+
+def orientation_from_finders(finders):
+    # With three finder patterns the top left one is opposite the longest side,
+    # and the top right one is found from the sign of the cross product.
+    if len(finders) != 3:
+        return None
+    P = [np.array(f[:2]) for f in finders]
+    sides = [math.dist(P[(k + 1) % 3], P[(k + 2) % 3]) for k in range(3)]
+    k = int(np.argmax(sides))
+    tl = P[k]
+    (a, b) = (P[(k + 1) % 3], P[(k + 2) % 3])
+    u = a - tl
+    v = b - tl
+    tr = a if (u[0] * v[1] - u[1] * v[0]) > 0 else b   # image y axis points down
+    return math.degrees(math.atan2(tr[1] - tl[1], tr[0] - tl[0])) % 360.0
+
+def refine_corners(gray, polygon):
+    # Sub-pixel corners of the QR code, the polygon is moved a little inwards
+    # first so that the search windows are on the code corners.
+    P = np.array(polygon, dtype=np.float32)
+    c = P.mean(axis=0)
+    size = max(np.ptp(P[:, 0]), np.ptp(P[:, 1]))
+    win = int(max(2, min(7, size / 20)))
+    P = c + (P - c) * (1.0 - 1.0 / max(size, 1.0))
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 0.05)
+    return cv2.cornerSubPix(gray, P.reshape(-1, 1, 2).copy(), (win, win), (-1, -1), criteria).reshape(-1, 2)
+
+def diagonal_center(P):
+    # Intersection of the diagonals, the center also under perspective
+    (p0, p1, p2, p3) = P
+    d1 = p2 - p0
+    d2 = p3 - p1
+    den = d1[0] * d2[1] - d1[1] * d2[0]
+    if abs(den) < 1e-6:
+        return P.mean(axis=0)
+    t = ((p1[0] - p0[0]) * d2[1] - (p1[1] - p0[1]) * d2[0]) / den
+    return p0 + t * d1
+
+def decode_crop(gray, box, upscale):
+    (x0, y0, x1, y1) = box
+    crop = gray[y0:y1, x0:x1]
+    if upscale != 1:
+        crop = cv2.resize(crop, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_CUBIC)
+    objects = decode(crop)
+    if not objects:   # second try, binarized crop
+        objects = decode(cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1])
+    return objects
+
+def decode_pyramid(image, levels=1, upscale=2.0, pad=1.0, full_fallback=False):
+    # Returns a list of dicts with text, id, center (sub-pixel), angle (degrees),
+    # polygon (full resolution pixels) for each decoded QR code.
+    gray = to_gray(image)
+    small = gray
+    for i in range(levels):
+        small = cv2.pyrDown(small)
+    scale = gray.shape[1] / small.shape[1]
+    (h, w) = gray.shape
+    results = {}
+    for group in group_patterns(find_finder_patterns(small)):
+        X = np.array([(x, y) for (x, y, s) in group]) * scale
+        s = max(size for (_, _, size) in group) * scale
+        margin = s * (0.5 + pad)   # finder centers are half a pattern inside the code, and a quiet zone
+        box = (max(0, int(X[:, 0].min() - margin)), max(0, int(X[:, 1].min() - margin)),
+               min(w, int(math.ceil(X[:, 0].max() + margin)) + 1), min(h, int(math.ceil(X[:, 1].max() + margin)) + 1))
+        if len(group) < 3:   # only part of the code is seen, the code may be on any side
+            d = int(3 * s)
+            box = (max(0, box[0] - d), max(0, box[1] - d), min(w, box[2] + d), min(h, box[3] + d))
+        for obj in decode_crop(gray, box, upscale):
+            qr = qr_of(obj, gray, box, upscale, group if len(group) == 3 else None, scale)
+            if qr is not None:
+                results.setdefault(qr['text'], qr)
+    if full_fallback and not results:
+        for obj in decode(gray):
+            qr = qr_of(obj, gray, (0, 0, w, h), 1.0, None, 1.0)
+            if qr is not None:
+                results.setdefault(qr['text'], qr)
+    return list(results.values())
+
+def qr_of(obj, gray, box, upscale, finders, scale):
+    points = obj.polygon
+    if len(points) != 4:
+        return None
+    text = obj.data.decode('utf-8', errors='replace')
+    puck_id = None
+    if "Puck #" in text:
+        try:
+            puck_id = int(text.split("#")[1])
+        except ValueError:
+            pass
+    P = np.array([(p.x / upscale + box[0], p.y / upscale + box[1]) for p in points], dtype=np.float32)
+    P = refine_corners(gray, P)
+    center = diagonal_center(P)
+    angle = None
+    if finders is not None:
+        angle = orientation_from_finders([(x * scale, y * scale, s) for (x, y, s) in finders])
+    if angle is None:   # side angle modulo 90 degrees, and the quadrant from zbar
+        angle = (cv2.minAreaRect(P)[2] % 90.0) + ORIENTATION.get(getattr(obj, 'orientation', None), 0)
+    return {'text': text, 'id': puck_id, 'center': (float(center[0]), float(center[1])),
+            'angle': float(angle % 360.0), 'polygon': P}
+
+def decode3_QR_code(image_path, camera_pos):
+    # As decode2_QR_code in camera.py, with pyramid detection and sub-pixel centers
+    image = cv2.imread(image_path)
+    detections = {}
+    for qr in decode_pyramid(image):
+        if qr['id'] is not None:
+            detections[qr['id']] = (round(qr['center'][0], 1), round(qr['center'][1], 1))
+    return {
+        "camera_pos": camera_pos,
+        "detections": detections
+    }
+
+if __name__ == "__main__":
+    # Compare with camera.py: bilateral filter and decode of the whole frame
+    camera_positions = [
+        [-100, -100], [-100, 0], [-100, 100],
+        [0, -100], [0, 0], [0, 100],
+        [100, -100], [100, 0], [100, 100]
+    ]
+    (t_full, t_pyr, n_full, n_pyr) = (0.0, 0.0, 0, 0)
+    for x, y in camera_positions:
+        image = cv2.imread(f"final_project/image/puck_image_{x}_{y}_f.png")
+        t0 = time.perf_counter()
+        full = [obj.data.decode('utf-8') for obj in decode(cv2.bilateralFilter(image, 9, 75, 75))]
+        t1 = time.perf_counter()
+        pyr = decode_pyramid(image)
+        t2 = time.perf_counter()
+        (t_full, t_pyr, n_full, n_pyr) = (t_full + t1 - t0, t_pyr + t2 - t1, n_full + len(full), n_pyr + len(pyr))
+        print(f"[{x}, {y}]: whole frame {sorted(full)}, pyramid " +
+              ", ".join(f"{qr['text']} at ({qr['center'][0]:.1f}, {qr['center'][1]:.1f}) {qr['angle']:.1f} deg"
+                        for qr in pyr))
+    n = len(camera_positions)
+    print(f"whole frame: {1000 * t_full / n:.1f} ms/image, {n_full} codes")
+    print(f"pyramid:     {1000 * t_pyr / n:.1f} ms/image, {n_pyr} codes")
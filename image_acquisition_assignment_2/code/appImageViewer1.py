@@ -322,7 +322,10 @@ class MainWindow(QMainWindow):
 		return
 		
 	def pixmap2image2np(self):
-		"""Display 'self.pixmap' on scene and copy it to 'self.image' and to 'self.npImage'."""
+		"""Display 'self.pixmap' on scene and copy it to 'self.image' and to 'self.npImage'.
+		Note that 'self.npImage' is a read only view of 'self.image', see qimage2np(),
+		use writeableImage() to get an image to draw into.
+		"""
 		if self.curItem: 
 			self.scene.removeItem(self.curItem)
 		self.curItem = QGraphicsPixmapItem(self.pixmap)
@@ -617,11 +620,11 @@ class MainWindow(QMainWindow):
 					self.prevPixmap = self.pixmap 
 					if (len(A.shape) == 3) and (A.shape[2] >= 3):  # color img
 						print("cropImage(): Crop color")
-						B = A[top:top+w,left:left+w,:].copy() 
+						B = A[top:top+w,left:left+w,:]   # a view, np2qimage handles the strides
 						self.np2image2pixmap(B, numpyAlso=True)
 					else:
 						print("cropImage(): Crop gray")
-						B = A[top:top+w,left:left+w].copy()
+						B = A[top:top+w,left:left+w]
 						self.np2image2pixmap(B, numpyAlso=True)
 					self.setWindowTitle( f"{self.appFileName} : Black frame cut from image" )
 					self.setIsAllGray()
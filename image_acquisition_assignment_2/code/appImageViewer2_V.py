@@ -34,7 +34,7 @@ except ImportError:
 #end try, import pyueye
 
 from appImageViewer1 import myPath, MainWindow as inheritedMainWindow 
-from myImageTools import np2qimage
+from myImageTools import np2qimage, writeableImage
 
 class MainWindow(inheritedMainWindow):  
 	"""MainWindow class for this image viewer is inherited from another image viewer."""
@@ -383,6 +383,7 @@ class MainWindow(inheritedMainWindow):
 				circles = np.uint16(np.around(circles))
 				num_circles = circles.shape[1]
 				print(f"Number of circles detected: {num_circles}")
+				self.npImage = writeableImage(self.npImage)   # copy only if it is a view
 				for i in circles[0, :]:
 					center = (i[0], i[1])
 					# Draw circle center
@@ -4,9 +4,10 @@
 # ../ELE610/py3/clsHoughLinesDialog.py 
 #
 #  The class HoughLinesDialog 
-#  and functions: getBestHoughLines, draw_lines 
+#  and functions: getBestHoughLines, lineCover, draw_lines 
 #
 # Karl Skretting, UiS, January-February 2024
+#      October 2026, getBestHoughLines() without Python loops over pixels and all line pairs
 
 # Example on how to use file:
 #   (C:\...\Anaconda3) C:\..\py3> activate py11
@@ -25,7 +26,39 @@ from PyQt5.QtWidgets import (QAction, QApplication, QBoxLayout, QButtonGroup,
 			QPushButton, QRadioButton, QSlider, QSpinBox)
 
 
-def getBestHoughLines(linesFound, B, nofLines, distLines, verbose=True):
+def lineCover(B, x1, y1, x2, y2):
+	"""Returns, for each line given by arrays (x1,y1) and (x2,y2), how many pixels 
+	in a thin line from first point to second point that is non-zero in binary image B.
+	The samples of all lines are made at once, steep lines are sampled for each y 
+	and flat lines for each x (x1 to x2), as in the first (loop) version of this function.
+	"""
+	(x1, y1, x2, y2) = (np.asarray(v, dtype=np.float64) for v in (x1, y1, x2, y2))
+	L = x1.size
+	if (L == 0):
+		return np.zeros(0)
+	theta = np.arctan2(x2-x1, y1-y2)
+	steep = (theta < np.pi/4) | (theta > np.pi*3/4)
+	yMin = np.minimum(y1, y2)
+	n = np.where(steep, np.abs(y2-y1)+1, np.maximum(x2-x1+1, 0)).astype(np.int64)  # samples in each line
+	lineNo = np.repeat(np.arange(L), n)
+	k = np.arange(n.sum()) - np.repeat(np.cumsum(n)-n, n)   # 0,1,..,n-1 for each line
+	(x1, y1, x2, y2, yMin, s) = (v[lineNo] for v in (x1, y1, x2, y2, yMin, steep))
+	with np.errstate(divide='ignore', invalid='ignore'):
+		# steep: let y go from min(y1,y2) to max(y1,y2) and find corresponding x
+		ys = yMin + k
+		a = np.nan_to_num((ys-y1)/(y2-y1))
+		xs = ((1-a)*x1 + a*x2)
+		# flat: let x go from x1 to x2 and find corresponding y
+		xf = x1 + k
+		a = np.nan_to_num((xf-x1)/(x2-x1))
+		yf = ((1-a)*y1 + a*y2)
+	x = np.where(s, xs, xf).astype(np.int64)   # truncate as int()
+	y = np.where(s, ys, yf).astype(np.int64)
+	x = np.clip(x, 0, B.shape[1]-1)
+	y = np.clip(y, 0, B.shape[0]-1)
+	return np.bincount(lineNo, weights=(B[y,x] != 0), minlength=L)
+
+def getBestHoughLines(linesFound, B, nofLines, distLines, verbose=False):
 	"""Sort and select the 'best' lines from lines as returned by 
 	HoughLines or HoughLinesP. Also line representation is changed.
 	Angle theta is in radians and shown in degrees.
@@ -38,7 +71,7 @@ def getBestHoughLines(linesFound, B, nofLines, distLines, verbose=True):
 	               needed to find the 'cover' property of a line
 	  nofLines   : maximum number of lines to return
 	  distLines  : ignore lines closer to each other than given by distLines
-	  verbose    : True (print much) or False (print nothing)
+	  verbose    : True (print much) or False (print nothing, default)
 	Output argument:
 	  lines      : a numpy array with nofLines rows and 8 columns 
 	  lines[row] : each row is a line given by 8 values, two alternative
@@ -50,6 +83,14 @@ def getBestHoughLines(linesFound, B, nofLines, distLines, verbose=True):
 	  length = line[6] is length from first point to second point
 	  cover = line[7] is how many pixels in a thin line from first point 
 	    to second point that is non-zero in binary image B     
+	
+	The cover of all lines is found at once by lineCover(). A line is kept if
+	its distance to each of the lines already kept is at least distLines. 
+	This distance is found from the end points of the lines, and it can only be
+	small if an end point of the kept line is close (4*distLines) to an end point 
+	of the line tried. The kept lines are therefore stored in a grid of cells 
+	(of size 4*distLines) by their first end point, and only kept lines in the 
+	cells around the end points of the line tried are compared to it.
 	"""
 	if not (isinstance(linesFound, np.ndarray) and (linesFound.ndim == 3) and \
 	        linesFound.size):
@@ -67,56 +108,38 @@ def getBestHoughLines(linesFound, B, nofLines, distLines, verbose=True):
 	if verbose:
 		print( f"\ngetBestHoughLines(..,{nofLines=},{distLines=:6.2f}): started " \
 		       f"with {L=} lines in numpy array 'lines'." )
-		print( "-- first shows lines in the order they were found by cv2.HoughLines[P] --" )
-	# find the two representations and two properties of each line
-	for idxLine in range(L):
-		line = linesFound[idxLine]
+	# find the two representations of each line
+	if (linesFound.shape[2] == 2):  # from HoughLines
 		# HoughLines:  line = array([[rho, theta]], dtype=float32)   # theta in radians
-		# HoughLinesP: line = array([[x1,y1,x2,y2]], dtype=int32)
-		if (line.ndim == 2) and (line[0].size == 2):  # from HoughLines
-			(rho,theta) = line[0]           
+		for idxLine in range(L):
+			(rho,theta) = linesFound[idxLine,0]
 			(a,b) = (np.cos(theta), np.sin(theta))
 			(x0,y0) = (a*rho, b*rho)   # point on line closest to origin
 			(x1,y1) = (int(x0 + 8000*(-b)), int(y0 + 8000*(a)))
 			(x2,y2) = (int(x0 - 8000*(-b)), int(y0 - 8000*(a)))
 			# input arguments of clipLine should be int, and returned values are int
 			(inSide,(x1,y1),(x2,y2)) = cv2.clipLine((0,0,w,h),(x1,y1),(x2,y2))
-		elif (line.ndim == 2) and (line[0].size == 4):  # from HoughLinesP
-			(x1,y1,x2,y2) = line[0]
-		else:
-			print( f"ERROR in getBestHoughLines(): {line=}" )
-			return None
-		# end if
-		# use (x1,y1) and (x2,y2) to (re)calculate rho and theta
-		length = np.hypot(x2-x1,y2-y1)
-		theta = np.arctan2(x2-x1,y1-y2)  # x2-x1 >= 0 ==> 0 <= theta <= pi
-		rho = (x2*y1-x1*y2)/length if length else 0.0
-		#
-		cover = 0
-		if (theta < np.pi/4) or (theta > np.pi*3/4):
-			# let y go from y1 to y2 and find corresponding x
-			for y in range(min(y1,y2),max(y1,y2)+1):
-				a = (y-y1)/(y2-y1)
-				x = int((1-a)*x1+a*x2)
-				if B[y,x]: cover = cover+1
-			#
-		else:
-			# let x go from x1 to x2 and find corresponding y
-			for x in range(x1,x2+1):
-				a = (x-x1)/(x2-x1)
-				y = int((1-a)*y1+a*y2)
-				if B[y,x]: cover = cover+1
-			#
-		#
-		if verbose:
-			print( f"line {idxLine:4d}: {rho=:8.2f}, theta={theta*180/np.pi:6.1f} [deg] or " +\
-			       f"({x1=:4d},{y1=:4d}), ({x2=:4d},{y2=:4d}) ==> {length=:6.1f}, {cover=:4d}." )
-		lines[idxLine] = [x1,y1,x2,y2, rho,theta, length,cover]
-	# end for
+			lines[idxLine,:4] = (x1,y1,x2,y2)
+		# end for
+	elif (linesFound.shape[2] == 4):  # from HoughLinesP
+		# HoughLinesP: line = array([[x1,y1,x2,y2]], dtype=int32)
+		lines[:,:4] = linesFound[:,0,:]
+	else:
+		print( f"ERROR in getBestHoughLines(): {linesFound.shape=}" )
+		return None
+	# end if
+	# use (x1,y1) and (x2,y2) to (re)calculate rho and theta, and the two properties
+	(x1,y1,x2,y2) = (lines[:,0],lines[:,1],lines[:,2],lines[:,3])
+	lines[:,6] = np.hypot(x2-x1,y2-y1)   # length
+	lines[:,5] = np.arctan2(x2-x1,y1-y2)  # theta, x2-x1 >= 0 ==> 0 <= theta <= pi
+	with np.errstate(divide='ignore', invalid='ignore'):
+		lines[:,4] = np.where(lines[:,6] > 0, (x2*y1-x1*y2)/lines[:,6], 0.0)   # rho
+	lines[:,7] = lineCover(B, x1, y1, x2, y2)
+	#
 	idx = np.flip(lines[:,7].argsort())
 	lines = lines[idx,:].copy()
 	if verbose:
-		print( "-- lines ordered by 'cover' after copy() --" )
+		print( "-- lines ordered by 'cover' --" )
 		for idxLine in range(L):
 			(x1,y1,x2,y2, rho,theta, length,cover) = lines[idxLine]
 			print( f"line {idxLine:4d}: {rho=:8.2f}, theta={theta*180/np.pi:6.2f} [deg] or " +\
@@ -124,78 +147,64 @@ def getBestHoughLines(linesFound, B, nofLines, distLines, verbose=True):
 			       f"==> {length=:7.2f}, {cover=:7.2f}." )
 	#
 	# we should still check if some lines are 'overlapping' 
-	thetaLim = 5*np.pi/180  # two lines with angle difference larger than this does NOT match
+	keep = [0]   # rows in 'lines' to return, the first is always kept
+	if (distLines <= 0):   # no line is too close
+		keep = list(range(min(nofLines, L)))
+	cell = 4*distLines   # size of cells in grid of kept lines 
+	def cellOf(x, y):
+		return (int(x//cell), int(y//cell))
+	grid = {}   # (cx,cy) : list of rows in 'lines', kept lines with first end point in cell
+	if (distLines > 0):
+		grid[cellOf(lines[0,0], lines[0,1])] = [0]
 	if verbose:
-		print( f"-- check lines for overlap, thetaLim = {{thetaLim*180/np.pi:6.2f}} --" )
+		print( f"-- check lines for overlap, {distLines=:6.2f} --" )
 		print( f"      Keep line in row    0 as row    0 in 'lines'.")
-	okRows = 1   # lines[okRows-1] is the last good row to return
 	tryRow = 1   # the next row to try
-	while (okRows < min(nofLines, L)) and (tryRow < L):
-		tryRowOK = True
+	while (len(keep) < min(nofLines, L)) and (tryRow < L):
 		(x1,y1,x2,y2, rho,theta, length,cover) = lines[tryRow]
-		(x2x1, y2y1) = (x2-x1, y2-y1)
-		# but tryRow need to be different from all okRows
-		(closeIdx, closeTh, closeD1, closeD2, closeD) = (0,180,9999,9999,9999)
-		for idxRow in range(okRows):   
-			# compare lines[tryRow] to lines[idxRow]
-			# find d as distance between the two lines, this can be done in several ways
-			(x3,y3,x4,y4, rho3,theta3, length3,cover3) = lines[idxRow]
-			(tMin,tMax) = (min(theta,theta3),max(theta,theta3))
-			thetaDiff = min(tMax-tMin, tMin+np.pi-tMax)
-			# We may have that 
-#	An angle difference larger than 5 degrees, or rho difference larger
-#	than 'distLines' means that the lines are regarded as unique lines.
-#	Perhaps also thetaLim (here 5*pi/180) should be an input argument.
-			#if verbose and (thetaDiff < 2*thetaLim):
-			#	print( f"line {tryRow=:4d} and line {idxRow=:4d} " + \
-			#		   f"(angles: {theta*180/np.pi:6.2f} and {theta3*180/np.pi:6.2f}) " + \
-			#		   f"has angle difference of {thetaDiff*180/np.pi:6.2f}." )
-			#	print( f"{tryRow=:4d} {lines[tryRow,5]*180/np.pi:6.2f} [deg], " + \
-			#	       f"{idxRow=:4d} {lines[idxRow,5]*180/np.pi:6.2f} [deg]." )
-			#
-			#if (thetaDiff > thetaLim) or (abs(rho3-rho) > distLines): continue  
-			#
+		# kept lines with first end point close to one of the end points of this line
+		near = set()
+		for (x,y) in ((x1,y1),(x2,y2)):
+			(cx,cy) = cellOf(x,y)
+			for dx in (-1,0,1):
+				for dy in (-1,0,1):
+					near.update(grid.get((cx+dx,cy+dy), ()))
+		#
+		tryRowOK = True
+		if near:
+			K = lines[sorted(near)]
+			(x3,y3,x4,y4) = (K[:,0],K[:,1],K[:,2],K[:,3])
+			(x2x1, y2y1) = (x2-x1, y2-y1)
 			# distance between end points of each line
-			d1 = ( min(np.hypot(x3-x1,y3-y1), np.hypot(x3-x2,y3-y2)) + \
-			       min(np.hypot(x4-x1,y4-y1), np.hypot(x4-x2,y4-y2)) )/2
+			d1 = ( np.minimum(np.hypot(x3-x1,y3-y1), np.hypot(x3-x2,y3-y2)) + \
+			       np.minimum(np.hypot(x4-x1,y4-y1), np.hypot(x4-x2,y4-y2)) )/2
 			# or distance of end points projected onto the other line
-			d2 = ( abs(x2x1*(y3-y1)-(x3-x1)*y2y1) + \
-			       abs(x2x1*(y4-y1)-(x4-x1)*y2y1) )/(2*length)
+			with np.errstate(divide='ignore', invalid='ignore'):
+				d2 = ( np.abs(x2x1*(y3-y1)-(x3-x1)*y2y1) + \
+				       np.abs(x2x1*(y4-y1)-(x4-x1)*y2y1) )/(2*length)
 			# or a combination
 			d = (d1+d2)/2
-			#
-			if (d < closeD):
-				(closeIdx, closeTh, closeD1, closeD2, closeD) = (idxRow,thetaDiff,d1,d2,d)
-			#if verbose and (d < 2*distLines): 
-			#	print( f"line {tryRow=:4d} and line {idxRow=:4d}, " + \
-			#	       f"angle difference {thetaDiff*180/np.pi:6.2f}, " + \
-			#	       f"end points distances {d2=:6.1f}, {d=:6.1f}, {d1=:6.1f}." )
-			#
-			if (d < distLines): # to small distance
-				tryRowOK = False
-				break   # for loop
-			#
-		#end for (all idxRow)
-		if verbose:
-			print( f"line {tryRow:4d} has 'closest' line {closeIdx:4d}, " + \
-			       f"angle difference is {closeTh*180/np.pi:6.2f} [deg], " + \
-			       f"end points distances d2={closeD2:6.1f}, " + \
-			       f"d={closeD:6.1f}, d1={closeD1:6.1f}." )
+			tryRowOK = not np.any(d < distLines)   # to small distance
+			if verbose:
+				i = np.nanargmin(d) if np.any(np.isfinite(d)) else 0
+				print( f"line {tryRow:4d} has 'closest' line {sorted(near)[i]:4d}, " + \
+				       f"end points distances d2={d2[i]:6.1f}, " + \
+				       f"d={d[i]:6.1f}, d1={d1[i]:6.1f}." )
 		#
 		if tryRowOK:
 			if verbose:
-				print( f"  ==> Keep line in row {tryRow=:4d} as row {okRows=:4d} in 'lines'.")
-			if (okRows < tryRow): lines[okRows] = lines[tryRow]  
-			okRows = okRows + 1
+				print( f"  ==> Keep line in row {tryRow=:4d} as row {len(keep):4d} in 'lines'.")
+			keep.append(tryRow)
+			grid.setdefault(cellOf(x1,y1), []).append(tryRow)
 		elif verbose: 
 			print( f"  ==> Discard line in row {tryRow=:4d}.")
 		#
 		tryRow = tryRow + 1
 	# end while
 	if verbose:
-		print( f"-- getBestHoughLines() returns {okRows} lines in numpy array --\n" )
+		print( f"-- getBestHoughLines() returns {len(keep)} lines in numpy array --\n" )
 	#
-	return lines[:okRows]
+	return lines[keep]
 
 #  ..\ELE610\py3\bf1.py  contains the first version of this function
 def draw_lines(lines, img, color=(0,255,0), thickness=3, verbose=True):
@@ -51,7 +51,6 @@ import os.path
 import ctypes
 import numpy as np
 from time import sleep
-import random
 import cv2
 
 try:
@@ -79,6 +78,7 @@ except ImportError:
 from appImageViewer1 import myPath, MainWindow as inheritedMainWindow 
 from myImageTools import np2qimage
 from clsHoughCirclesDialog import HoughCirclesDialog
+from clsAutoFocus import AutoFocus
 
 class MainWindow(inheritedMainWindow):  
 	"""MainWindow class for this image viewer is inherited from another image viewer."""
@@ -101,6 +101,7 @@ class MainWindow(inheritedMainWindow):
 		self.cam = None
 		self.camOn = False
 		self.eyes = None
+		self.focusROI = None   # (x, y, w, h) used by findFocus(), None is central half of image
 		#
 		# I had some trouble finding a good way to inherit (and add modifications to) 
 		# functions 'initMenu' and 'setMenuItems' from appImageViewer1
@@ -388,18 +389,13 @@ class MainWindow(inheritedMainWindow):
 
 
 	def findFocus(self):
-		"""Find focus."""
-		if ueyeOK and self.camOn:
-			num_images = random.randint(15, 25)
-			print(f" Capturing {num_images} images to find focus.")
-   
-		# Capture images
-		for i in range(num_images):
-			print(f" Capturing image {i + 1} / {num_images}...")
-			self.getOneImage()
-   
-		# Asume focus was found
-		print(f"{self.appFileName}: FindFocus() - Focus found.")
+		"""Find exposure time giving the sharpest image in ROI, variance of Laplacian as metric (clsAutoFocus.py)."""
+		if not (ueyeOK and self.camOn):
+			return
+		af = AutoFocus(self.cam, ueye, roi=self.focusROI, method='laplacian')
+		(exposure, metric) = af.run()   # best exposure is set in camera
+		print( f"{self.appFileName}: findFocus() " + af.info() )
+		self.getOneImage()
 		return
 	
 	def blackDots(self):
@@ -454,7 +450,7 @@ class MainWindow(inheritedMainWindow):
 					return
 				#end
 			elif (len(self.npImage.shape) == 2):
-				self.A = self.npImage.copy()
+				self.A = self.npImage   # only read by HoughCircles, no copy needed
 				self.B = cv2.cvtColor(self.npImage, cv2.COLOR_GRAY2BGR )   
 			else:
 				print("prepareHoughCircles(): numpy image is not as expected. --> return")
@@ -482,8 +478,6 @@ class MainWindow(inheritedMainWindow):
 		return
   
 	def houghCircles (self):
-		oldPixmap = self.prevPixmap
-		self.prevPixmap = self.pixmap
 		self.A = np.array([])
 		self.prepareHoughCirclesA()
 		d = HoughCirclesDialog(self, title="Select parameters that locate the dice eyes")
@@ -505,15 +499,14 @@ class MainWindow(inheritedMainWindow):
 					cv2.circle(self.B, (x,y), r, (255, 0, 255), 3) # and circle outline 
 
 			self.A = np.array([])
+			self.history.push(self.npImage)
 			self.np2image2pixmap(self.B, numpyAlso=True)
 			self.B = np.array([])
 			self.setWindowTitle(f"{self.appFileName} : indicate found circles")
 			self.checkColor()
    
 		else:
-			self.pixmap = self.prevPixmap
-			self.pixmap2image2np()
-			self.prevPixmap = oldPixmap
+			self.np2image2pixmap(self.npImage, numpyAlso=True)   # restore, [Try it] may have changed pixmap
 
 		print(f"Number of eyes found: {self.eyes}")
 		return
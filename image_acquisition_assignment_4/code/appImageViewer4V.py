@@ -7,8 +7,12 @@
 #  Some (skeleton) methods for locating disc in image and finding the
 #  angle for rotation to estimate disk speed.
 #  Disk menu has actions for: locating disc, finding read sector and its angle, ...
+#  Frames from the camera may be recorded at camera frame rate into a raw frame
+#  file (clsFrameStore.py), and opened later, one frame at a time.
 #
 # Karl Skretting, UiS, November 2020, June 2022
+#                      October 2026, record and open raw frames (FrameStore),
+#                      findSpeed uses the frame timestamps
 
 # Example on how to use file:
 # (C:\...\Anaconda3) C:\..\py3> activate py38
@@ -17,10 +21,11 @@
 
 _appFileName = "appImageViewer4"
 _author = "Karl Skretting, UiS" 
-_version = "2022.06.27"
+_version = "2026.10.18"
 
 import sys
 import os.path
+import time
 #from math import hypot, pi, atan2, cos, sin    # sqrt, cos, sin, tan, log, ceil, floor 
 import numpy as np
 import cv2
@@ -34,7 +39,8 @@ except ImportError:
 	raise ImportError( f"{_appFileName}: Requires PyQt5." )
 #end try, import PyQt5 classes 
 
-from appImageViewer2 import myPath, MainWindow as inheritedMainWindow 
+from appImageViewer2 import myPath, ueyeOK, MainWindow as inheritedMainWindow 
+from clsFrameStore import FrameStore
 
 class MainWindow(inheritedMainWindow):  
 	"""MainWindow class for this image viewer is inherited from another image viewer."""
@@ -55,6 +61,8 @@ class MainWindow(inheritedMainWindow):
 		# # signal is already connected to cropEnd (appImageViewer1), and can be connected to more
 		# self.methodUsingRubberbandActive = False    # using this to check if rubber band is to be used here
 		#
+		self.frameStore = None   # raw frames opened by openFrames()
+		self.frameNo = 0
 		self.initMenu4()
 		self.setMenuItems4()
 		# print( f"File {_appFileName}: (debug) last line in __init__()" )
@@ -73,11 +81,25 @@ class MainWindow(inheritedMainWindow):
 		a = self.qaFindSpeed = QAction('Find speed', self)
 		a.triggered.connect(self.findSpeed)
 		a.setToolTip("Find speed for rotating disk (TODO)")
+		a = self.qaRecordFrames = QAction('Record raw frames', self)
+		a.triggered.connect(self.recordFrames)
+		a.setToolTip("Record frames from camera, at camera frame rate, into a raw frame file")
+		a = self.qaOpenFrames = QAction('Open raw frames', self)
+		a.triggered.connect(self.openFrames)
+		a.setToolTip("Open a raw frame file and show the first frame")
+		a = self.qaShowFrame = QAction('Show raw frame', self)
+		a.setShortcut('Ctrl+J')
+		a.triggered.connect(self.showFrame)
+		a.setToolTip("Show frame number ... from the opened raw frame file")
 		#
 		diskMenu = self.mainMenu.addMenu("Disk")
 		diskMenu.addAction(self.qaFindDisk)
 		diskMenu.addAction(self.qaFindRedSector)
 		diskMenu.addAction(self.qaFindSpeed)
+		diskMenu.addSeparator()
+		diskMenu.addAction(self.qaRecordFrames)
+		diskMenu.addAction(self.qaOpenFrames)
+		diskMenu.addAction(self.qaShowFrame)
 		diskMenu.setToolTipsVisible(True)
 		return
 	#end function initMenu4
@@ -90,6 +112,7 @@ class MainWindow(inheritedMainWindow):
 		#self.qaFindDisk.setEnabled(pixmapOK)   
 		#self.qaFindDisk.setEnabled(pixmapOK)   
 		#self.qaFindDisk.setEnabled(pixmapOK)
+		self.qaShowFrame.setEnabled(self.frameStore is not None)
 		return
 		
 # Methods for actions on the Disk-menu
@@ -221,6 +244,7 @@ class MainWindow(inheritedMainWindow):
 		print("This function is not ready yet.")
 		print("Different approaches may be used, here we sketch one alternative that may (or may not) work.")
 		
+		time1 = self.imageTime()   # None if image is not from camera or raw frame file
 		self.findDisk()
 		self.findRedSector()
 		if not hasattr(self, 'sectorCenter1'):
@@ -230,12 +254,15 @@ class MainWindow(inheritedMainWindow):
 		angle1 = self.sectorCenter1
 		print(f"Angle of the first image: {angle1:.2f} degrees")
   
-		file_name, _ = QFileDialog.getOpenFileName(self, "Open second image", "", "Image Files (*.png *.jpg *.bmp)")
-		if not file_name:
-			print("No image selected")
-			return
-
-		self.openFile(file_name)
+		if self.frameStore is not None:   # second image from the opened raw frame file
+			self.showFrame()
+		else:
+			file_name, _ = QFileDialog.getOpenFileName(self, "Open second image", "", "Image Files (*.png *.jpg *.bmp)")
+			if not file_name:
+				print("No image selected")
+				return
+			self.openFile(file_name)
+		time2 = self.imageTime()
 		self.findDisk()
 		self.findRedSector()
 		if not hasattr(self, 'sectorCenter1'):
@@ -249,17 +276,21 @@ class MainWindow(inheritedMainWindow):
 		if angle_diff > 180:
 			angle_diff = 360 - angle_diff
   
-		msg = QMessageBox()
-		msg.setIcon(QMessageBox.Information)
-		msg.setWindowTitle("Angle difference")
-		msg.setText(f"The difference between the angle of both images is: {angle_diff:.2f} degrees")
-		msg.setStandardButtons(QMessageBox.Ok)
-		msg.exec()
+		if (time1 is not None) and (time2 is not None) and (time1 != time2):
+			time_diff = abs(time2 - time1)   # from the frame timestamps
+			print(f"Time difference from frame timestamps: {1000*time_diff:.3f} ms")
+		else:
+			msg = QMessageBox()
+			msg.setIcon(QMessageBox.Information)
+			msg.setWindowTitle("Angle difference")
+			msg.setText(f"The difference between the angle of both images is: {angle_diff:.2f} degrees")
+			msg.setStandardButtons(QMessageBox.Ok)
+			msg.exec()
   
-		time_diff, ok = QInputDialog.getDouble(self, "Time difference", "Enter the time difference between the two images (in seconds):", min=0.0)
-		if not ok:
-			print("No time difference provided")
-			return
+			time_diff, ok = QInputDialog.getDouble(self, "Time difference", "Enter the time difference between the two images (in seconds):", min=0.0)
+			if not ok or (time_diff <= 0):
+				print("No time difference provided")
+				return
 
 		angular_speed = angle_diff / time_diff
 		print(f"Angular speed: {angular_speed:.2f} degrees per second")
@@ -273,6 +304,99 @@ class MainWindow(inheritedMainWindow):
 
 		return
 		
+# Methods for raw frames, see clsFrameStore.py
+	def recordFrames(self):
+		"""Record a number of frames from the camera into a raw frame file.
+		The camera runs in continuous capture mode, and each frame is copied 
+		directly from the camera buffer into the (memory-mapped) file, 
+		no encoding, so the camera frame rate is kept.
+		"""
+		if not (ueyeOK and self.camOn):
+			return
+		(n, ok) = QInputDialog.getInt(self, "Record raw frames", "Number of frames:", 
+		                              value=200, min=1, max=100000)
+		if not ok:
+			return
+		fName = QFileDialog.getSaveFileName(self, "Record raw frames into file", myPath, 
+		                                    "Raw frames (*.frames);;All files (*)")[0]
+		if (fName == ""):
+			return
+		wasContinuous = self.cam.continuous
+		if not wasContinuous:
+			self.cam.start_continuous()
+		store = None
+		timeouts = 0
+		t0 = time.perf_counter()
+		while ((store is None) or (len(store) < n)) and (timeouts < 5):
+			frame = self.cam.next_frame(1000)   # a view of the camera buffer, locked
+			if frame is None:
+				timeouts += 1
+				continue
+			with frame:   # buffer is unlocked at the end
+				A = frame.as_1d_image()[:,:,:3]
+				if store is None:
+					store = FrameStore.create(fName, A.shape, capacity=n)
+				t = frame.device_time if (frame.device_time is not None) else frame.timestamp
+				seq = frame.frame_number if (frame.frame_number is not None) else self.cam.frame_count
+				store.append(A, timestamp=t, sequence=seq)
+		#end while
+		t1 = time.perf_counter()
+		if not wasContinuous:
+			self.cam.stop_continuous()
+		if store is None:
+			print( f"{self.appFileName}: recordFrames() no frames from camera" )
+			return
+		T = store.timestamps()
+		fps = ((len(T) - 1)/(T[-1] - T[0])) if (len(T) > 1) else 0.0
+		print( f"{self.appFileName}: recordFrames() {len(store)} frames in {t1-t0:.2f} s, {fps:.1f} fps, " +
+		       f"{self.cam.dropped_count} dropped by camera, {timeouts} timeouts" )
+		store.close()
+		self.openFrames(fName)
+		return
+		
+	def openFrames(self, fName=None):
+		"""Open a raw frame file (made by recordFrames()) and show the first frame."""
+		if not fName:
+			fName = QFileDialog.getOpenFileName(self, "Open raw frames", myPath, 
+			                                    "Raw frames (*.frames);;All files (*)")[0]
+		if (fName == ""):
+			return
+		try:
+			store = FrameStore.open(fName)
+		except (IOError, ValueError) as e:
+			QMessageBox.warning(self, "Open raw frames", str(e))
+			return
+		if self.frameStore is not None:
+			self.frameStore.close()
+		self.frameStore = store
+		print( f"{self.appFileName}: openFrames() {store.info()}" )
+		self.showFrame(0)
+		return
+		
+	def showFrame(self, frameNo=None):
+		"""Show frame 'frameNo' from the opened raw frame file, ask for the number if not given."""
+		if (self.frameStore is None) or (len(self.frameStore) == 0):
+			return
+		last = len(self.frameStore) - 1
+		if (frameNo is None) or isinstance(frameNo, bool):   # the menu action gives 'checked' (False)
+			(frameNo, ok) = QInputDialog.getInt(self, "Show raw frame", f"Frame number (0 to {last}):", 
+			                                    value=min(self.frameNo + 1, last), min=0, max=last)
+			if not ok:
+				return
+		self.frameNo = min(max(frameNo, 0), last)
+		if self.curItem:
+			self.history.push(self.npImage)
+		self.np2image2pixmap(np.array(self.frameStore[self.frameNo]))   # copy from file
+		t = self.frameStore.timestamps()
+		self.npImageTime = t[self.frameNo]
+		self.timedImage = self.npImage
+		self.setWindowTitle( f"{self.appFileName} : frame {self.frameNo} of {last+1}, " + 
+		                     f"t = {t[self.frameNo]-t[0]:.4f} s" )
+		self.status.setText( f"frame {self.frameNo}, (w,h) = ({self.pixmap.width()},{self.pixmap.height()})" )
+		self.setMenuItems()
+		self.setMenuItems4()
+		return
+		
 #end class MainWindow
 
 if __name__ == '__main__':